@@ -0,0 +1,70 @@
+"""Helpers shared by the benchmark scripts: result files and regression checks."""
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def save_results(name: str, results: dict, path: Optional[str] = None) -> Path:
+    """Write ``results`` with run metadata to ``path`` (default benchmarks/results/<name>-<rev>.json)."""
+    revision = git_revision()
+    payload = {
+        "benchmark": name,
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    out = Path(path) if path else RESULTS_DIR / f"{name}-{revision}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(payload, f, indent=2)
+    return out
+
+
+def compare(current: Dict[str, float], baseline_path: str, tolerance_pct: float,
+            higher_is_better: bool = False) -> List[str]:
+    """Regressions of ``current`` metrics against a saved baseline, as readable lines.
+
+    ``baseline_path`` is a file written by ``save_results`` whose results
+    carry a flat ``metrics`` map; a metric regresses when it is worse than
+    the baseline by more than ``tolerance_pct`` percent.
+    """
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)["results"]["metrics"]
+    regressions = []
+    for metric, value in current.items():
+        old = baseline.get(metric)
+        if not isinstance(old, (int, float)) or old == 0:
+            continue
+        change = (value - old) / old * 100
+        if higher_is_better:
+            change = -change
+        if change > tolerance_pct:
+            regressions.append(f"{metric}: {old:.4g} → {value:.4g} ({change:+.1f}% worse, limit {tolerance_pct}%)")
+    return regressions
+
+
+def exit_on_regressions(regressions: List[str]):
+    if regressions:
+        print("❌ Regressions:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print("✅ No regressions against baseline")
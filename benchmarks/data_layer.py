@@ -0,0 +1,206 @@
+"""Microbenchmarks for the non-LLM hot paths.
+
+Covers, across input sizes:
+
+* ``mcp_server._load_json_file`` and the ``get_*`` JSON serializers
+* ``agents.extract_json``: well-formed, fenced, prose-wrapped and
+  pathological LLM responses (no JSON, unbalanced brackets, truncated)
+* each agent's prompt building and response handling, with an instant
+  stub LLM so only the agent's own work is timed
+
+Each case reports ops/sec and the peak memory allocated during one op
+(tracemalloc), plus a log-log scaling exponent across sizes (1.0 is
+linear). With ``--baseline`` the run fails when any case's ops/sec drops by
+more than ``--tolerance`` percent.
+
+    python -m benchmarks.data_layer
+    python -m benchmarks.data_layer --quick --baseline benchmarks/results/data_layer-<rev>.json --tolerance 15
+"""
+import argparse
+import json
+import math
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.common import compare, exit_on_regressions, save_results
+from benchmarks.synthetic import SyntheticTelemetry
+
+INCIDENT = {
+    "service": "payment-api",
+    "alert_time": "2024-01-15T14:30:00Z",
+    "symptoms": "High error rate and increased latency on /checkout endpoint",
+}
+
+
+class _StubResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubLLM:
+    """Answers instantly with a fixed string, so agent timings exclude the model."""
+
+    def __init__(self, content: str):
+        self.response = _StubResponse(content)
+
+    def invoke(self, messages):
+        return self.response
+
+
+def measure(fn: Callable[[], object], min_time: float) -> dict:
+    """Run ``fn`` repeatedly for at least ``min_time`` seconds; throughput and allocations."""
+    fn()  # warm-up (imports, regex compilation caches)
+    runs, started = 0, time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ops_per_second": round(runs / elapsed, 2),
+        "mean_ms": round(elapsed / runs * 1000, 4),
+        "peak_alloc_kb": round((peak - before) / 1024, 1),
+        "retained_kb": round((retained - before) / 1024, 1),
+    }
+
+
+def scaling_exponent(sizes: List[int], results: List[dict]) -> float:
+    """Slope of log(time) over log(size) between the smallest and largest inputs."""
+    if len(sizes) < 2:
+        return 0.0
+    t0, t1 = results[0]["mean_ms"], results[-1]["mean_ms"]
+    if t0 <= 0 or t1 <= 0:
+        return 0.0
+    return round(math.log(t1 / t0) / math.log(sizes[-1] / sizes[0]), 2)
+
+
+def _dataset(data_dir: Path, lines: int):
+    generator = SyntheticTelemetry(seed=1, services=8, log_lines=lines, hours=2, incidents=1,
+                                   metric_interval=max(1, 7200 // max(10, lines // 10)))
+    logs = list(generator.iter_logs())
+    metrics = generator.metrics_for(generator.incidents[0]["service"])
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for name, data in (("logs.json", logs), ("metrics.json", metrics), ("deployments.json", generator.deployments)):
+        with open(data_dir / name, "w") as f:
+            json.dump(data, f, indent=2)
+    return logs, metrics, generator.deployments
+
+
+def _extract_json_inputs(size: int) -> Dict[str, str]:
+    findings = [f"Finding {i}: connection pool exhausted at 14:{i % 60:02d}" for i in range(max(1, size // 50))]
+    array = json.dumps(findings)
+    filler = ("The logs show elevated latency across services with no clear single cause. " * (size // 75 + 1))[:size]
+    return {
+        "clean": array,
+        "fenced": f"```json\n{array}\n```",
+        "prose_wrapped": f"Here are the findings:\n{array}\nLet me know if you need more detail.",
+        "no_json": filler,
+        "truncated": '{"root_cause": "pool exhaustion", "supporting_evidence": ' + array[:-1],
+        "unbalanced_brackets": "[" + ("[ note " * (size // 7 + 1))[:size],
+    }
+
+
+def run(sizes: List[int], extract_sizes: List[int], min_time: float) -> dict:
+    from src import agents, mcp_server
+
+    cases: Dict[str, List[dict]] = {}
+
+    def record(name: str, size: int, fn: Callable[[], object]):
+        result = measure(fn, min_time)
+        result["size"] = size
+        cases.setdefault(name, []).append(result)
+        print(f"   {name:<42} n={size:<8} {result['ops_per_second']:>12,.1f} ops/s  "
+              f"{result['mean_ms']:>10.3f} ms  peak alloc {result['peak_alloc_kb']:>10.1f} KB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original_dir = mcp_server.DATA_DIR
+        try:
+            for size in sizes:
+                data_dir = Path(tmp) / str(size)
+                logs, metrics, deployments = _dataset(data_dir, size)
+                mcp_server.DATA_DIR = data_dir
+                logs_payload, metrics_payload = mcp_server.get_logs(), mcp_server.get_metrics()
+                deployments_payload = mcp_server.get_deployments()
+
+                record("mcp_server._load_json_file(logs)", size, lambda: mcp_server._load_json_file("logs.json"))
+                record("mcp_server.get_logs", size, mcp_server.get_logs)
+                record("mcp_server.get_metrics", size, mcp_server.get_metrics)
+                record("mcp_server.get_deployments", size, mcp_server.get_deployments)
+
+                findings = json.dumps(["Connection pool exhausted", "Timeouts to the database"])
+                logs_agent = agents.LogsAgent(StubLLM(findings))
+                telemetry_agent = agents.TelemetryAgent(StubLLM(findings))
+                deployment_agent = agents.DeploymentAgent(StubLLM(findings))
+                record("agents.LogsAgent.analyze", size,
+                       lambda: logs_agent.analyze("logs.json", INCIDENT, payload=logs_payload))
+                record("agents.TelemetryAgent.analyze", size,
+                       lambda: telemetry_agent.analyze("metrics.json", INCIDENT, payload=metrics_payload))
+                record("agents.DeploymentAgent.analyze", size,
+                       lambda: deployment_agent.analyze("deployments.json", INCIDENT["alert_time"], INCIDENT,
+                                                        payload=deployments_payload))
+
+                evidence = [f"[payment-api] {log['message']}" for log in logs[: max(3, size // 100)]]
+                reasoning_agent = agents.ReasoningAgent(StubLLM(json.dumps(
+                    {"root_cause": "pool", "confidence": 80, "supporting_evidence": evidence[:3], "causal_chain": "a → b"})))
+                report_agent = agents.ReportAgent(StubLLM(json.dumps(
+                    {"actions": [{"rank": 1, "action": "Roll back", "risk_level": "low", "expected_impact": "x"}]})))
+                state = {"root_cause_hypothesis": "pool", "confidence": 80, "supporting_evidence": evidence}
+                record("agents.ReasoningAgent.correlate", size,
+                       lambda: reasoning_agent.correlate(evidence, evidence, evidence))
+                record("agents.ReportAgent.generate", size, lambda: report_agent.generate(state))
+        finally:
+            mcp_server.DATA_DIR = original_dir
+
+    for size in extract_sizes:
+        for kind, text in _extract_json_inputs(size).items():
+            record(f"agents.extract_json[{kind}]", size, lambda text=text: agents.extract_json(text))
+
+    results = {"cases": {}, "metrics": {}}
+    for name, runs in cases.items():
+        runs_sizes = [r["size"] for r in runs]
+        results["cases"][name] = {"runs": runs, "scaling_exponent": scaling_exponent(runs_sizes, runs)}
+        for r in runs:
+            results["metrics"][f"{name}@{r['size']}.ops_per_second"] = r["ops_per_second"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100, 1_000, 10_000, 100_000],
+                        help="Log lines per dataset")
+    parser.add_argument("--extract-sizes", type=int, nargs="*", default=[1_000, 10_000, 50_000],
+                        help="Response length in characters for extract_json")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds per measurement")
+    parser.add_argument("--quick", action="store_true", help="Small sizes and short runs, for CI")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/data_layer-<rev>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="Allowed ops/sec drop in percent")
+    args = parser.parse_args()
+    if args.quick:
+        args.sizes, args.extract_sizes, args.min_time = [100, 1_000, 5_000], [1_000, 5_000], 0.1
+
+    results = run(args.sizes, args.extract_sizes, args.min_time)
+
+    print("\nScaling exponents (1.0 = linear):")
+    for name, case in results["cases"].items():
+        flag = "  ⚠ superlinear" if case["scaling_exponent"] > 1.3 else ""
+        print(f"   {name:<42} {case['scaling_exponent']:>5}{flag}")
+
+    out = save_results("data_layer", results, args.output)
+    print(f"\nResults saved to {out}")
+    if args.baseline:
+        exit_on_regressions(compare(results["metrics"], args.baseline, args.tolerance, higher_is_better=True))
+
+
+if __name__ == "__main__":
+    main()
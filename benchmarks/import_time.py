@@ -0,0 +1,97 @@
+"""Cold-start import benchmark.
+
+Each target is imported in a fresh interpreter (``python -X importtime``) so
+nothing is warm; the median over ``--runs`` is reported together with the packages
+that account for most of the import time. Heavy modules that must stay
+deferred (provider SDKs, LangGraph for the CLI entry point) are checked
+explicitly.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --baseline benchmarks/results/import_time-<rev>.json --tolerance 20
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import BASE_DIR, compare, exit_on_regressions, save_results
+
+TARGETS = ["main", "src.llm_factory", "src.agents", "src.graph", "src.commander", "src.service"]
+
+# Modules a target must not pull in at import time
+FORBIDDEN = {
+    "main": ["langgraph", "langchain_google_genai", "langchain_anthropic", "fastmcp"],
+    "src.llm_factory": ["langchain_google_genai", "langchain_anthropic"],
+    "src.agents": ["langchain_google_genai", "langchain_anthropic", "fastmcp"],
+    "src.graph": ["langchain_google_genai", "langchain_anthropic", "fastmcp"],
+}
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(target: str) -> dict:
+    """Import ``target`` in a fresh interpreter; wall time, heaviest packages and any forbidden modules loaded."""
+    forbidden = FORBIDDEN.get(target, [])
+    code = (
+        "import json, sys, time; t = time.perf_counter(); import " + target + "; "
+        "print('WALL', time.perf_counter() - t); "
+        f"print('LOADED', json.dumps([m for m in {forbidden!r} if m in sys.modules]))"
+    )
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=BASE_DIR, capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+
+    wall = loaded = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("WALL "):
+            wall = float(line.split()[1])
+        elif line.startswith("LOADED "):
+            loaded = json.loads(line[len("LOADED "):])
+    by_package = {}
+    for match in _IMPORTTIME.finditer(proc.stderr):
+        self_us, _, _, module = match.groups()
+        package = module.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + int(self_us)
+    heaviest = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:8]
+    return {
+        "wall_seconds": wall,
+        "forbidden_loaded": loaded or [],
+        "top_packages_ms": {package: round(us / 1000, 1) for package, us in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--targets", nargs="*", default=TARGETS)
+    parser.add_argument("--output", help="Result file (default benchmarks/results/import_time-<rev>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=25.0, help="Allowed slowdown in percent")
+    args = parser.parse_args()
+
+    targets, metrics, violations = {}, {}, []
+    for target in args.targets:
+        runs = [measure(target) for _ in range(args.runs)]
+        median = statistics.median(r["wall_seconds"] for r in runs)
+        targets[target] = {"median_seconds": round(median, 4), "runs": [round(r["wall_seconds"], 4) for r in runs],
+                           "top_packages_ms": runs[-1]["top_packages_ms"], "forbidden_loaded": runs[-1]["forbidden_loaded"]}
+        metrics[f"{target}.median_seconds"] = round(median, 4)
+        if runs[-1]["forbidden_loaded"]:
+            violations.append(f"{target} imports {', '.join(runs[-1]['forbidden_loaded'])} eagerly")
+        print(f"{target:<20} {median * 1000:8.1f} ms  (slowest: {', '.join(list(runs[-1]['top_packages_ms'])[:3])})")
+
+    out = save_results("import_time", {"runs": args.runs, "targets": targets, "metrics": metrics}, args.output)
+    print(f"\nResults saved to {out}")
+
+    regressions = [f"deferred import violated: {v}" for v in violations]
+    if args.baseline:
+        regressions += compare(metrics, args.baseline, args.tolerance)
+    if regressions or args.baseline:
+        exit_on_regressions(regressions)
+
+
+if __name__ == "__main__":
+    main()
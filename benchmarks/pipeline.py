@@ -0,0 +1,202 @@
+"""End-to-end pipeline benchmark on the fake LLM (LLM_PROVIDER=fake).
+
+Runs ``IncidentCommander.investigate`` fully offline and reports:
+
+* orchestration overhead: investigation wall time with zero LLM latency,
+  i.e. everything the pipeline itself costs (data loading, prompt
+  building, parsing, checkpointing, graph scheduling)
+* per-node wall time with a realistic LLM latency distribution
+* throughput at N concurrent investigations
+* peak memory (tracemalloc peak and process max RSS)
+
+The fast path and similarity recall are disabled so every run goes through
+every node, and checkpoints go to a temporary database.
+
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --latency lognormal:0.8,0.5 --concurrency 1 4 16
+    python -m benchmarks.pipeline --baseline benchmarks/results/pipeline-<rev>.json
+"""
+import argparse
+import contextlib
+import io
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from datetime import datetime, timedelta
+
+from benchmarks.common import compare, exit_on_regressions, save_results
+
+_node_timer_var: ContextVar = ContextVar("benchmark_node_timer", default=None)
+
+
+def _configure_environment(tmp_dir: str):
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["SIMILARITY_ENABLED"] = "false"
+    os.environ["COALESCE_WINDOW_SECONDS"] = "0"
+    os.environ["CHECKPOINT_DB"] = os.path.join(tmp_dir, "checkpoints.sqlite")
+    os.environ.setdefault("FAKE_LLM_SEED", "7")
+
+
+def _node_timer_class():
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.tracers.context import register_configure_hook
+
+    class NodeTimer(BaseCallbackHandler):
+        """Wall time of each graph node run, keyed by node name."""
+
+        def __init__(self):
+            self.started = {}
+            self.durations = defaultdict(list)
+
+        def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+            name = kwargs.get("name")
+            if metadata and name and metadata.get("langgraph_node") == name:
+                self.started[run_id] = (name, time.perf_counter())
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            if run_id in self.started:
+                name, started = self.started.pop(run_id)
+                self.durations[name].append(time.perf_counter() - started)
+
+        on_chain_error = on_chain_end
+
+    register_configure_hook(_node_timer_var, inheritable=True)
+    return NodeTimer
+
+
+def _incident(i: int):
+    from src.models import IncidentInput
+    return IncidentInput(
+        service="payment-api",
+        alert_time=datetime(2024, 1, 15, 14, 30) + timedelta(hours=i),
+        symptoms="High error rate and increased latency on /checkout endpoint",
+        logs_path="data/logs.json",
+        metrics_path="data/metrics.json",
+        deployment_path="data/deployments.json",
+    )
+
+
+def _commander(latency: str):
+    os.environ["FAKE_LLM_LATENCY"] = latency
+    from src.commander import IncidentCommander
+    return IncidentCommander()
+
+
+def _run(commander, i: int, tag: str, timer=None) -> float:
+    token = _node_timer_var.set(timer) if timer is not None else None
+    started = time.perf_counter()
+    try:
+        commander.investigate(_incident(i), investigation_id=f"bench-{tag}-{i}")
+    finally:
+        if token is not None:
+            _node_timer_var.reset(token)
+    return time.perf_counter() - started
+
+
+def _stats(values):
+    ordered = sorted(values)
+    return {
+        "mean": round(statistics.mean(ordered), 4),
+        "p50": round(ordered[len(ordered) // 2], 4),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def run_benchmark(iterations: int, latency: str, concurrency: list) -> dict:
+    node_timer = _node_timer_class()
+
+    # Orchestration overhead: zero-latency LLM, so wall time is pipeline cost only
+    commander = _commander("0")
+    _run(commander, -1, "warmup")
+    overhead_timer = node_timer()
+    overhead = [_run(commander, i, "overhead", overhead_timer) for i in range(iterations)]
+
+    # Per-node wall time under the configured latency distribution
+    commander = _commander(latency)
+    latency_timer = node_timer()
+    walls = [_run(commander, i, "latency", latency_timer) for i in range(iterations)]
+
+    # Throughput and peak memory at each concurrency level
+    throughput = {}
+    tracemalloc.start()
+    for workers in concurrency:
+        total = max(workers * 2, iterations)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda i: copy_context().run(_run, commander, i, f"c{workers}"), range(total)))
+        elapsed = time.perf_counter() - started
+        throughput[workers] = {"investigations": total, "seconds": round(elapsed, 3),
+                               "per_second": round(total / elapsed, 3)}
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        max_rss_kb //= 1024
+
+    results = {
+        "iterations": iterations,
+        "llm_latency": latency,
+        "orchestration_overhead_seconds": _stats(overhead),
+        "overhead_by_node_seconds": {n: _stats(d) for n, d in overhead_timer.durations.items()},
+        "investigation_seconds": _stats(walls),
+        "node_seconds": {n: _stats(d) for n, d in latency_timer.durations.items()},
+        "throughput": throughput,
+        "peak_traced_mb": round(peak / 2**20, 2),
+        "max_rss_mb": round(max_rss_kb / 1024, 1),
+    }
+    results["metrics"] = {
+        "overhead_p50_seconds": results["orchestration_overhead_seconds"]["p50"],
+        "investigation_p50_seconds": results["investigation_seconds"]["p50"],
+        "peak_traced_mb": results["peak_traced_mb"],
+        **{f"throughput_c{w}_per_second": t["per_second"] for w, t in throughput.items()},
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--latency", default="uniform:0.05,0.15", help="Fake LLM latency spec (see src/fake_llm.py)")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 4, 8])
+    parser.add_argument("--output", help="Result file (default benchmarks/results/pipeline-<rev>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _configure_environment(tmp_dir)
+        # The graph's progress prints would swamp the output (and cost time writing to the terminal)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_benchmark(args.iterations, args.latency, args.concurrency)
+
+    overhead = results["orchestration_overhead_seconds"]
+    print(f"Orchestration overhead   p50 {overhead['p50'] * 1000:.1f} ms  p95 {overhead['p95'] * 1000:.1f} ms")
+    print(f"Investigation ({args.latency})  p50 {results['investigation_seconds']['p50']:.3f} s")
+    for node, stats in sorted(results["node_seconds"].items(), key=lambda item: -item[1]["mean"]):
+        print(f"   {node:<18} mean {stats['mean'] * 1000:8.1f} ms  p95 {stats['p95'] * 1000:8.1f} ms")
+    for workers, t in results["throughput"].items():
+        print(f"Throughput @ {workers:>2} concurrent: {t['per_second']:.2f} investigations/s")
+    print(f"Peak traced memory {results['peak_traced_mb']} MB, max RSS {results['max_rss_mb']} MB")
+
+    out = save_results("pipeline", results, args.output)
+    print(f"\nResults saved to {out}")
+
+    if args.baseline:
+        metrics = results["metrics"]
+        higher = {k: v for k, v in metrics.items() if k.startswith("throughput")}
+        lower = {k: v for k, v in metrics.items() if k not in higher}
+        exit_on_regressions(compare(lower, args.baseline, args.tolerance)
+                            + compare(higher, args.baseline, args.tolerance, higher_is_better=True))
+
+
+if __name__ == "__main__":
+    main()
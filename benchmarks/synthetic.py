@@ -0,0 +1,475 @@
+"""Seeded synthetic telemetry in the repo's data schemas, with ground truth.
+
+Generates a time-ordered log stream across many services, per-service
+metric documents with timelines, and a deployment history. Incidents of
+known kinds (pool exhaustion, memory leak, bad deploy) are injected: a
+causing deployment lands shortly before, the service's logs and metrics
+degrade during the window, and dependent services log upstream errors.
+``ground_truth.json`` records every injected incident, and
+``incidents.jsonl`` has one ``IncidentInput`` per incident for
+``python main.py --batch``.
+
+Output layout (``--out``):
+
+    logs.json              JSON array            (--formats json)
+    logs.jsonl             one record per line   (--formats jsonl)
+    shards/logs-00000.jsonl.gz ...               (--formats shards; LOGS_GLOB=shards/*.jsonl.gz)
+    metrics.json           document for the first incident's service
+    metrics/<service>.json document per service
+    deployments.json
+    ground_truth.json, incidents.jsonl
+
+Logs are streamed, so 10^8 lines need disk, not memory. Point the app at
+the result with DATA_DIR=<out>.
+
+    python -m benchmarks.synthetic --out data/synthetic --lines 1e6 --services 20 --incidents 5
+    python -m benchmarks.synthetic --out /tmp/big --lines 1e8 --formats shards --hours 72 --check
+"""
+import argparse
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from src.shards import write_shard
+
+TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+SERVICE_NAMES = [
+    "payment-api", "auth-service", "order-service", "notification-service", "inventory-service",
+    "shipping-service", "user-profile", "search-api", "cart-service", "pricing-service",
+]
+
+BACKGROUND_LOGS = {
+    "INFO": [
+        "Request completed in {n}ms",
+        "Health check passed",
+        "Processed {n} messages from queue",
+        "Cache refreshed with {n} entries",
+        "User session created",
+    ],
+    "WARN": [
+        "Slow request detected: {n}ms",
+        "Retrying request to downstream (attempt {d})",
+        "Cache miss ratio above threshold: {d}%",
+    ],
+    "ERROR": [
+        "Request validation failed: missing field",
+        "Downstream returned HTTP 502",
+    ],
+}
+
+# Per kind: log templates during the incident (level, message), precursor warnings,
+# the causing deployment change, metric effects, and the expected diagnosis
+INCIDENT_KINDS = {
+    "pool_exhaustion": {
+        "logs": [("ERROR", "Connection pool exhausted: no available connections"),
+                 ("ERROR", "Database connection timeout after 30000ms"),
+                 ("CRITICAL", "Connection timeout expired waiting for pool")],
+        "precursors": [("WARN", "Database connection pool running low: {d}/10 available")],
+        "change": "Updated database connection pool size from 20 to 10",
+        "symptoms": "High error rate and increased latency",
+        "root_cause": "Database connection pool exhaustion caused by pool size reduction",
+        "expected_rule": "pool_exhaustion",
+    },
+    "memory_leak": {
+        "logs": [("ERROR", "java.lang.OutOfMemoryError: Java heap space"),
+                 ("WARN", "GC overhead limit approaching: pause {n}ms"),
+                 ("CRITICAL", "Container killed: memory limit exceeded")],
+        "precursors": [("WARN", "Heap usage at {d}% after full GC")],
+        "change": "Enabled in-memory response cache for listings",
+        "symptoms": "Pods restarting and intermittent 503 errors",
+        "root_cause": "Memory leak from the new in-memory response cache",
+        "expected_rule": None,
+    },
+    "bad_deploy": {
+        "logs": [("ERROR", "NullPointerException in CheckoutHandler.process"),
+                 ("ERROR", "Unhandled exception: HTTP 500 returned to client")],
+        "precursors": [],
+        "change": "Upgraded payments SDK to v5.0 with new request serializer",
+        "symptoms": "Spike in HTTP 500 responses",
+        "root_cause": "Regression introduced by the payments SDK upgrade",
+        "expected_rule": None,
+    },
+}
+
+BENIGN_CHANGES = [
+    "Bumped logging library to latest patch",
+    "Increased cache TTL from 60s to 120s",
+    "Added request tracing headers",
+    "Refactored retry configuration",
+    "Updated feature flag defaults",
+]
+
+
+def _ts(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime(TS_FORMAT)
+
+
+class SyntheticTelemetry:
+    """Deterministic (per seed) generator of logs, metrics and deployments with injected incidents."""
+
+    def __init__(self, seed: int = 42, services: int = 10, log_lines: int = 100_000, hours: float = 24.0,
+                 incidents: int = 3, kinds: Optional[List[str]] = None, start: str = "2024-01-15T00:00:00Z",
+                 metric_interval: int = 60, incident_minutes: int = 20):
+        self.seed = seed
+        self.services = [SERVICE_NAMES[i] if i < len(SERVICE_NAMES) else f"service-{i:03d}" for i in range(services)]
+        self.log_lines = int(log_lines)
+        self.start = datetime.fromisoformat(start.replace("Z", "+00:00")).timestamp()
+        self.span = hours * 3600
+        self.metric_interval = metric_interval
+        self.incident_seconds = incident_minutes * 60
+        self.kinds = kinds or list(INCIDENT_KINDS)
+        self.incidents = self._plan_incidents(incidents)
+        self.deployments = self._plan_deployments()
+
+    def _plan_incidents(self, count: int) -> List[dict]:
+        rng = random.Random(self.seed)
+        incidents = []
+        slot = (self.span - 2 * self.incident_seconds) / max(1, count)
+        for i in range(count):
+            kind = self.kinds[i % len(self.kinds)]
+            service = self.services[i % len(self.services)]
+            begin = self.start + self.incident_seconds + i * slot + rng.uniform(0, max(0.0, slot - self.incident_seconds))
+            deployed_at = begin - rng.uniform(5, 25) * 60
+            dependents = [s for s in self.services if s != service]
+            incidents.append({
+                "id": f"inc-{i:04d}",
+                "kind": kind,
+                "service": service,
+                "start": begin,
+                "end": begin + self.incident_seconds,
+                "deployed_at": deployed_at,
+                # Early warnings start after the causing deploy, at most 10 minutes ahead
+                "warn_from": max(deployed_at, begin - 600),
+                "deployment_id": f"deploy-{9000 + i}",
+                "affected": rng.sample(dependents, min(2, len(dependents))),
+            })
+        return incidents
+
+    def _plan_deployments(self) -> List[dict]:
+        rng = random.Random(self.seed + 1)
+        deployments = []
+        for n, service in enumerate(self.services):
+            at = self.start + rng.uniform(0, 6 * 3600)
+            version = 1
+            while at < self.start + self.span:
+                deployments.append({
+                    "deployment_id": f"deploy-{n:03d}{version:03d}",
+                    "service": service,
+                    "version": f"v1.{version}.0",
+                    "deployed_at": _ts(at),
+                    "status": "success",
+                    "changes": rng.sample(BENIGN_CHANGES, 2),
+                    "deployed_by": "ci-cd-pipeline",
+                    "commit_hash": f"{rng.getrandbits(28):07x}",
+                    "rollback_available": True,
+                })
+                version += 1
+                at += rng.uniform(4, 12) * 3600
+        for incident in self.incidents:
+            deployments.append({
+                "deployment_id": incident["deployment_id"],
+                "service": incident["service"],
+                "version": f"v2.{incident['id'][-4:]}.0",
+                "deployed_at": _ts(incident["deployed_at"]),
+                "status": "success",
+                "changes": [INCIDENT_KINDS[incident["kind"]]["change"], "Added request tracing headers"],
+                "deployed_by": "ci-cd-pipeline",
+                "commit_hash": f"{rng.getrandbits(28):07x}",
+                "rollback_available": True,
+            })
+        deployments.sort(key=lambda d: d["deployed_at"])
+        return deployments
+
+    def iter_logs(self) -> Iterator[dict]:
+        """Time-ordered log records; incident windows carry the kind's errors."""
+        rng = random.Random(self.seed + 2)
+        services = self.services
+        step = self.span / max(1, self.log_lines)
+        levels = ["INFO"] * 96 + ["WARN"] * 3 + ["ERROR"]
+        incidents = sorted(self.incidents, key=lambda i: i["start"])
+        last_second, stamp = None, None
+        for i in range(self.log_lines):
+            epoch = self.start + i * step
+            second = int(epoch)
+            if second != last_second:
+                last_second, stamp = second, _ts(second)
+            service = services[rng.randrange(len(services))]
+            level, message = None, None
+            for incident in incidents:
+                if incident["warn_from"] <= epoch <= incident["end"]:
+                    spec = INCIDENT_KINDS[incident["kind"]]
+                    if service == incident["service"]:
+                        if epoch >= incident["start"] and rng.random() < 0.5:
+                            level, message = rng.choice(spec["logs"])
+                        elif epoch < incident["start"] and spec["precursors"] and rng.random() < 0.2:
+                            level, message = rng.choice(spec["precursors"])
+                    elif service in incident["affected"] and epoch >= incident["start"] and rng.random() < 0.15:
+                        level, message = "ERROR", f"Upstream {incident['service']} request timed out"
+                    break
+                if incident["warn_from"] > epoch:
+                    break
+            if message is None:
+                level = levels[rng.randrange(len(levels))]
+                message = rng.choice(BACKGROUND_LOGS[level])
+            yield {
+                "timestamp": stamp,
+                "level": level,
+                "service": service,
+                "message": message.format(n=rng.randint(5, 9000), d=rng.randint(1, 99)),
+                "trace_id": f"{rng.getrandbits(40):010x}",
+            }
+
+    def metrics_for(self, service: str) -> dict:
+        """Metric document in data/metrics.json's schema for one service."""
+        rng = random.Random(f"{self.seed}-{service}")
+        incident = next((i for i in self.incidents if i["service"] == service), None)
+        kind = incident["kind"] if incident else None
+        points = max(2, int(self.span // self.metric_interval))
+        cpu, memory, requests = [], [], []
+        base_rps = rng.uniform(200, 2000)
+        for p in range(points):
+            epoch = self.start + p * self.metric_interval
+            diurnal = 1 + 0.3 * math.sin(2 * math.pi * (epoch % 86400) / 86400)
+            active = incident is not None and incident["start"] <= epoch <= incident["end"]
+            c = 30 * diurnal + rng.gauss(0, 3)
+            m = 55 + rng.gauss(0, 2)
+            r = base_rps * diurnal + rng.gauss(0, base_rps * 0.05)
+            if incident is not None and kind == "memory_leak" and incident["deployed_at"] <= epoch <= incident["end"]:
+                m += 40 * (epoch - incident["deployed_at"]) / (incident["end"] - incident["deployed_at"])
+            if active:
+                c += 45 if kind == "pool_exhaustion" else 20
+                r *= 0.4 if kind == "bad_deploy" else 1.8
+            cpu.append({"time": _ts(epoch), "value": round(max(0, min(100, c)), 1)})
+            memory.append({"time": _ts(epoch), "value": round(max(0, min(100, m)), 1)})
+            requests.append({"time": _ts(epoch), "value": round(max(0, r))})
+
+        def summary(timeline):
+            peak = max(timeline, key=lambda t: t["value"])
+            return {"avg": round(sum(t["value"] for t in timeline) / len(timeline), 1), "max": peak["value"],
+                    "spike_at": peak["time"], "timeline": timeline}
+
+        def phases(before, during, after, unit):
+            hit = incident is not None
+            return {"before_incident": before, "during_incident": during if hit else before,
+                    "after_incident": after if hit else before, "unit": unit}
+
+        pool = 10 if kind == "pool_exhaustion" else 20
+        request_summary = summary(requests)
+        document = {
+            "service": service,
+            "time_range": f"{_ts(self.start)} to {_ts(self.start + self.span)}",
+            "metrics": {
+                "cpu_usage": summary(cpu),
+                "memory_usage": {**summary(memory),
+                                 "heap_usage_percent": 96 if kind == "memory_leak" else 60,
+                                 "gc_pause_ms": 4800 if kind == "memory_leak" else 40},
+                "latency_p95": phases(120, 3500 if kind == "pool_exhaustion" else 900, 180, "ms"),
+                "latency_p99": phases(250, 8500 if kind == "pool_exhaustion" else 2000, 320, "ms"),
+                "error_rate": phases(0.1, 25.0 if kind == "bad_deploy" else 12.0, 0.5, "percent"),
+                "request_rate": {"avg": request_summary["avg"], "spike": request_summary["max"],
+                                 "spike_at": request_summary["spike_at"], "timeline": requests},
+                "database_connections": {
+                    "pool_size": pool,
+                    "active": pool if kind == "pool_exhaustion" else pool // 2,
+                    "waiting": 120 if kind == "pool_exhaustion" else 0,
+                    "timeout_count": 40 if kind == "pool_exhaustion" else 0,
+                    "avg_query_time_ms": 2500 if kind == "pool_exhaustion" else 15,
+                },
+                "thread_pool": {"active_threads": 200 if incident else 40, "max_threads": 200,
+                                "queue_size": 1500 if incident else 0, "rejected_requests": 80 if incident else 0},
+            },
+        }
+        return document
+
+    def ground_truth(self, out_dir: Path) -> dict:
+        incidents = []
+        for incident in self.incidents:
+            spec = INCIDENT_KINDS[incident["kind"]]
+            incidents.append({
+                "id": incident["id"],
+                "kind": incident["kind"],
+                "service": incident["service"],
+                "start": _ts(incident["start"]),
+                "end": _ts(incident["end"]),
+                "alert_time": _ts(incident["start"] + 300),
+                "deployment_id": incident["deployment_id"],
+                "deployed_at": _ts(incident["deployed_at"]),
+                "change": spec["change"],
+                "affected_services": incident["affected"],
+                "root_cause": spec["root_cause"],
+                "expected_rule": spec["expected_rule"],
+            })
+        return {
+            "seed": self.seed,
+            "services": self.services,
+            "log_lines": self.log_lines,
+            "start": _ts(self.start),
+            "end": _ts(self.start + self.span),
+            "data_dir": str(out_dir),
+            "incidents": incidents,
+        }
+
+
+def _write_json_array(path: Path, records: Iterator[dict]) -> int:
+    count = 0
+    with open(path, "w") as f:
+        f.write("[")
+        for record in records:
+            f.write(("," if count else "") + "\n" + json.dumps(record))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def _write_jsonl(path: Path, records: Iterator[dict]) -> int:
+    count = 0
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def _write_shards(directory: Path, records: Iterator[dict], lines_per_shard: int, compress: bool) -> int:
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = ".jsonl.gz" if compress else ".jsonl"
+    count, batch, index = 0, [], 0
+    for record in records:
+        batch.append(record)
+        if len(batch) >= lines_per_shard:
+            write_shard(directory / f"logs-{index:05d}{suffix}", batch)
+            count, batch, index = count + len(batch), [], index + 1
+    if batch:
+        write_shard(directory / f"logs-{index:05d}{suffix}", batch)
+        count += len(batch)
+    return count
+
+
+def generate(out_dir: str, formats: List[str], lines_per_shard: int = 1_000_000, compress: bool = True,
+             **params) -> dict:
+    """Write a synthetic dataset to ``out_dir`` and return its ground truth."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    generator = SyntheticTelemetry(**params)
+
+    for fmt in formats:
+        started = time.perf_counter()
+        if fmt == "json":
+            count = _write_json_array(out / "logs.json", generator.iter_logs())
+        elif fmt == "jsonl":
+            count = _write_jsonl(out / "logs.jsonl", generator.iter_logs())
+        elif fmt == "shards":
+            count = _write_shards(out / "shards", generator.iter_logs(), lines_per_shard, compress)
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+        elapsed = time.perf_counter() - started
+        print(f"   ✓ {count:,} log lines as {fmt} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} lines/s)")
+
+    metrics_dir = out / "metrics"
+    metrics_dir.mkdir(exist_ok=True)
+    for service in generator.services:
+        with open(metrics_dir / f"{service}.json", "w") as f:
+            json.dump(generator.metrics_for(service), f)
+    primary = generator.incidents[0]["service"] if generator.incidents else generator.services[0]
+    with open(out / "metrics.json", "w") as f:
+        json.dump(generator.metrics_for(primary), f, indent=2)
+    with open(out / "deployments.json", "w") as f:
+        json.dump(generator.deployments, f, indent=2)
+    print(f"   ✓ Metrics for {len(generator.services)} services, {len(generator.deployments)} deployments")
+
+    truth = generator.ground_truth(out)
+    with open(out / "ground_truth.json", "w") as f:
+        json.dump(truth, f, indent=2)
+    with open(out / "incidents.jsonl", "w") as f:
+        for incident in truth["incidents"]:
+            f.write(json.dumps({
+                "id": incident["id"],
+                "service": incident["service"],
+                "alert_time": incident["alert_time"],
+                "symptoms": INCIDENT_KINDS[incident["kind"]]["symptoms"],
+                "logs_path": str(out / "logs.json"),
+                "metrics_path": str(out / "metrics.json"),
+                "deployment_path": str(out / "deployments.json"),
+            }) + "\n")
+    print(f"   ✓ Ground truth for {len(truth['incidents'])} incidents")
+    return truth
+
+
+def check_rules(out_dir: str) -> dict:
+    """Run the deterministic rules on each injected incident and compare with the expected diagnosis.
+
+    Logs are read from the shards (window query around the incident) when
+    present, so this stays cheap at any volume.
+    """
+    from src import rules
+    from src.shards import discover_shards, iter_shards
+
+    out = Path(out_dir)
+    with open(out / "ground_truth.json") as f:
+        truth = json.load(f)
+    with open(out / "deployments.json") as f:
+        deployments = json.load(f)
+    shards = discover_shards("shards/*.jsonl*", out)
+    all_logs = None
+
+    outcomes = []
+    for incident in truth["incidents"]:
+        start = datetime.fromisoformat(incident["start"].replace("Z", "+00:00")) - timedelta(minutes=15)
+        if shards:
+            logs = list(iter_shards(shards, start, incident["end"]))
+        else:
+            if all_logs is None:
+                source = out / "logs.json" if (out / "logs.json").exists() else out / "logs.jsonl"
+                with open(source) as f:
+                    all_logs = json.load(f) if source.suffix == ".json" else [json.loads(line) for line in f]
+            logs = [l for l in all_logs if start.strftime(TS_FORMAT) <= l["timestamp"] <= incident["end"]]
+        with open(out / "metrics" / f"{incident['service']}.json") as f:
+            metrics = json.load(f)
+        match = rules.evaluate({"service": incident["service"], "alert_time": incident["alert_time"]},
+                               logs, metrics, deployments)
+        got = match["rule"] if match else None
+        correct = got == incident["expected_rule"] and (
+            match is None or incident["deployment_id"] in match["root_cause"])
+        outcomes.append({"id": incident["id"], "kind": incident["kind"], "expected": incident["expected_rule"],
+                         "got": got, "correct": correct})
+    accuracy = sum(o["correct"] for o in outcomes) / len(outcomes) if outcomes else 1.0
+    return {"accuracy": accuracy, "incidents": outcomes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--lines", type=float, default=1e5, help="Log lines (e.g. 1e6)")
+    parser.add_argument("--services", type=int, default=10)
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--incidents", type=int, default=3)
+    parser.add_argument("--kinds", default=",".join(INCIDENT_KINDS), help="Comma-separated incident kinds")
+    parser.add_argument("--metric-interval", type=int, default=60, help="Seconds between metric points")
+    parser.add_argument("--formats", default="json,jsonl,shards", help="Comma-separated: json, jsonl, shards")
+    parser.add_argument("--shard-lines", type=int, default=1_000_000)
+    parser.add_argument("--no-compress", action="store_true", help="Write plain .jsonl shards")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--check", action="store_true", help="Score the deterministic rules against ground truth")
+    args = parser.parse_args()
+
+    print(f"🧪 Generating {int(args.lines):,} log lines for {args.services} services into {args.out}")
+    generate(
+        args.out, [f.strip() for f in args.formats.split(",") if f.strip()], args.shard_lines, not args.no_compress,
+        seed=args.seed, services=args.services, log_lines=int(args.lines), hours=args.hours,
+        incidents=args.incidents, kinds=[k.strip() for k in args.kinds.split(",")], metric_interval=args.metric_interval,
+    )
+    if args.check:
+        result = check_rules(args.out)
+        for outcome in result["incidents"]:
+            mark = "✓" if outcome["correct"] else "✗"
+            print(f"   {mark} {outcome['id']} {outcome['kind']}: expected {outcome['expected']}, rules said {outcome['got']}")
+        print(f"Rules accuracy: {result['accuracy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,86 @@
-from datetime import datetime
-from pathlib import Path
+import argparse
+import os
+import time
 from dotenv import load_dotenv
-from src.commander import IncidentCommander
 
 load_dotenv()
 
 from src.models import IncidentInput
 
+# Alert time of the sample incident in data/; a fixed time keeps its investigation ID stable across runs
+SAMPLE_ALERT_TIME = "2024-01-15T14:30:00Z"
 
-def main():
+
+def run_once(resume_id=None, alert_time=SAMPLE_ALERT_TIME):
+    # Deferred: the graph, LangGraph and the provider SDK load only when an investigation runs
+    from src import profiling, reports
+    from src.commander import IncidentCommander, investigation_id_for
     commander = IncidentCommander()
-    
-    incident = IncidentInput(
-        service="payment-api",
-        alert_time=datetime.now(),
-        symptoms="High error rate and increased latency on /checkout endpoint",
-        logs_path="data/logs.json",
-        metrics_path="data/metrics.json",
-        deployment_path="data/deployments.json"
-    )
-    
-    print("🚨 Incident Commander Activated")
-    print(f"Investigating: {incident.service}")
-    print("=" * 80)
-    
-    report = commander.investigate(incident)
+    started = time.perf_counter()
+
+    if resume_id:
+        print(f"🚨 Incident Commander resuming investigation {resume_id}")
+        print("=" * 80)
+        report = commander.resume(resume_id)
+        investigation_id = resume_id
+    else:
+        incident = IncidentInput(
+            service="payment-api",
+            alert_time=alert_time,
+            symptoms="High error rate and increased latency on /checkout endpoint",
+            logs_path="data/logs.json",
+            metrics_path="data/metrics.json",
+            deployment_path="data/deployments.json"
+        )
+
+        investigation_id = investigation_id_for(incident)
+        print("🚨 Incident Commander Activated")
+        print(f"Investigating: {incident.service} (investigation {investigation_id})")
+        print("=" * 80)
+
+        report = commander.investigate(incident, investigation_id=investigation_id)
+
+    duration = time.perf_counter() - started
     formatted = commander.format_report(report)
-    
+
     print(formatted)
-    
-    # Create reports directory if it doesn't exist
-    reports_dir = Path("reports")
-    reports_dir.mkdir(exist_ok=True)
-    
-    # Save report with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_file = reports_dir / f"incident_report_{timestamp}.txt"
-    
-    with open(report_file, "w") as f:
-        f.write(formatted)
-    
-    print(f"\n✅ Report saved to {report_file}")
+
+    report_file = commander.save_report(formatted)
+
+    report_id = reports.save(report, investigation_id=investigation_id, source="cli", duration_seconds=duration,
+                             metadata={"report_file": str(report_file), "resumed": bool(resume_id)})
+
+    print(f"\n✅ Report saved to {report_file}" + (f" (report {report_id})" if report_id else ""))
+    if profiling.enabled():
+        print(f"🔬 Node profiles saved to {profiling.profile_dir(investigation_id)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autonomous Incident Commander")
+    parser.add_argument("--serve", action="store_true", help="Run as a long-lived HTTP/JSON investigation service")
+    parser.add_argument("--resume", metavar="INVESTIGATION_ID", help="Resume a failed or interrupted investigation")
+    parser.add_argument("--alert-time", default=SAMPLE_ALERT_TIME,
+                        help="Alert time of the CLI incident (ISO 8601); re-running the same alert reuses its checkpoints")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Concurrent investigations (default: derived from LLM_MAX_CONCURRENT_REQUESTS)")
+    parser.add_argument("--queue-size", type=int, default=int(os.getenv("SERVICE_QUEUE_SIZE", "100")))
+    parser.add_argument("--batch", metavar="INCIDENTS_JSONL", help="Investigate every incident in a JSONL file")
+    parser.add_argument("--parallel", type=int, default=int(os.getenv("BATCH_PARALLELISM", "2")),
+                        help="Concurrent investigations in batch mode")
+    parser.add_argument("--output", default=os.getenv("BATCH_OUTPUT_DIR", "reports/batch"),
+                        help="Directory for batch results and summary")
+    args = parser.parse_args()
+
+    if args.batch:
+        from src.batch import run_batch
+        run_batch(args.batch, args.output, args.parallel)
+    elif args.serve:
+        from src.service import serve
+        serve(args.host, args.port, args.workers, args.queue_size)
+    else:
+        run_once(args.resume, args.alert_time)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,19 @@
 import json
+import os
 import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Union
+from typing import Any, List, Optional, Tuple, Union
 from langchain_core.messages import SystemMessage, HumanMessage
-from src.mcp_server import get_logs, get_metrics, get_deployments
+from src import budget, metrics, tracing
+from src.mcp_server import get_logs, get_metrics, get_deployments, query_logs
 
 
+@tracing.traced("extract_json", kind="parse")
 def extract_json(text: str) -> Union[dict, list, None]:
     """Extract JSON from LLM response that may contain markdown code blocks."""
     if not text:
@@ -37,6 +45,254 @@ def extract_json(text: str) -> Union[dict, list, None]:
     return None
 
 
+class LLMDisabledError(RuntimeError):
+    """Raised instead of calling the model when an agent runs deterministic-only."""
+
+
+class BudgetExceededError(LLMDisabledError):
+    """Raised instead of calling the model when the investigation's token or time budget is spent."""
+
+
+def _fallback_reason(error: Exception) -> str:
+    if isinstance(error, BudgetExceededError):
+        return "budget"
+    return "llm_disabled" if isinstance(error, LLMDisabledError) else "llm_error"
+
+
+_LEVEL_PRIORITY = {"CRITICAL": 0, "ERROR": 0, "WARN": 1, "WARNING": 1}
+
+
+def _compress(data, limit: int) -> str:
+    """Compact JSON of ``data`` within ``limit`` characters, keeping errors and warnings first."""
+    if not isinstance(data, list):
+        text = json.dumps(data, separators=(",", ":"), default=str)
+        return text if len(text) <= limit else text[:limit] + "…[truncated]"
+    ranked = sorted(range(len(data)), key=lambda i: (
+        _LEVEL_PRIORITY.get(str(data[i].get("level", "")).upper(), 2) if isinstance(data[i], dict) else 2, i))
+    kept, size = [], 2
+    for i in ranked:
+        entry_size = len(json.dumps(data[i], separators=(",", ":"), default=str)) + 1
+        if size + entry_size > limit:
+            break
+        kept.append(i)
+        size += entry_size
+    entries = [data[i] for i in sorted(kept)]
+    if len(kept) < len(data):
+        entries.append({"omitted_entries": len(data) - len(kept)})
+    return json.dumps(entries, separators=(",", ":"), default=str)
+
+
+def _evidence_json(data) -> str:
+    """Evidence as prompt text.
+    
+    Indented JSON normally; compact and capped when it exceeds MAX_EVIDENCE_CHARS
+    or the investigation is under budget pressure (BUDGET_EVIDENCE_CHARS).
+    """
+    limit = int(os.getenv("MAX_EVIDENCE_CHARS", "0"))
+    ledger = budget.current()
+    if ledger is not None and ledger.compress_evidence():
+        budget_limit = int(os.getenv("BUDGET_EVIDENCE_CHARS", "8000"))
+        limit = min(limit, budget_limit) if limit else budget_limit
+        return _compress(data, limit)
+    text = json.dumps(data, indent=2)
+    if limit and len(text) > limit:
+        return _compress(data, limit)
+    return text
+
+
+_TRANSIENT_ERRORS = ("Timeout", "Connection", "RateLimit", "ResourceExhausted", "ServiceUnavailable",
+                     "InternalServer", "Overloaded")
+
+
+def _transient(error: Exception) -> bool:
+    """Whether a provider error is worth retrying (rate limits, timeouts, 5xx)."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return isinstance(error, (TimeoutError, ConnectionError)) or any(
+        name in cls.__name__ for cls in type(error).__mro__ for name in _TRANSIENT_ERRORS)
+
+
+def _invoke(llm, messages, agent: Optional[str] = None):
+    """Call the agent's LLM; agents built without one fall through to their fallbacks.
+
+    Transient provider errors are retried here, up to LLM_MAX_RETRIES times with
+    exponential backoff (the clients themselves don't retry), so the LLM span
+    can record how many retries a call took.
+    """
+    if llm is None:
+        raise LLMDisabledError("LLM disabled (deterministic-only analysis)")
+    label = agent or "unknown"
+    prompt_chars = sum(len(str(m.content)) for m in messages)
+    ledger = budget.current()
+    reserved = 0
+    if ledger is not None:
+        mode, reserved = ledger.plan(label, prompt_chars)
+        if mode == budget.SKIP:
+            raise BudgetExceededError(f"Investigation budget spent; skipping {label} LLM call")
+        if mode == budget.SMALL_MODEL:
+            llm = budget.get_budget_llm() or llm
+    model = getattr(llm, "model", None) or getattr(llm, "model_name", None)
+    with tracing.span(f"llm:{label}", kind="llm", agent=agent, provider=os.getenv("LLM_PROVIDER", "gemini").lower(),
+                      model=model, prompt_chars=prompt_chars) as span:
+        max_retries = int(os.getenv("LLM_MAX_RETRIES", "2"))
+        backoff = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "1"))
+        started = time.perf_counter()
+        retries = 0
+        try:
+            while True:
+                try:
+                    response = llm.invoke(messages)
+                    break
+                except Exception as e:
+                    if retries >= max_retries or not _transient(e):
+                        raise
+                    time.sleep(backoff * 2 ** retries)
+                    retries += 1
+        except Exception:
+            metrics.LLM_REQUESTS.labels(agent=label, outcome="error").inc()
+            if ledger is not None:
+                ledger.release(reserved)
+            span.set(retries=retries)
+            raise
+        finally:
+            metrics.LLM_SECONDS.labels(agent=label).observe(time.perf_counter() - started)
+        usage = getattr(response, "usage_metadata", None) or {}
+        # LangChain zeroes total_cost on responses replayed from the LLM cache
+        cache_hit = usage.get("total_cost") == 0
+        metrics.LLM_REQUESTS.labels(agent=label, outcome="ok").inc()
+        metrics.LLM_TOKENS.labels(agent=label, direction="input").inc(usage.get("input_tokens", 0))
+        metrics.LLM_TOKENS.labels(agent=label, direction="output").inc(usage.get("output_tokens", 0))
+        if cache_hit:
+            metrics.LLM_CACHE_HITS.labels(agent=label).inc()
+        if ledger is not None:
+            ledger.record(label, usage, reserved, model)
+        span.set(
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            cache_hit=cache_hit,
+            retries=retries,
+            completion_chars=len(str(response.content)),
+        )
+        return response
+
+
+def _log_window(incident: dict):
+    """Time window around the alert for sharded log inputs (LOGS_GLOB), else None."""
+    if not os.getenv("LOGS_GLOB"):
+        return None
+    alert_time = incident.get("alert_time")
+    if isinstance(alert_time, str):
+        try:
+            alert_time = datetime.fromisoformat(alert_time.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(alert_time, datetime):
+        return None
+    window = timedelta(minutes=int(os.getenv("LOG_WINDOW_MINUTES", "60")))
+    return alert_time - window, alert_time + window
+
+
+class _EvidenceCache:
+    """Each source's payload and its parse, loaded once and shared by every node and branch."""
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key, load):
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = load()
+            return self._entries[key]
+
+
+_evidence_cache: ContextVar[Optional[_EvidenceCache]] = ContextVar("evidence_cache", default=None)
+
+
+@contextmanager
+def shared_evidence():
+    """Load and parse each evidence source at most once until the block exits (one investigation).
+    
+    Like the budget, the cache lives in a context variable, so it follows the
+    investigation into LangGraph's worker threads; it is not graph state, so
+    the evidence is never written into checkpoints.
+    """
+    token = _evidence_cache.set(_EvidenceCache())
+    try:
+        yield
+    finally:
+        _evidence_cache.reset(token)
+
+
+def _load_source(source: str, incident: dict) -> Tuple[str, Any]:
+    if source == "logs":
+        window = _log_window(incident)
+        payload = query_logs(*window) if window else get_logs()
+    elif source == "telemetry":
+        payload = get_metrics()
+    elif source == "deployment":
+        payload = get_deployments()
+    else:
+        raise ValueError(f"Unknown evidence source: {source}")
+    return payload, json.loads(payload)
+
+
+def _source_evidence(source: str, incident: dict) -> Tuple[str, Any]:
+    """Full JSON payload for ``source`` and its parse, from the investigation's cache when there is one."""
+    cache = _evidence_cache.get()
+    if cache is None:
+        return _load_source(source, incident)
+    key = (source, _log_window(incident) if source == "logs" else None)
+    return cache.get(key, lambda: _load_source(source, incident))
+
+
+def load_evidence(source: str, incident: dict) -> Any:
+    """Parsed data for ``source``, e.g. the full log list for triage and service discovery."""
+    with tracing.span(f"fetch:{source}", kind="data"):
+        return _source_evidence(source, incident)[1]
+
+
+def fetch_evidence(source: str, incident: dict, service: Optional[str] = None) -> Optional[str]:
+    """Raw JSON an evidence agent analyzes for ``source`` (logs/telemetry/deployment).
+    
+    With ``service`` the data is narrowed to that service; None means there is
+    nothing for it (e.g. metrics were only collected for another service).
+    """
+    with tracing.span(f"fetch:{source}", kind="data", service=service) as span:
+        payload = _fetch_evidence(source, incident, service)
+        span.set(payload_bytes=len(payload) if payload else 0)
+        return payload
+
+
+def _fetch_evidence(source: str, incident: dict, service: Optional[str]) -> Optional[str]:
+    payload, data = _source_evidence(source, incident)
+    if service is None:
+        return payload
+    
+    if isinstance(data, dict) and data.get("error"):
+        return payload
+    if isinstance(data, list):
+        data = [item for item in data if item.get("service") == service]
+        return json.dumps(data, indent=2) if data else None
+    if isinstance(data, dict) and data.get("service") not in (None, service):
+        return None
+    return payload
+
+
+def implicated_services(logs: list, incident: dict, limit: int = 5) -> List[str]:
+    """Services with warnings or errors in the logs, the alerted service first, then by error count."""
+    counts = {}
+    for log in logs if isinstance(logs, list) else []:
+        if log.get("level") in ("WARN", "ERROR", "CRITICAL") and log.get("service"):
+            counts[log["service"]] = counts.get(log["service"], 0) + 1
+    alerted = incident.get("service")
+    others = sorted((s for s in counts if s != alerted), key=lambda s: counts[s], reverse=True)
+    return ([alerted] + others)[:limit]
+
+
 class OrchestratorAgent:
     def __init__(self, llm):
         self.llm = llm
@@ -51,16 +307,18 @@ Return a JSON array of 4-5 specific investigation steps.
 Example: ["Check error logs for payment-api between 14:00-15:00", "Analyze latency metrics", ...]"""
         
         try:
-            response = self.llm.invoke([
+            response = _invoke(self.llm, [
                 SystemMessage(content="You are an incident response expert. Return ONLY a valid JSON array, no markdown."),
                 HumanMessage(content=prompt)
-            ])
+            ], agent="OrchestratorAgent")
             
             result = extract_json(response.content)
             if isinstance(result, list) and len(result) > 0:
                 return result
+            metrics.record_fallback("OrchestratorAgent", "unparsable")
         except Exception as e:
             print(f"[OrchestratorAgent] Error: {e}")
+            metrics.record_fallback("OrchestratorAgent", _fallback_reason(e))
         
         return ["Analyze error logs for patterns", "Check system metrics for anomalies", 
                 "Review recent deployments", "Correlate timeline of events", "Identify root cause"]
@@ -70,15 +328,16 @@ class LogsAgent:
     def __init__(self, llm):
         self.llm = llm
         
-    def analyze(self, logs_path: str, incident: dict) -> List[str]:
+    def analyze(self, logs_path: str, incident: dict, payload: Optional[str] = None) -> List[str]:
         # Use MCP server to get logs
         try:
-            logs_str = get_logs()
+            logs_str = payload if payload is not None else fetch_evidence("logs", incident)
             logs_data = json.loads(logs_str)
         except Exception as e:
             logs_data = {"error": str(e)}
         
         if isinstance(logs_data, dict) and logs_data.get("error"):
+            metrics.record_fallback("LogsAgent", "data_error")
             return [f"Error loading logs: {logs_data.get('error')}"]
         
         prompt = f"""Analyze these logs for the incident investigation:
@@ -87,7 +346,7 @@ SERVICE: {incident.get('service')}
 SYMPTOMS: {incident.get('symptoms')}
 
 LOGS DATA:
-{json.dumps(logs_data, indent=2)}
+{_evidence_json(logs_data)}
 
 Analyze and find:
 1. Error patterns and their frequency
@@ -99,16 +358,18 @@ Return a JSON array of detailed findings. Each finding should be a descriptive s
 Example output: ["Database connection timeout at 14:23:45 - connection pool exhausted (5 occurrences)", "Cascading failure: auth-service failed due to payment-api unavailability at 14:24:30"]"""
         
         try:
-            response = self.llm.invoke([
+            response = _invoke(self.llm, [
                 SystemMessage(content="You are an expert log analyst. Return ONLY a valid JSON array of findings, no markdown."),
                 HumanMessage(content=prompt)
-            ])
+            ], agent="LogsAgent")
             
             result = extract_json(response.content)
             if isinstance(result, list) and len(result) > 0:
                 return result
+            metrics.record_fallback("LogsAgent", "unparsable")
         except Exception as e:
             print(f"[LogsAgent] Error: {e}")
+            metrics.record_fallback("LogsAgent", _fallback_reason(e))
         
         # Fallback: generate basic findings from the data
         findings = []
@@ -130,15 +391,16 @@ class TelemetryAgent:
     def __init__(self, llm):
         self.llm = llm
         
-    def analyze(self, metrics_path: str, incident: dict) -> List[str]:
+    def analyze(self, metrics_path: str, incident: dict, payload: Optional[str] = None) -> List[str]:
         # Use MCP server to get metrics
         try:
-            metrics_str = get_metrics()
+            metrics_str = payload if payload is not None else fetch_evidence("telemetry", incident)
             metrics_data = json.loads(metrics_str)
         except Exception as e:
             metrics_data = {"error": str(e)}
         
         if isinstance(metrics_data, dict) and metrics_data.get("error"):
+            metrics.record_fallback("TelemetryAgent", "data_error")
             return [f"Error loading metrics: {metrics_data.get('error')}"]
         
         prompt = f"""Analyze these system metrics for the incident:
@@ -147,7 +409,7 @@ SERVICE: {incident.get('service')}
 SYMPTOMS: {incident.get('symptoms')}
 
 METRICS DATA:
-{json.dumps(metrics_data, indent=2)}
+{_evidence_json(metrics_data)}
 
 Analyze and find:
 1. Resource saturation (CPU, memory, connections)
@@ -160,32 +422,34 @@ Return a JSON array of detailed findings with specific numbers and timestamps.
 Example: ["Latency p95 increased 29x from 120ms to 3500ms during incident", "Database connection pool saturated: 10/10 active with 127 waiting requests"]"""
         
         try:
-            response = self.llm.invoke([
+            response = _invoke(self.llm, [
                 SystemMessage(content="You are a metrics analysis expert. Return ONLY a valid JSON array of findings, no markdown."),
                 HumanMessage(content=prompt)
-            ])
+            ], agent="TelemetryAgent")
             
             result = extract_json(response.content)
             if isinstance(result, list) and len(result) > 0:
                 return result
+            metrics.record_fallback("TelemetryAgent", "unparsable")
         except Exception as e:
             print(f"[TelemetryAgent] Error: {e}")
+            metrics.record_fallback("TelemetryAgent", _fallback_reason(e))
         
         # Fallback: extract key metrics from data
         findings = []
         if isinstance(metrics_data, dict):
-            metrics = metrics_data.get('metrics', {})
+            series = metrics_data.get('metrics', {})
             
-            if 'error_rate' in metrics:
-                er = metrics['error_rate']
+            if 'error_rate' in series:
+                er = series['error_rate']
                 findings.append(f"Error rate increased from {er.get('before_incident', 0)}% to {er.get('during_incident', 0)}%")
             
-            if 'latency_p95' in metrics:
-                lat = metrics['latency_p95']
+            if 'latency_p95' in series:
+                lat = series['latency_p95']
                 findings.append(f"P95 latency: {lat.get('before_incident', 0)}ms → {lat.get('during_incident', 0)}ms")
             
-            if 'database_connections' in metrics:
-                db = metrics['database_connections']
+            if 'database_connections' in series:
+                db = series['database_connections']
                 findings.append(f"Database connections: {db.get('active', 0)}/{db.get('pool_size', 0)} active, {db.get('waiting', 0)} waiting")
         
         return findings if findings else ["Metrics data analyzed"]
@@ -195,15 +459,16 @@ class DeploymentAgent:
     def __init__(self, llm):
         self.llm = llm
         
-    def analyze(self, deployment_path: str, incident_time: str, incident: dict) -> List[str]:
+    def analyze(self, deployment_path: str, incident_time: str, incident: dict, payload: Optional[str] = None) -> List[str]:
         # Use MCP server to get deployments
         try:
-            deployment_str = get_deployments()
+            deployment_str = payload if payload is not None else fetch_evidence("deployment", incident)
             deployment_data = json.loads(deployment_str)
         except Exception as e:
             deployment_data = {"error": str(e)}
         
         if isinstance(deployment_data, dict) and deployment_data.get("error"):
+            metrics.record_fallback("DeploymentAgent", "data_error")
             return [f"Error loading deployments: {deployment_data.get('error')}"]
         
         prompt = f"""Analyze deployments to find the root cause:
@@ -213,7 +478,7 @@ SERVICE: {incident.get('service')}
 SYMPTOMS: {incident.get('symptoms')}
 
 DEPLOYMENT DATA:
-{json.dumps(deployment_data, indent=2)}
+{_evidence_json(deployment_data)}
 
 For each deployment, analyze:
 1. Time proximity to incident (deployments just before incident are suspicious)
@@ -225,16 +490,18 @@ Return a JSON array of findings with risk assessment.
 Example: ["HIGH RISK: deploy-789 at 14:15 reduced DB pool from 20 to 10, just 8 minutes before incident", "MEDIUM RISK: New payment provider integration could increase database load"]"""
         
         try:
-            response = self.llm.invoke([
+            response = _invoke(self.llm, [
                 SystemMessage(content="You are a deployment analysis expert. Return ONLY a valid JSON array of findings, no markdown."),
                 HumanMessage(content=prompt)
-            ])
+            ], agent="DeploymentAgent")
             
             result = extract_json(response.content)
             if isinstance(result, list) and len(result) > 0:
                 return result
+            metrics.record_fallback("DeploymentAgent", "unparsable")
         except Exception as e:
             print(f"[DeploymentAgent] Error: {e}")
+            metrics.record_fallback("DeploymentAgent", _fallback_reason(e))
         
         # Fallback: summarize deployments
         findings = []
@@ -250,18 +517,40 @@ class ReasoningAgent:
     def __init__(self, llm):
         self.llm = llm
         
-    def correlate(self, logs: List[str], telemetry: List[str], deployment: List[str]) -> dict:
+    def correlate(self, logs: List[str], telemetry: List[str], deployment: List[str],
+                  prior_incidents: Optional[List[dict]] = None, services: Optional[List[str]] = None) -> dict:
+        services_section = ""
+        if services and len(services) > 1:
+            services_section = f"""
+=== IMPLICATED SERVICES ===
+{', '.join(services)}
+Findings are prefixed with [service]. Identify the service where the failure originated
+and how it propagated to the others.
+"""
+        
+        prior_section = ""
+        if prior_incidents:
+            priors = [
+                {"similarity": p.get("similarity"), "root_cause": p.get("root_cause"),
+                 "actions": [a.get("action") for a in p.get("actions", [])]}
+                for p in prior_incidents
+            ]
+            prior_section = f"""
+=== SIMILAR PAST INCIDENTS (for context; confirm against current evidence) ===
+{json.dumps(priors, indent=2)}
+"""
+        
         prompt = f"""You are an expert SRE performing root cause analysis. Correlate ALL the evidence:
 
 === LOGS EVIDENCE ===
-{json.dumps(logs, indent=2)}
+{_evidence_json(logs)}
 
 === TELEMETRY EVIDENCE ===
-{json.dumps(telemetry, indent=2)}
+{_evidence_json(telemetry)}
 
 === DEPLOYMENT EVIDENCE ===
-{json.dumps(deployment, indent=2)}
-
+{_evidence_json(deployment)}
+{services_section}{prior_section}
 Create a causal chain:
 1. What deployment change triggered the issue?
 2. How did it affect system resources (metrics)?
@@ -276,10 +565,10 @@ Return ONLY this JSON structure:
 }}"""
         
         try:
-            response = self.llm.invoke([
+            response = _invoke(self.llm, [
                 SystemMessage(content="You are an expert SRE. Return ONLY valid JSON, no markdown or explanation."),
                 HumanMessage(content=prompt)
-            ])
+            ], agent="ReasoningAgent")
             
             result = extract_json(response.content)
             if isinstance(result, dict) and result.get("root_cause"):
@@ -288,8 +577,10 @@ Return ONLY this JSON structure:
                 result.setdefault("supporting_evidence", [])
                 result.setdefault("causal_chain", "")
                 return result
+            metrics.record_fallback("ReasoningAgent", "unparsable")
         except Exception as e:
             print(f"[ReasoningAgent] Error: {e}")
+            metrics.record_fallback("ReasoningAgent", _fallback_reason(e))
         
         # Fallback: create basic correlation
         return {
@@ -326,18 +617,20 @@ Return ONLY this JSON structure:
 }}"""
         
         try:
-            response = self.llm.invoke([
+            response = _invoke(self.llm, [
                 SystemMessage(content="You are an expert SRE. Return ONLY valid JSON, no markdown."),
                 HumanMessage(content=prompt)
-            ])
+            ], agent="ReportAgent")
             
             result = extract_json(response.content)
             if isinstance(result, dict) and result.get("actions"):
                 result.setdefault("risk_notes", [])
                 result.setdefault("next_steps", [])
                 return result
+            metrics.record_fallback("ReportAgent", "unparsable")
         except Exception as e:
             print(f"[ReportAgent] Error: {e}")
+            metrics.record_fallback("ReportAgent", _fallback_reason(e))
         
         # Fallback: generate basic recommendations
         return {
@@ -0,0 +1,174 @@
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from contextvars import copy_context
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src import metrics, reports
+from src.mcp_server import live_data
+from src.models import IncidentInput
+
+
+def load_incidents(path: str) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+    """Read one incident per JSONL line as ``(line_no, record, error)``.
+
+    Lines that are not valid JSON objects are kept with an error so the
+    failure shows up in the results instead of aborting the batch.
+    """
+    incidents = []
+    with open(path, "r") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                incidents.append((line_no, None, f"Invalid JSON: {e}"))
+                continue
+            if not isinstance(record, dict):
+                incidents.append((line_no, None, "Expected a JSON object"))
+                continue
+            incidents.append((line_no, record, None))
+    return incidents
+
+
+def enable_shared_llm_cache():
+    """Process-wide LLM response cache so identical prompts across incidents are answered once."""
+    from langchain_core.caches import InMemoryCache
+    from langchain_core.globals import get_llm_cache, set_llm_cache
+    if get_llm_cache() is None:
+        set_llm_cache(InMemoryCache())
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _token_totals(usage: dict) -> dict:
+    totals = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for model_usage in usage.values():
+        for key in totals:
+            totals[key] += model_usage.get(key, 0) or 0
+    return totals
+
+
+def run_one(commander, line_no: int, record: Optional[dict], error: Optional[str], run_tag: str) -> dict:
+    """Investigate a single batch record and return its result row."""
+    from langchain_core.callbacks import get_usage_metadata_callback
+
+    result = {"line": line_no, "investigation_id": None, "service": None, "status": "failed",
+              "error": error, "latency_seconds": 0.0, "tokens": _token_totals({}), "report": None}
+    if record is None:
+        return result
+
+    fields = {k: v for k, v in record.items() if k != "id"}
+    try:
+        incident = IncidentInput(**fields)
+    except ValidationError as e:
+        result["error"] = f"Invalid incident: {e.errors()[0].get('msg')} ({e.errors()[0].get('loc')})"
+        return result
+
+    # Fresh checkpoint thread per batch run so sweeps measure real work, unless the record pins an ID
+    investigation_id = record.get("id") or f"batch-{run_tag}-{line_no}"
+    result["investigation_id"] = investigation_id
+    result["service"] = incident.service
+    started = time.perf_counter()
+    with get_usage_metadata_callback() as usage:
+        try:
+            result["report"] = commander.investigate(incident, investigation_id=investigation_id)
+            result["status"] = "completed"
+            result["error"] = None
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+    result["latency_seconds"] = round(time.perf_counter() - started, 3)
+    result["tokens"] = _token_totals(usage.usage_metadata)
+    if result["report"] is not None:
+        reports.save(result["report"], investigation_id=investigation_id, source="batch",
+                     duration_seconds=result["latency_seconds"], metadata={"run": run_tag, "line": line_no})
+    return result
+
+
+def summarize(results: List[dict], wall_seconds: float) -> dict:
+    latencies = [r["latency_seconds"] for r in results if r["status"] == "completed"]
+    failed = [r for r in results if r["status"] != "completed"]
+    tokens = {key: sum(r["tokens"][key] for r in results) for key in ("input_tokens", "output_tokens", "total_tokens")}
+    return {
+        "incidents": len(results),
+        "completed": len(results) - len(failed),
+        "failed": len(failed),
+        "failure_rate": round(len(failed) / len(results), 4) if results else 0.0,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_per_minute": round(len(results) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "latency_seconds": {
+            "mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "max": max(latencies, default=0.0),
+        },
+        "tokens": tokens,
+        "tokens_per_incident": round(tokens["total_tokens"] / len(results), 1) if results else 0.0,
+        "failures": [{"line": r["line"], "error": r["error"]} for r in failed],
+    }
+
+
+def run_batch(input_path: str, output_dir: str = "reports/batch", parallel: int = 2,
+              share_data: bool = True, llm_cache: bool = True) -> dict:
+    """Investigate every incident in ``input_path`` and write results plus a summary.
+
+    Writes ``results.jsonl`` (one row per incident with status, latency,
+    token usage and the structured report) and ``summary.json`` into
+    ``output_dir/<run_tag>/``, plus the run's ``metrics.prom``. With ``share_data`` the investigations read
+    from the in-memory watcher store instead of re-parsing the data files;
+    with ``llm_cache`` identical prompts are only sent to the LLM once.
+    """
+    if llm_cache:
+        enable_shared_llm_cache()
+
+    from src.commander import IncidentCommander
+
+    incidents = load_incidents(input_path)
+    run_tag = time.strftime("%Y%m%d_%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    out_dir = Path(output_dir) / run_tag
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"📦 Batch {run_tag}: {len(incidents)} incidents from {input_path} ({parallel} in parallel)")
+    commander = IncidentCommander()
+    started = time.perf_counter()
+    # Workers run in copies of this context, so only this batch's investigations read the store
+    with live_data() if share_data else nullcontext(), ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        futures = [
+            pool.submit(copy_context().run, run_one, commander, line_no, record, error, run_tag)
+            for line_no, record, error in incidents
+        ]
+        results = []
+        with open(out_dir / "results.jsonl", "w") as f:
+            for future in futures:
+                row = future.result()
+                results.append(row)
+                f.write(json.dumps(row, default=str) + "\n")
+                mark = "✓" if row["status"] == "completed" else "✗"
+                print(f"   {mark} line {row['line']} {row['service'] or ''} "
+                      f"{row['latency_seconds']:.2f}s {row['tokens']['total_tokens']} tokens"
+                      + (f" - {row['error']}" if row["error"] else ""))
+
+    summary = summarize(results, time.perf_counter() - started)
+    summary.update({"run": run_tag, "input": str(input_path), "parallel": parallel})
+    with open(out_dir / "summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+    metrics.write_textfile(str(out_dir / "metrics.prom"))
+
+    print(f"✅ {summary['completed']}/{summary['incidents']} completed, failure rate {summary['failure_rate']:.0%}, "
+          f"p95 {summary['latency_seconds']['p95']:.2f}s, {summary['tokens']['total_tokens']} tokens")
+    print(f"   Results written to {out_dir}")
+    return summary
@@ -0,0 +1,168 @@
+"""Per-investigation token accounting and cost/latency budgets.
+
+``IncidentCommander`` opens an ``InvestigationBudget`` for every
+investigation; ``agents._invoke`` records each response's usage metadata in
+it and asks it before each call how to proceed. Under budget pressure the
+investigation degrades step by step instead of running unbounded:
+
+1. past BUDGET_DEGRADE_AT of either budget, agents send compressed evidence
+   and calls go to LLM_BUDGET_MODEL (when set)
+2. when a call would exceed the token budget, or the time budget is spent,
+   the agent skips the LLM and uses its deterministic fallback
+
+Budgets default to unlimited (0). The graph checkpoints the ledger's
+``summary()`` after every node, and a resumed investigation ``restore``s it,
+so it neither gets a fresh budget nor under-reports its usage.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+FULL, SMALL_MODEL, SKIP = "full", "small_model", "skip"
+CHARS_PER_TOKEN = 4
+
+_current: ContextVar[Optional["InvestigationBudget"]] = ContextVar("investigation_budget", default=None)
+_budget_llm = None
+_budget_llm_lock = threading.Lock()
+
+
+class InvestigationBudget:
+    def __init__(self, max_tokens: Optional[int] = None, max_seconds: Optional[float] = None,
+                 degrade_at: Optional[float] = None, expected_output_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens if max_tokens is not None else int(os.getenv("INVESTIGATION_TOKEN_BUDGET", "0"))
+        self.max_seconds = (max_seconds if max_seconds is not None
+                            else float(os.getenv("INVESTIGATION_TIME_BUDGET_SECONDS", "0")))
+        self.degrade_at = degrade_at if degrade_at is not None else float(os.getenv("BUDGET_DEGRADE_AT", "0.75"))
+        self.expected_output_tokens = (expected_output_tokens if expected_output_tokens is not None
+                                       else int(os.getenv("BUDGET_EXPECTED_OUTPUT_TOKENS", "500")))
+        self.started = time.monotonic()
+        self.by_agent: Dict[str, dict] = {}
+        self.degradations: List[str] = []
+        self._reserved = 0
+        self._lock = threading.Lock()
+
+    @property
+    def tokens_used(self) -> int:
+        return sum(a["input_tokens"] + a["output_tokens"] for a in list(self.by_agent.values()))
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def pressure(self) -> float:
+        """Largest fraction used of either budget (0 when both are unlimited)."""
+        fractions = [0.0]
+        if self.max_tokens:
+            fractions.append((self.tokens_used + self._reserved) / self.max_tokens)
+        if self.max_seconds:
+            fractions.append(self.elapsed / self.max_seconds)
+        return max(fractions)
+
+    def compress_evidence(self) -> bool:
+        return self.pressure() >= self.degrade_at
+
+    def _note(self, message: str):
+        if message not in self.degradations:
+            self.degradations.append(message)
+            print(f"   ⚠ Budget: {message}")
+
+    def plan(self, agent: str, prompt_chars: int) -> tuple:
+        """Decide how ``agent``'s next call runs: (FULL | SMALL_MODEL | SKIP, reserved tokens).
+
+        The estimate is reserved until ``record`` so concurrent agents can't
+        all pass the check against the same remaining budget.
+        """
+        estimate = prompt_chars // CHARS_PER_TOKEN + self.expected_output_tokens
+        with self._lock:
+            if self.max_seconds and self.elapsed >= self.max_seconds:
+                self._note(f"time budget of {self.max_seconds:g}s spent; remaining LLM calls replaced by deterministic fallbacks")
+                self._entry(agent)["skipped"] += 1
+                return SKIP, 0
+            if self.max_tokens and self.tokens_used + self._reserved + estimate > self.max_tokens:
+                self._note(f"token budget of {self.max_tokens} reached; remaining LLM calls replaced by deterministic fallbacks")
+                self._entry(agent)["skipped"] += 1
+                return SKIP, 0
+            self._reserved += estimate
+            if self.pressure() >= self.degrade_at:
+                smaller = f" and {os.getenv('LLM_BUDGET_MODEL')} used" if os.getenv("LLM_BUDGET_MODEL") else ""
+                self._note(f"over {self.degrade_at:.0%} of budget; evidence compressed{smaller}")
+                return SMALL_MODEL, estimate
+            return FULL, estimate
+
+    def _entry(self, agent: str) -> dict:
+        return self.by_agent.setdefault(
+            agent, {"calls": 0, "skipped": 0, "input_tokens": 0, "output_tokens": 0, "models": []})
+
+    def record(self, agent: str, usage: dict, reserved: int = 0, model: Optional[str] = None):
+        with self._lock:
+            self._reserved = max(0, self._reserved - reserved)
+            entry = self._entry(agent)
+            entry["calls"] += 1
+            entry["input_tokens"] += usage.get("input_tokens", 0) or 0
+            entry["output_tokens"] += usage.get("output_tokens", 0) or 0
+            if model and model not in entry["models"]:
+                entry["models"].append(model)
+
+    def release(self, reserved: int):
+        with self._lock:
+            self._reserved = max(0, self._reserved - reserved)
+
+    def restore(self, summary: Optional[dict]):
+        """Continue from a checkpointed ``summary()``: past calls, degradations and elapsed time."""
+        if not summary:
+            return
+        with self._lock:
+            self.by_agent = {name: {**entry, "models": list(entry["models"])}
+                             for name, entry in summary["by_agent"].items()}
+            self.degradations = list(summary["degradations"])
+            self.started = time.monotonic() - summary["elapsed_seconds"]
+
+    def summary(self) -> dict:
+        with self._lock:
+            by_agent = {name: {**entry, "models": list(entry["models"])} for name, entry in self.by_agent.items()}
+            degradations = list(self.degradations)
+        input_tokens = sum(a["input_tokens"] for a in by_agent.values())
+        output_tokens = sum(a["output_tokens"] for a in by_agent.values())
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "llm_calls": sum(a["calls"] for a in by_agent.values()),
+            "by_agent": by_agent,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "token_budget": self.max_tokens or None,
+            "time_budget_seconds": self.max_seconds or None,
+            "degradations": degradations,
+        }
+
+
+def current() -> Optional[InvestigationBudget]:
+    return _current.get()
+
+
+@contextmanager
+def track(budget: Optional[InvestigationBudget] = None):
+    """Make ``budget`` (a fresh one by default) the current investigation's ledger."""
+    budget = budget or InvestigationBudget()
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+def get_budget_llm():
+    """Smaller model (LLM_BUDGET_MODEL) used under budget pressure; None when not configured."""
+    global _budget_llm
+    model = os.getenv("LLM_BUDGET_MODEL")
+    if not model:
+        return None
+    if _budget_llm is None:
+        with _budget_llm_lock:
+            if _budget_llm is None:
+                from src.llm_factory import create_llm
+                _budget_llm = create_llm(model=model)
+    return _budget_llm
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+MODES = ("off", "record", "replay", "auto")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a prompt has no recorded response."""
+
+
+def cassette_key(messages: List[BaseMessage]) -> str:
+    """Stable key for a prompt: hash of each message's role and content."""
+    payload = json.dumps([[m.type, m.content] for m in messages], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CassetteLLM(BaseChatModel):
+    """Records LLM responses to a JSON cassette and replays them by prompt.
+
+    Modes: ``record`` always calls the real model and overwrites entries,
+    ``replay`` never does (a missing prompt raises ``CassetteMissError``),
+    ``auto`` replays what is recorded and records the rest. The real model is
+    only created (via ``inner_factory``) on the first call that needs it, so
+    replay runs need no API keys or network.
+    """
+
+    path: str
+    mode: str = "replay"
+    inner_factory: Optional[Callable[[], BaseChatModel]] = None
+
+    _inner: Optional[BaseChatModel] = PrivateAttr(default=None)
+    _entries: Dict[str, dict] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _stats: Dict[str, int] = PrivateAttr(default_factory=lambda: {"hits": 0, "recorded": 0, "misses": 0})
+
+    def model_post_init(self, __context: Any):
+        if self.mode not in MODES or self.mode == "off":
+            raise ValueError(f"Unsupported cassette mode: {self.mode}")
+        if Path(self.path).exists():
+            with open(self.path, "r") as f:
+                self._entries = json.load(f)
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"path": self.path, "mode": self.mode}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Replayed, newly recorded and (in replay mode) missing responses so far."""
+        return dict(self._stats)
+
+    def _get_inner(self) -> BaseChatModel:
+        with self._lock:
+            if self._inner is None:
+                if self.inner_factory is None:
+                    raise CassetteMissError("No model to record with (inner_factory not set)")
+                self._inner = self.inner_factory()
+            return self._inner
+
+    def _save(self):
+        path = Path(self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        key = cassette_key(messages)
+        entry = self._entries.get(key) if self.mode != "record" else None
+        replayed = entry is not None
+        if entry is None:
+            if self.mode == "replay":
+                with self._lock:
+                    self._stats["misses"] += 1
+                preview = str(messages[-1].content)[:80] if messages else ""
+                raise CassetteMissError(f"No recorded response in {self.path} for prompt {key[:12]} ({preview!r})")
+            response = self._get_inner().invoke(messages, stop=stop, **kwargs)
+            entry = {
+                "content": response.content,
+                "usage_metadata": dict(getattr(response, "usage_metadata", None) or {}),
+                "prompt_preview": str(messages[-1].content)[:200] if messages else "",
+            }
+            with self._lock:
+                self._entries[key] = entry
+                self._stats["recorded"] += 1
+                self._save()
+        else:
+            with self._lock:
+                self._stats["hits"] += 1
+        message = AIMessage(content=entry["content"], usage_metadata=entry.get("usage_metadata") or None,
+                            response_metadata={"cassette": "replayed" if replayed else "recorded"})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def create_cassette_llm(inner_factory: Callable[[], BaseChatModel], path: Optional[str] = None,
+                        mode: Optional[str] = None) -> BaseChatModel:
+    """Wrap ``inner_factory``'s model in a cassette configured by LLM_CASSETTE / LLM_CASSETTE_MODE.
+
+    Returns the unwrapped model when the mode is ``off``.
+    """
+    mode = (mode or os.getenv("LLM_CASSETTE_MODE", "replay")).lower()
+    if mode == "off":
+        return inner_factory()
+    return CassetteLLM(path=path or os.getenv("LLM_CASSETTE", "tests/cassettes/llm.json"),
+                       mode=mode, inner_factory=inner_factory)
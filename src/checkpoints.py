@@ -0,0 +1,104 @@
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_CHECKPOINT_DB = BASE_DIR / "reports" / "checkpoints.sqlite"
+
+# Graph steps in execution order, used to describe progress
+# (per-service evidence branches are tracked as one "evidence" step once merged)
+NODE_ORDER = ["triage", "orchestrate", "evidence", "reasoning", "report"]
+FAST_PATH_ORDER = ["triage", "fast_path"]
+
+
+def checkpoint_db_path() -> Path:
+    return Path(os.getenv("CHECKPOINT_DB", str(DEFAULT_CHECKPOINT_DB)))
+
+
+def create_checkpointer(path: Optional[Path] = None):
+    """Durable per-node checkpointer backed by a local SQLite file.
+
+    Falls back to an in-memory saver (checkpoints lost on exit) when
+    langgraph-checkpoint-sqlite is not installed.
+    """
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        from langgraph.checkpoint.memory import InMemorySaver
+        print("[checkpoints] langgraph-checkpoint-sqlite not installed; checkpoints kept in memory only")
+        return InMemorySaver()
+
+    path = Path(path or checkpoint_db_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    saver = SqliteSaver(conn)
+    saver.setup()
+    return saver
+
+
+@contextmanager
+def _read_saver(path: Path):
+    """Short-lived saver over an existing checkpoint DB, for readers like the dashboard."""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    with closing(sqlite3.connect(str(path), check_same_thread=False)) as conn:
+        yield SqliteSaver(conn)
+
+
+def _summarize(investigation_id: str, values: dict, updated_at: Optional[str]) -> dict:
+    incident = values.get("incident") or {}
+    order = FAST_PATH_ORDER if values.get("fast_path") else NODE_ORDER
+    completed = values.get("completed_nodes")
+    if completed is None:
+        # Checkpoints written before steps were recorded
+        completed = order if values.get("final_report") else ["triage", *(values.get("fingerprints") or {})]
+    completed = [node for node in order if node in completed]
+    remaining = [node for node in order if node not in completed]
+    done = not remaining
+    return {
+        "investigation_id": investigation_id,
+        "service": incident.get("service"),
+        "alert_time": str(incident.get("alert_time", "")),
+        "status": "completed" if done else "in_progress",
+        "completed_nodes": completed,
+        "total_nodes": len(order),
+        "next_node": None if done else remaining[0],
+        "updated_at": updated_at,
+    }
+
+
+def list_investigations(path: Optional[Path] = None, limit: int = 100) -> List[dict]:
+    """Latest checkpoint summary for each investigation, most recent first."""
+    path = Path(path or checkpoint_db_path())
+    if not path.exists():
+        return []
+    summaries = []
+    with _read_saver(path) as saver:
+        try:
+            rows = saver.conn.execute(
+                "SELECT thread_id, MAX(checkpoint_id) AS latest FROM checkpoints "
+                "WHERE checkpoint_ns = '' GROUP BY thread_id ORDER BY latest DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        for thread_id, _ in rows:
+            tup = saver.get_tuple({"configurable": {"thread_id": thread_id}})
+            if tup is None:
+                continue
+            values = tup.checkpoint.get("channel_values", {})
+            summaries.append(_summarize(thread_id, values, tup.checkpoint.get("ts")))
+    return summaries
+
+
+def load_investigation_state(investigation_id: str, path: Optional[Path] = None) -> Optional[dict]:
+    """Channel values of an investigation's latest checkpoint (partial or final)."""
+    path = Path(path or checkpoint_db_path())
+    if not path.exists():
+        return None
+    with _read_saver(path) as saver:
+        tup = saver.get_tuple({"configurable": {"thread_id": investigation_id}})
+    if tup is None:
+        return None
+    return dict(tup.checkpoint.get("channel_values", {}))
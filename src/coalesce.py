@@ -0,0 +1,121 @@
+import copy
+import os
+import re
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from src import progress
+from src.models import IncidentInput
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[/_.-][a-z0-9]+)*")
+_STOPWORDS = {"and", "the", "on", "in", "of", "for", "to", "a", "an", "with", "at", "is", "are"}
+
+
+def symptom_tokens(symptoms: str) -> frozenset:
+    return frozenset(t for t in _TOKEN.findall((symptoms or "").lower()) if t not in _STOPWORDS)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Naive UTC, the form the data tools compare alert times in."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _seconds_apart(a: datetime, b: datetime) -> float:
+    return abs((_as_utc(a) - _as_utc(b)).total_seconds())
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(eq=False)
+class _Flight:
+    service: str
+    alert_time: datetime
+    tokens: frozenset
+    deterministic: bool
+    investigation_id: Optional[str] = None
+    future: Future = field(default_factory=Future)
+    relay: progress.Relay = field(default_factory=progress.Relay)
+    joined: int = 0
+
+
+class InvestigationCoalescer:
+    """Single-flight de-duplication of near-identical incidents.
+
+    An incident joins a flight that is still running when it names the same
+    service and investigation ID (incidents with different explicit IDs are
+    never merged; ones with the same ID are), its alert
+    time is within ``window_seconds`` of the flight's, and its symptoms
+    overlap by at least ``similarity`` (Jaccard over word tokens). Joiners
+    block on the leader's result instead of running the graph again and get
+    its progress events. Once a flight finishes it is no longer joinable, so
+    a later re-trigger runs (and reuses checkpoints) on its own.
+    """
+
+    def __init__(self, window_seconds: Optional[float] = None, similarity: Optional[float] = None):
+        self.window_seconds = float(os.getenv("COALESCE_WINDOW_SECONDS", "120")) if window_seconds is None else window_seconds
+        self.similarity = float(os.getenv("COALESCE_SIMILARITY", "0.5")) if similarity is None else similarity
+        self._flights: List[_Flight] = []
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def run(self, incident: IncidentInput, fn: Callable[[], dict], deterministic: bool = False,
+            investigation_id: Optional[str] = None) -> dict:
+        """Return ``fn()``'s report, sharing it with matching concurrent incidents."""
+        if self.window_seconds <= 0:
+            return fn()
+
+        tokens = symptom_tokens(incident.symptoms)
+        with self._lock:
+            flight = self._match(incident, tokens, deterministic, investigation_id)
+            if flight is not None:
+                flight.joined += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = _Flight(incident.service, incident.alert_time, tokens, deterministic, investigation_id)
+                self._flights.append(flight)
+                leader = True
+
+        if not leader:
+            print(f"🔗 Coalesced {incident.service} alert into in-flight investigation")
+            flight.relay.add(progress.current())
+            return copy.deepcopy(flight.future.result())
+
+        flight.relay.add(progress.current())
+        try:
+            with progress.listen(flight.relay):
+                result = fn()
+        except BaseException as e:
+            flight.future.set_exception(e)
+            raise
+        else:
+            flight.future.set_result(result)
+        finally:
+            with self._lock:
+                self._flights.remove(flight)
+        return copy.deepcopy(result)
+
+    def _match(self, incident: IncidentInput, tokens: frozenset, deterministic: bool,
+               investigation_id: Optional[str]) -> Optional[_Flight]:
+        best, best_score = None, 0.0
+        for flight in self._flights:
+            if flight.service != incident.service or flight.investigation_id != investigation_id:
+                continue
+            # A full investigation never settles for a degraded one's report
+            if flight.deterministic and not deterministic:
+                continue
+            if _seconds_apart(flight.alert_time, incident.alert_time) > self.window_seconds:
+                continue
+            score = jaccard(flight.tokens, tokens)
+            if score >= self.similarity and score > best_score:
+                best, best_score = flight, score
+        return best
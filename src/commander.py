@@ -1,14 +1,71 @@
 import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
-from src.graph import create_incident_graph
+from langgraph.types import Overwrite
+from src.checkpoints import create_checkpointer
+from src.agents import shared_evidence
+from src.coalesce import InvestigationCoalescer
+from src.graph import create_incident_graph, fingerprint
 from src.models import IncidentInput
+from src.similarity import get_index
+from src import budget, metrics, reports, tracing
+
+
+DEGRADED_NOTE = "Degraded deterministic-only analysis (no LLM reasoning) due to investigation overload; re-run when load drops"
+
+
+def investigation_id_for(incident: IncidentInput) -> str:
+    """Default investigation ID: re-triggering the same alert reuses its checkpoints."""
+    return f"{incident.service}-{fingerprint(incident.service, str(incident.alert_time))}"
 
 
 class IncidentCommander:
     def __init__(self):
-        self.graph = create_incident_graph()
+        self.checkpointer = create_checkpointer()
+        self.graph = create_incident_graph(checkpointer=self.checkpointer)
+        self._deterministic_graph = None
+        self.coalescer = InvestigationCoalescer()
+    
+    def investigate(self, incident: IncidentInput, deterministic: bool = False,
+                    investigation_id: Optional[str] = None) -> dict:
+        """Investigate an incident, sharing the run with concurrent duplicate alerts.
+        
+        Re-running an investigation ID only recomputes nodes whose inputs changed;
+        an interrupted one resumes after its last completed node.
+        """
+        return self.coalescer.run(
+            incident, lambda: self._investigate(incident, deterministic, investigation_id), deterministic,
+            investigation_id,
+        )
     
-    def investigate(self, incident: IncidentInput) -> dict:
+    def _investigate(self, incident: IncidentInput, deterministic: bool, investigation_id: Optional[str]) -> dict:
+        investigation_id = investigation_id or investigation_id_for(incident)
+        with self._measured("deterministic" if deterministic else "full"), budget.track(), shared_evidence(), \
+                tracing.trace(investigation_id, service=incident.service, deterministic=deterministic):
+            return self._run_graph(incident, deterministic, investigation_id)
+    
+    @contextmanager
+    def _measured(self, mode: str):
+        """Count and time one investigation; refreshes METRICS_FILE when set."""
+        metrics.INVESTIGATIONS_STARTED.labels(mode=mode).inc()
+        metrics.INVESTIGATIONS_IN_PROGRESS.labels().inc()
+        started = time.perf_counter()
+        try:
+            yield
+            metrics.INVESTIGATIONS_COMPLETED.labels(mode=mode).inc()
+        except Exception:
+            metrics.INVESTIGATIONS_FAILED.labels(mode=mode).inc()
+            raise
+        finally:
+            metrics.INVESTIGATIONS_IN_PROGRESS.labels().inc(-1)
+            metrics.INVESTIGATION_SECONDS.labels(mode=mode).observe(time.perf_counter() - started)
+            metrics.write_textfile()
+    
+    def _run_graph(self, incident: IncidentInput, deterministic: bool, investigation_id: str) -> dict:
         initial_state = {
             "incident": incident.model_dump(),
             "investigation_plan": [],
@@ -20,59 +77,75 @@ class IncidentCommander:
             "supporting_evidence": [],
             "causal_chain": "",
             "recommended_actions": [],
-            "final_report": {}
+            "final_report": {},
+            # A new run starts its progress and budget from scratch, even on a reused thread
+            "completed_nodes": Overwrite([]),
+            "budget_ledger": Overwrite({}),
         }
         
-        result = self.graph.invoke(initial_state)
+        if deterministic:
+            if self._deterministic_graph is None:
+                self._deterministic_graph = create_incident_graph(deterministic=True)
+            report = self._deterministic_graph.invoke(initial_state)["final_report"]
+            report["risk_notes"].insert(0, DEGRADED_NOTE)
+            return report
+        
+        config = {"configurable": {"thread_id": investigation_id}}
+        snapshot = self.graph.get_state(config)
+        if snapshot.next and fingerprint(snapshot.values.get("incident")) == fingerprint(initial_state["incident"]):
+            print(f"↻ Resuming investigation {investigation_id} at '{snapshot.next[0]}'")
+            budget.current().restore(snapshot.values.get("budget_ledger"))
+            result = self.graph.invoke(None, config)
+        else:
+            if snapshot.values:
+                # Keep checkpointed outputs and fingerprints; only the incident is refreshed
+                initial_state = {key: initial_state[key] for key in ("incident", "completed_nodes", "budget_ledger")}
+            result = self.graph.invoke(initial_state, config)
+        self._remember(investigation_id, result)
+        return result["final_report"]
+    
+    def _remember(self, investigation_id: str, result: dict):
+        """Add a freshly reasoned investigation to the similarity index."""
+        features = result.get("similarity_features")
+        if not features or (result.get("fast_path") or "").startswith("recall:"):
+            return
+        try:
+            get_index().add(investigation_id, features, result["final_report"])
+        except Exception as e:
+            print(f"[IncidentCommander] Could not update similarity index: {e}")
+    
+    def resume(self, investigation_id: str) -> dict:
+        """Continue a failed or interrupted investigation from its last completed node."""
+        config = {"configurable": {"thread_id": investigation_id}}
+        snapshot = self.graph.get_state(config)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoints for investigation {investigation_id}")
+        if not snapshot.next:
+            return snapshot.values["final_report"]
+        print(f"↻ Resuming investigation {investigation_id} at '{snapshot.next[0]}'")
+        with self._measured("resume"), budget.track() as ledger, shared_evidence(), \
+                tracing.trace(investigation_id, resumed=True):
+            ledger.restore(snapshot.values.get("budget_ledger"))
+            result = self.graph.invoke(None, config)
+        self._remember(investigation_id, result)
         return result["final_report"]
     
+    def get_state(self, investigation_id: str) -> dict:
+        """Checkpointed state of an investigation, complete or not."""
+        return self.graph.get_state({"configurable": {"thread_id": investigation_id}}).values
+    
     def format_report(self, report: dict) -> str:
-        output = ["=" * 80, "INCIDENT RESPONSE REPORT", "=" * 80]
-        
-        summary = report["incident_summary"]
-        output.append("\n### 1. Incident Summary")
-        output.append(f"•  Service: {summary['service']}")
-        output.append(f"•  Impact: {summary['impact']}")
-        output.append(f"•  Start Time: {summary['start_time']}")
-        output.append(f"•  Symptoms: {summary['symptoms']}")
-        
-        output.append("\n### 2. Investigation Plan")
-        for i, step in enumerate(report["investigation_plan"], 1):
-            output.append(f"{i}. {step}")
-        
-        output.append("\n### 3. Findings (Evidence)")
-        output.append("\n#### Logs Evidence")
-        for finding in report["logs_evidence"]["findings"]:
-            output.append(f"  - {finding}")
-        
-        output.append("\n#### Telemetry Evidence")
-        for finding in report["telemetry_evidence"]["findings"]:
-            output.append(f"  - {finding}")
-        
-        output.append("\n#### Deployment Evidence")
-        for finding in report["deployment_evidence"]["findings"]:
-            output.append(f"  - {finding}")
-        
-        output.append("\n### 4. Root Cause Hypothesis")
-        output.append(f"•  Explanation: {report['root_cause']['explanation']}")
-        output.append(f"•  Confidence: {report['root_cause']['confidence']}%")
-        
-        output.append("\n### 5. Supporting Evidence")
-        for evidence in report['root_cause']['supporting_evidence']:
-            output.append(f"  - {evidence}")
-        
-        output.append("\n### 6. Recommended Actions (Ranked)")
-        for action in report["recommended_actions"]:
-            output.append(f"{action['rank']}. {action['action']}")
-            output.append(f"   Risk: {action['risk_level']} | Impact: {action['expected_impact']}")
-        
-        output.append("\n### 7. Risk Notes")
-        for note in report["risk_notes"]:
-            output.append(f"•  {note}")
+        return reports.format_text(report)
+    
+    def save_report(self, formatted: str, report_id: Optional[str] = None, reports_dir: str = "reports") -> Path:
+        """Write a formatted report to reports/incident_report_<timestamp>[_<id>].txt."""
+        directory = Path(reports_dir)
+        directory.mkdir(exist_ok=True)
         
-        output.append("\n### 8. Next Steps / Follow-up")
-        for step in report["next_steps"]:
-            output.append(f"•  {step}")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = f"_{report_id}" if report_id else ""
+        report_file = directory / f"incident_report_{timestamp}{suffix}.txt"
         
-        output.append("\n" + "=" * 80)
-        return "\n".join(output)
+        with open(report_file, "w") as f:
+            f.write(formatted)
+        return report_file
@@ -0,0 +1,174 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+# (agent, marker in the system or human prompt) checked in order
+AGENT_MARKERS = [
+    ("orchestrator", "incident response expert"),
+    ("logs", "log analyst"),
+    ("telemetry", "metrics analysis expert"),
+    ("deployment", "deployment analysis expert"),
+    ("reasoning", "root cause analysis"),
+    ("report", "mitigation actions"),
+]
+
+CANNED_RESPONSES: Dict[str, Any] = {
+    "orchestrator": [
+        "Check error logs around the alert time",
+        "Inspect database connection and latency metrics",
+        "Review deployments shortly before the incident",
+        "Correlate changes with the error spike",
+    ],
+    "logs": [
+        "ERROR spike: connection pool exhausted on payment-api starting 14:23",
+        "Timeouts to the database increase after 14:20",
+    ],
+    "telemetry": [
+        "Database connections at pool limit (10/10) with requests waiting",
+        "p99 latency rose from 120ms to 2400ms",
+    ],
+    "deployment": [
+        "HIGH RISK: deploy-789 reduced database pool size from 20 to 10 shortly before the incident",
+    ],
+    "reasoning": {
+        "root_cause": "deploy-789 halved the database connection pool, exhausting it under normal load",
+        "confidence": 88,
+        "supporting_evidence": ["Pool exhausted errors", "Connections at pool limit", "Pool size reduced in deploy-789"],
+        "causal_chain": "deploy-789 pool size 20 → 10 → pool saturation → request timeouts",
+    },
+    "report": {
+        "actions": [
+            {"rank": 1, "action": "Roll back deploy-789", "risk_level": "medium", "expected_impact": "Restores pool size", "timeline": "immediate"},
+            {"rank": 2, "action": "Alert on pool utilization", "risk_level": "low", "expected_impact": "Earlier detection", "timeline": "days"},
+        ],
+        "risk_notes": ["Rollback may affect in-flight transactions"],
+        "next_steps": ["Confirm recovery", "Schedule post-incident review"],
+    },
+    "default": [],
+}
+
+
+def parse_latency(spec: str):
+    """Latency sampler from a spec: ``0.05``, ``uniform:lo,hi``, ``normal:mean,sd`` or ``lognormal:median,sigma`` (seconds)."""
+    spec = (spec or "0").strip()
+    kind, _, args = spec.partition(":")
+    if not args:
+        value = float(kind)
+        return lambda rng: value
+    params = [float(p) for p in args.split(",")]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(params[0]), params[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def classify_agent(messages: List[BaseMessage]) -> str:
+    text = " ".join(str(m.content) for m in messages).lower()
+    for agent, marker in AGENT_MARKERS:
+        if marker in text:
+            return agent
+    return "default"
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """Scripted offline chat model for benchmarks and tests (``LLM_PROVIDER=fake``).
+
+    Recognizes which agent is calling from its prompt and answers with that
+    agent's canned JSON, after sleeping for a latency drawn from the
+    configured distribution. ``responses`` maps an agent to a list of
+    scripted answers (strings or JSON values) served round-robin. Usage
+    metadata is estimated from message length so token accounting sees
+    realistic numbers.
+    """
+
+    latency: str = "0"
+    agent_latency: Dict[str, str] = {}
+    responses: Dict[str, Any] = {}
+    failure_rate: float = 0.0
+    seed: Optional[int] = None
+    model_name: str = "fake"
+
+    _rng: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any):
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    @property
+    def calls(self) -> Dict[str, int]:
+        """Calls served so far, per agent."""
+        return dict(self._calls)
+
+    def _content_for(self, agent: str) -> str:
+        if self.responses.get(agent):
+            scripted = self.responses[agent]
+            scripted = scripted[(self._calls[agent] - 1) % len(scripted)]
+        else:
+            scripted = CANNED_RESPONSES.get(agent, CANNED_RESPONSES["default"])
+        return scripted if isinstance(scripted, str) else json.dumps(scripted)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        agent = classify_agent(messages)
+        with self._lock:
+            self._calls[agent] = self._calls.get(agent, 0) + 1
+            delay = parse_latency(self.agent_latency.get(agent, self.latency))(self._rng)
+            fail = self._rng.random() < self.failure_rate
+            content = self._content_for(agent)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"Injected fake LLM failure ({agent})")
+
+        input_tokens = _estimate_tokens("".join(str(m.content) for m in messages))
+        output_tokens = _estimate_tokens(content)
+        message = AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens},
+            response_metadata={"model_name": self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def create_fake_llm(model: Optional[str] = None) -> FakeChatModel:
+    """Fake model configured from FAKE_LLM_* environment variables."""
+    responses = {}
+    responses_path = os.getenv("FAKE_LLM_RESPONSES")
+    if responses_path:
+        with open(responses_path, "r") as f:
+            responses = json.load(f)
+    seed = os.getenv("FAKE_LLM_SEED")
+    return FakeChatModel(
+        latency=os.getenv("FAKE_LLM_LATENCY", "0"),
+        agent_latency=json.loads(os.getenv("FAKE_LLM_AGENT_LATENCY", "{}")),
+        responses=responses,
+        failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+        seed=int(seed) if seed else None,
+        model_name=model or "fake",
+    )
@@ -1,8 +1,83 @@
-from typing import TypedDict
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import wraps
+from typing import Annotated, Optional, TypedDict
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from src.llm_factory import create_llm
-from src.agents import OrchestratorAgent, LogsAgent, TelemetryAgent, DeploymentAgent, ReasoningAgent, ReportAgent
-from src.models import IncidentReport, Evidence, RootCause, MitigationAction
+from src.agents import (
+    OrchestratorAgent, LogsAgent, TelemetryAgent, DeploymentAgent, ReasoningAgent, ReportAgent,
+    fetch_evidence, implicated_services, load_evidence,
+)
+from src.models import IncidentReport, Evidence, RootCause, MitigationAction, TokenUsage
+from src import budget, metrics, profiling, progress, rules, similarity, tracing
+
+
+EVIDENCE_SOURCES = ("logs", "telemetry", "deployment")
+
+# Step each node marks done in ``completed_nodes``; per-service branches count once merged
+PROGRESS_STEPS = {"service_evidence": None, "merge_evidence": "evidence"}
+
+
+def _instrument(name: str, node):
+    """Wrap a graph node in a tracing span, duration histogram, progress events and optional profiler.
+
+    A node that returns also marks its step in ``completed_nodes`` and
+    checkpoints the investigation's budget ledger in ``budget_ledger``.
+
+    ``wraps`` preserves the signature, so LangGraph still injects ``config`` into nodes that take it.
+    """
+    @wraps(node)
+    def wrapper(state, *args, **kwargs):
+        attributes = {"service": state["service"]} if name == "service_evidence" else {}
+        started = time.perf_counter()
+        progress.emit(name, "started", **attributes)
+        status, error = "finished", None
+        try:
+            with tracing.span(name, kind="node", **attributes):
+                if profiling.enabled():
+                    label = f"{name}.{attributes['service']}" if attributes else name
+                    result = profiling.profile_node(label, node, state, *args, **kwargs)
+                else:
+                    result = node(state, *args, **kwargs)
+            step = PROGRESS_STEPS.get(name, name)
+            if step:
+                result["completed_nodes"] = [step]
+            ledger = budget.current()
+            if ledger is not None:
+                result["budget_ledger"] = ledger.summary()
+            return result
+        except Exception as e:
+            status, error = "failed", str(e)
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            metrics.NODE_SECONDS.labels(node=name).observe(seconds)
+            progress.emit(name, status, seconds=round(seconds, 3), error=error, **attributes)
+    return wrapper
+
+
+def _add_completed(left: list, right: list) -> list:
+    """Reducer for ``completed_nodes``: steps finished in the current run, in order."""
+    left = left or []
+    return left + [step for step in right or [] if step not in left]
+
+
+def _latest_ledger(left: dict, right: dict) -> dict:
+    """Reducer for ``budget_ledger``: concurrent branches snapshot one ledger, keep the latest."""
+    if not left or not right:
+        return right or left
+    return right if right["elapsed_seconds"] >= left["elapsed_seconds"] else left
+
+
+def _merge_service_findings(left: dict, right: dict) -> dict:
+    """Reducer for concurrent per-service evidence branches: newest result per service wins."""
+    return {**(left or {}), **(right or {})}
 
 
 class GraphState(TypedDict):
@@ -17,12 +92,114 @@ class GraphState(TypedDict):
     causal_chain: str
     recommended_actions: list[dict]
     final_report: dict
+    fingerprints: dict
+    fast_path: str
+    services: list[str]
+    service_findings: Annotated[dict, _merge_service_findings]
+    prior_incidents: list[dict]
+    similarity_features: list[str]
+    completed_nodes: Annotated[list, _add_completed]
+    budget_ledger: Annotated[dict, _latest_ledger]
+
+
+def fingerprint(*parts) -> str:
+    """Stable hash of a node's inputs."""
+    blob = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def _unchanged(state: GraphState, node: str, fp: str, *outputs: str) -> bool:
+    """True when a checkpointed run already produced ``outputs`` from identical inputs."""
+    previous = (state.get("fingerprints") or {}).get(node)
+    return previous == fp and all(state.get(key) for key in outputs)
+
+
+def _record(state: GraphState, node: str, fp: str):
+    state["fingerprints"] = {**(state.get("fingerprints") or {}), node: fp}
+
+
+@tracing.traced("build_final_report", kind="parse")
+def build_final_report(state: GraphState, report_data: dict) -> IncidentReport:
+    """Assemble the IncidentReport from graph state and the report agent's output."""
+    # Safely create mitigation actions
+    actions = []
+    for action in report_data.get("actions", []):
+        try:
+            # Ensure all required fields are present
+            action.setdefault("rank", len(actions) + 1)
+            action.setdefault("action", "Review and monitor")
+            action.setdefault("risk_level", "low")
+            action.setdefault("expected_impact", "TBD")
+            actions.append(MitigationAction(**action))
+        except Exception as e:
+            print(f"   ⚠ Error creating action: {e}")
+    
+    ledger = budget.current()
+    usage = TokenUsage(**ledger.summary()) if ledger is not None else None
+    risk_notes = list(report_data.get("risk_notes", []))
+    if usage is not None:
+        risk_notes.extend(f"Budget: {note}" for note in usage.degradations)
+    
+    return IncidentReport(
+        incident_summary={
+            "service": state["incident"]["service"],
+            "impact": state["incident"]["symptoms"],
+            "start_time": str(state["incident"]["alert_time"]),
+            "symptoms": state["incident"]["symptoms"]
+        },
+        investigation_plan=state["investigation_plan"],
+        logs_evidence=Evidence(source="logs", findings=state["logs_findings"]),
+        telemetry_evidence=Evidence(source="telemetry", findings=state["telemetry_findings"]),
+        deployment_evidence=Evidence(source="deployment", findings=state["deployment_findings"]),
+        root_cause=RootCause(
+            explanation=state["root_cause_hypothesis"],
+            confidence=min(100, max(0, state["confidence"])),  # Clamp to 0-100
+            supporting_evidence=state.get("supporting_evidence", [])
+        ),
+        recommended_actions=actions,
+        risk_notes=risk_notes,
+        next_steps=report_data.get("next_steps", []),
+        token_usage=usage,
+    )
+
+
+def _enabled(flag: str) -> bool:
+    return os.getenv(flag, "true").lower() in ("1", "true", "yes")
+
 
+def _load_evidence_json(source: str, incident: dict):
+    try:
+        return load_evidence(source, incident)
+    except Exception as e:
+        print(f"   ⚠ Could not load {source} for triage: {e}")
+        return None
 
-def create_incident_graph():
-    """Create the incident investigation workflow graph."""
+
+def create_incident_graph(deterministic: bool = False, checkpointer=None):
+    """Create the incident investigation workflow graph.
+    
+    With ``deterministic=True`` no LLM is created and every agent answers from
+    its rule-based fallback, which is what the scheduler uses under overload.
+    
+    Each node fingerprints its inputs (incident fields plus a content hash of
+    the data it reads). Given a ``checkpointer`` and a re-run on the same
+    thread, nodes whose fingerprint matches the checkpointed one keep their
+    previous output, so only changed evidence and its downstream nodes rerun.
+    
+    A ``triage`` node runs first: when the deterministic rules in
+    ``src.rules`` agree on a diagnosis above FAST_PATH_CONFIDENCE, or a past
+    investigation in the similarity index is a near-duplicate, the graph
+    branches to ``fast_path`` and writes the report without any LLM call.
+    Less similar past incidents are passed to reasoning as seeded context.
     
-    llm = create_llm()
+    Evidence is gathered per implicated service (the alerted service plus
+    any others logging errors, up to MAX_IMPLICATED_SERVICES): ``orchestrate``
+    fans out one ``service_evidence`` branch per service, each running its
+    logs, metrics and deployment agents concurrently on that service's data,
+    and ``merge_evidence`` joins them before cross-service reasoning.
+    """
+    
+    llm = None if deterministic else create_llm()
     
     orchestrator = OrchestratorAgent(llm)
     logs_agent = LogsAgent(llm)
@@ -31,120 +208,225 @@ def create_incident_graph():
     reasoning_agent = ReasoningAgent(llm)
     report_agent = ReportAgent(llm)
     
+    def triage_node(state: GraphState, config: RunnableConfig) -> GraphState:
+        print("⚡ Checking deterministic rules and past incidents...")
+        state["fast_path"] = ""
+        state["prior_incidents"] = []
+        state["similarity_features"] = []
+        incident = state["incident"]
+        if not all(incident.get(k) for k in ("logs_path", "metrics_path", "deployment_path")):
+            return state
+        
+        logs = _load_evidence_json("logs", incident)
+        deployments = _load_evidence_json("deployment", incident)
+        
+        if _enabled("FAST_PATH_ENABLED"):
+            match = rules.evaluate(incident, logs, _load_evidence_json("telemetry", incident), deployments)
+            if match is not None:
+                state["fast_path"] = match["rule"]
+                metrics.FAST_PATH.labels(kind="rules").inc()
+                state["investigation_plan"] = [f"Deterministic triage: {match['rule'].replace('_', ' ')} rule matched"]
+                state["logs_findings"] = match["logs_findings"]
+                state["telemetry_findings"] = match["telemetry_findings"]
+                state["deployment_findings"] = match["deployment_findings"]
+                state["root_cause_hypothesis"] = match["root_cause"]
+                state["confidence"] = match["confidence"]
+                state["supporting_evidence"] = match["supporting_evidence"]
+                state["causal_chain"] = match["causal_chain"]
+                state["recommended_actions"] = match["actions"]
+                print(f"   ✓ Rule '{match['rule']}' matched with {match['confidence']}% confidence")
+                return state
+        
+        if _enabled("SIMILARITY_ENABLED"):
+            features = similarity.incident_features(incident, logs, deployments)
+            state["similarity_features"] = features
+            thread_id = (config or {}).get("configurable", {}).get("thread_id")
+            neighbours = similarity.get_index().query(features, exclude=thread_id)
+            seed_threshold = float(os.getenv("SIMILARITY_SEED_THRESHOLD", "0.5"))
+            answer_threshold = float(os.getenv("SIMILARITY_ANSWER_THRESHOLD", "0.9"))
+            priors = [n for n in neighbours if n["similarity"] >= seed_threshold]
+            if priors and priors[0]["similarity"] >= answer_threshold:
+                best = priors[0]
+                state["fast_path"] = f"recall:{best['id']}"
+                metrics.FAST_PATH.labels(kind="recall").inc()
+                state["investigation_plan"] = [f"Matched past investigation {best['id']} (similarity {best['similarity']:.2f})"]
+                state["logs_findings"] = [f[len("log:"):] for f in features if f.startswith("log:")][:10]
+                state["telemetry_findings"] = ["Not re-analyzed: diagnosis reused from past investigation"]
+                state["deployment_findings"] = [f"Changed config: {f[len('config:'):]}" for f in features if f.startswith("config:")]
+                state["root_cause_hypothesis"] = best["root_cause"]
+                state["confidence"] = round(best["confidence"] * best["similarity"])
+                state["supporting_evidence"] = best["supporting_evidence"]
+                state["causal_chain"] = ""
+                state["recommended_actions"] = best["actions"]
+                print(f"   ✓ Reusing diagnosis from {best['id']} (similarity {best['similarity']:.2f})")
+                return state
+            state["prior_incidents"] = priors
+            if priors:
+                print(f"   → {len(priors)} similar past incident(s) seeded into reasoning")
+        
+        print("   → Ambiguous evidence, running full investigation")
+        return state
+    
+    def fast_path_node(state: GraphState) -> GraphState:
+        recalled = state["fast_path"].startswith("recall:")
+        print("📝 Writing report from " + ("a past investigation..." if recalled else "deterministic rules..."))
+        report = build_final_report(state, {
+            "actions": [dict(a) for a in state["recommended_actions"]],
+            "risk_notes": similarity.RECALL_RISK_NOTES if recalled else rules.FAST_PATH_RISK_NOTES,
+            "next_steps": rules.FAST_PATH_NEXT_STEPS,
+        })
+        state["final_report"] = report.model_dump()
+        print(f"   ✓ Report generated with {len(report.recommended_actions)} recommendations")
+        return state
+    
+    def route_after_triage(state: GraphState) -> str:
+        return "fast_path" if state.get("fast_path") else "orchestrate"
+    
     def orchestrate_node(state: GraphState) -> GraphState:
         print("📋 Creating investigation plan...")
-        state["investigation_plan"] = orchestrator.create_plan(state["incident"])
+        incident = state["incident"]
+        logs = _load_evidence_json("logs", incident) if incident.get("logs_path") else None
+        state["services"] = implicated_services(logs, incident, int(os.getenv("MAX_IMPLICATED_SERVICES", "5")))
+        fp = fingerprint(incident.get("service"), incident.get("symptoms"), str(incident.get("alert_time")))
+        if _unchanged(state, "orchestrate", fp, "investigation_plan"):
+            print("   ↺ Incident unchanged, reusing previous plan")
+            metrics.STEPS_REUSED.labels(step="plan").inc()
+            return state
+        state["investigation_plan"] = orchestrator.create_plan(incident)
+        _record(state, "orchestrate", fp)
         print(f"   ✓ Plan created with {len(state['investigation_plan'])} steps")
         return state
     
-    def logs_node(state: GraphState) -> GraphState:
-        print("📜 Analyzing logs...")
-        logs_path = state["incident"].get("logs_path")
-        if logs_path:
-            state["logs_findings"] = logs_agent.analyze(logs_path, state["incident"])
-            print(f"   ✓ Found {len(state['logs_findings'])} log findings")
+    def collect_evidence(source: str, incident: dict, previous: Optional[dict]) -> dict:
+        """Run one evidence agent for one service, reusing the previous findings if inputs match."""
+        service = incident["service"]
+        label, path_key, agent = {
+            "logs": ("logs", "logs_path", logs_agent),
+            "telemetry": ("metrics", "metrics_path", telemetry_agent),
+            "deployment": ("deployment", "deployment_path", deployment_agent),
+        }[source]
+        path = incident.get(path_key)
+        if not path:
+            print(f"   ⚠ [{service}] No {label} path provided")
+            return {"findings": [f"No {label} path provided"], "fingerprint": None}
+        
+        payload = fetch_evidence(source, incident, service=service)
+        if payload is None:
+            return {"findings": [f"No {label} data for {service}"], "fingerprint": None}
+        
+        incident_time = str(incident.get("alert_time"))
+        fp = fingerprint(service, incident.get("symptoms"), incident_time if source != "telemetry" else None, payload)
+        if previous and previous.get("fingerprint") == fp and previous.get("findings"):
+            print(f"   ↺ [{service}] {label.capitalize()} unchanged, reusing previous findings")
+            metrics.STEPS_REUSED.labels(step=source).inc()
+            return previous
+        
+        if source == "deployment":
+            findings = agent.analyze(path, incident_time, incident, payload=payload)
         else:
-            state["logs_findings"] = ["No logs path provided"]
-            print("   ⚠ No logs path provided")
-        return state
+            findings = agent.analyze(path, incident, payload=payload)
+        print(f"   ✓ [{service}] Found {len(findings)} {label} findings")
+        return {"findings": findings, "fingerprint": fp}
     
-    def telemetry_node(state: GraphState) -> GraphState:
-        print("📊 Analyzing metrics...")
-        metrics_path = state["incident"].get("metrics_path")
-        if metrics_path:
-            state["telemetry_findings"] = telemetry_agent.analyze(metrics_path, state["incident"])
-            print(f"   ✓ Found {len(state['telemetry_findings'])} metric findings")
-        else:
-            state["telemetry_findings"] = ["No metrics path provided"]
-            print("   ⚠ No metrics path provided")
-        return state
+    def service_evidence_node(task: dict) -> dict:
+        """Per-service evidence subgraph: logs, metrics and deployments analyzed concurrently."""
+        service = task["service"]
+        incident = {**task["incident"], "service": service}
+        previous = task.get("previous") or {}
+        print(f"🔎 Analyzing logs, metrics and deployments for {service}...")
+        with ThreadPoolExecutor(max_workers=len(EVIDENCE_SOURCES)) as pool:
+            futures = {
+                source: pool.submit(copy_context().run, profiling.in_worker(collect_evidence), source, incident, previous.get(source))
+                for source in EVIDENCE_SOURCES
+            }
+            results = {source: future.result() for source, future in futures.items()}
+        return {"service_findings": {service: results}}
     
-    def deployment_node(state: GraphState) -> GraphState:
-        print("🚀 Analyzing deployments...")
-        deployment_path = state["incident"].get("deployment_path")
-        incident_time = state["incident"].get("alert_time")
-        if deployment_path:
-            state["deployment_findings"] = deployment_agent.analyze(
-                deployment_path, str(incident_time), state["incident"]
-            )
-            print(f"   ✓ Found {len(state['deployment_findings'])} deployment findings")
-        else:
-            state["deployment_findings"] = ["No deployment path provided"]
-            print("   ⚠ No deployment path provided")
+    def route_to_services(state: GraphState) -> list:
+        previous = state.get("service_findings") or {}
+        return [
+            Send("service_evidence", {"incident": state["incident"], "service": service, "previous": previous.get(service)})
+            for service in state["services"]
+        ]
+    
+    def merge_evidence_node(state: GraphState) -> GraphState:
+        print("🧩 Merging evidence across services...")
+        services = state["services"]
+        per_service = state.get("service_findings") or {}
+        multi = len(services) > 1
+        for source, key in (("logs", "logs_findings"), ("telemetry", "telemetry_findings"), ("deployment", "deployment_findings")):
+            merged = []
+            for service in services:
+                findings = per_service.get(service, {}).get(source, {}).get("findings", [])
+                merged.extend(f"[{service}] {f}" if multi else f for f in findings)
+            state[key] = merged
+        print(f"   ✓ Evidence merged for {len(services)} service(s)")
         return state
     
     def reasoning_node(state: GraphState) -> GraphState:
         print("🔍 Correlating evidence and determining root cause...")
+        priors = state.get("prior_incidents") or []
+        fp = fingerprint(state["logs_findings"], state["telemetry_findings"], state["deployment_findings"],
+                         [(p["id"], p["similarity"]) for p in priors])
+        if _unchanged(state, "reasoning", fp, "root_cause_hypothesis"):
+            print("   ↺ Evidence unchanged, reusing previous root cause")
+            metrics.STEPS_REUSED.labels(step="reasoning").inc()
+            return state
         result = reasoning_agent.correlate(
             state["logs_findings"],
             state["telemetry_findings"],
-            state["deployment_findings"]
+            state["deployment_findings"],
+            prior_incidents=priors,
+            services=state.get("services")
         )
         state["root_cause_hypothesis"] = result.get("root_cause", "Unknown")
         state["confidence"] = result.get("confidence", 0)
         state["supporting_evidence"] = result.get("supporting_evidence", [])
         state["causal_chain"] = result.get("causal_chain", "")
+        _record(state, "reasoning", fp)
         print(f"   ✓ Root cause identified with {state['confidence']}% confidence")
         return state
     
     def report_node(state: GraphState) -> GraphState:
         print("📝 Generating incident report...")
+        incident = state["incident"]
+        fp = fingerprint(
+            incident.get("service"), incident.get("symptoms"), str(incident.get("alert_time")),
+            state["investigation_plan"], state["logs_findings"], state["telemetry_findings"],
+            state["deployment_findings"], state["root_cause_hypothesis"], state["confidence"],
+            state.get("supporting_evidence", []),
+        )
+        if _unchanged(state, "report", fp, "final_report"):
+            print("   ↺ Inputs unchanged, reusing previous report")
+            metrics.STEPS_REUSED.labels(step="report").inc()
+            return state
         report_data = report_agent.generate(state)
         
-        # Safely create mitigation actions
-        actions = []
-        for action in report_data.get("actions", []):
-            try:
-                # Ensure all required fields are present
-                action.setdefault("rank", len(actions) + 1)
-                action.setdefault("action", "Review and monitor")
-                action.setdefault("risk_level", "low")
-                action.setdefault("expected_impact", "TBD")
-                actions.append(MitigationAction(**action))
-            except Exception as e:
-                print(f"   ⚠ Error creating action: {e}")
-        
-        final_report = IncidentReport(
-            incident_summary={
-                "service": state["incident"]["service"],
-                "impact": state["incident"]["symptoms"],
-                "start_time": str(state["incident"]["alert_time"]),
-                "symptoms": state["incident"]["symptoms"]
-            },
-            investigation_plan=state["investigation_plan"],
-            logs_evidence=Evidence(source="logs", findings=state["logs_findings"]),
-            telemetry_evidence=Evidence(source="telemetry", findings=state["telemetry_findings"]),
-            deployment_evidence=Evidence(source="deployment", findings=state["deployment_findings"]),
-            root_cause=RootCause(
-                explanation=state["root_cause_hypothesis"],
-                confidence=min(100, max(0, state["confidence"])),  # Clamp to 0-100
-                supporting_evidence=state.get("supporting_evidence", [])
-            ),
-            recommended_actions=actions,
-            risk_notes=report_data.get("risk_notes", []),
-            next_steps=report_data.get("next_steps", [])
-        )
+        final_report = build_final_report(state, report_data)
         
         state["final_report"] = final_report.model_dump()
-        print(f"   ✓ Report generated with {len(actions)} recommendations")
+        _record(state, "report", fp)
+        print(f"   ✓ Report generated with {len(final_report.recommended_actions)} recommendations")
         return state
     
     # Build workflow graph
     workflow = StateGraph(GraphState)
     
-    workflow.add_node("orchestrate", orchestrate_node)
-    workflow.add_node("logs", logs_node)
-    workflow.add_node("telemetry", telemetry_node)
-    workflow.add_node("deployment", deployment_node)
-    workflow.add_node("reasoning", reasoning_node)
-    workflow.add_node("report", report_node)
-    
-    workflow.set_entry_point("orchestrate")
-    workflow.add_edge("orchestrate", "logs")
-    workflow.add_edge("logs", "telemetry")
-    workflow.add_edge("telemetry", "deployment")
-    workflow.add_edge("deployment", "reasoning")
+    workflow.add_node("triage", _instrument("triage", triage_node))
+    workflow.add_node("fast_path", _instrument("fast_path", fast_path_node))
+    workflow.add_node("orchestrate", _instrument("orchestrate", orchestrate_node))
+    workflow.add_node("service_evidence", _instrument("service_evidence", service_evidence_node))
+    workflow.add_node("merge_evidence", _instrument("merge_evidence", merge_evidence_node))
+    workflow.add_node("reasoning", _instrument("reasoning", reasoning_node))
+    workflow.add_node("report", _instrument("report", report_node))
+    
+    workflow.set_entry_point("triage")
+    workflow.add_conditional_edges("triage", route_after_triage, ["fast_path", "orchestrate"])
+    workflow.add_edge("fast_path", END)
+    workflow.add_conditional_edges("orchestrate", route_to_services, ["service_evidence"])
+    workflow.add_edge("service_evidence", "merge_evidence")
+    workflow.add_edge("merge_evidence", "reasoning")
     workflow.add_edge("reasoning", "report")
     workflow.add_edge("report", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
@@ -1,27 +1,39 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_anthropic import ChatAnthropic
+from typing import Optional
 
-def create_llm():
+def create_llm(model: Optional[str] = None):
     """Create LLM instance based on provider in .env
     
     Supports:
     - gemini (default): Google's Gemini models
     - anthropic: Anthropic's Claude models
+    - fake: scripted offline model for benchmarks and tests (see src/fake_llm.py)
+    
+    Only the selected provider's SDK is imported; each one takes about a
+    second to load, so importing both would slow every cold start.
+    
+    ``model`` overrides the provider's configured model (used for the
+    smaller budget model, see src/budget.py).
     """
     
     provider = os.getenv("LLM_PROVIDER", "gemini").lower()
     
+    if provider == "fake":
+        from src.fake_llm import create_fake_llm
+        return create_fake_llm(model)
+    
     if provider == "anthropic":
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY not set in environment")
         
+        from langchain_anthropic import ChatAnthropic
         return ChatAnthropic(
-            model=os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514"),
+            model=model or os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514"),
             anthropic_api_key=api_key,
             temperature=0.1,
-            max_tokens=4096
+            max_tokens=4096,
+            max_retries=0  # retried (and counted) in agents._invoke
         )
     else:  # default to gemini
         api_key = os.getenv("GEMINI_API_KEY")
@@ -29,13 +41,15 @@ def create_llm():
             raise ValueError("GEMINI_API_KEY not set in environment")
         
         # Use gemini-2.0-flash for better performance and JSON output
-        model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-001")
+        model = model or os.getenv("GEMINI_MODEL", "gemini-2.0-flash-001")
         
+        from langchain_google_genai import ChatGoogleGenerativeAI
         return ChatGoogleGenerativeAI(
             model=model,
             google_api_key=api_key,
             temperature=0.1,
             max_tokens=4096,
+            max_retries=0,  # retried (and counted) in agents._invoke
             convert_system_message_to_human=True  # Better compatibility
         )
 
@@ -1,20 +1,15 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 import json
-from typing import Dict, List, Union
-try:
-    from fastmcp import FastMCP
-except ImportError:
-    # Mock for development if library missing
-    class FastMCP:
-        def __init__(self, name): self.name = name
-        def resource(self, uri): 
-            def decorator(func): return func
-            return decorator
-        def run(self): print("FastMCP not installed")
-
-# Initialize FastMCP server
-mcp = FastMCP("cloud-monitoring")
-DATA_DIR = Path(__file__).parent.parent / "data"
+import os
+from typing import Dict, List, Optional, Union
+from src import tracing
+
+DATA_DIR = Path(os.getenv("DATA_DIR", str(Path(__file__).parent.parent / "data")))
+
+# Set by live_data(); None means WATCH_DATA decides
+_live_data: ContextVar[Optional[bool]] = ContextVar("live_data", default=None)
 
 def _load_json_file(filename: str) -> Union[Dict, List]:
     """Helper to load JSON file safely."""
@@ -22,30 +17,108 @@ def _load_json_file(filename: str) -> Union[Dict, List]:
     if not path.exists():
         return {"error": f"File not found: {filename}"}
     try:
-        with open(path, "r") as f:
+        with tracing.span(f"load:{filename}", kind="data", bytes=path.stat().st_size), open(path, "r") as f:
             return json.load(f)
     except json.JSONDecodeError as e:
         return {"error": f"Invalid JSON in {filename}: {str(e)}"}
     except Exception as e:
         return {"error": f"Error loading {filename}: {str(e)}"}
 
-@mcp.resource("monitoring://logs")
+@contextmanager
+def live_data(enabled: bool = True):
+    """Serve the resources from the watcher store (or not) in this context, overriding WATCH_DATA."""
+    token = _live_data.set(enabled)
+    try:
+        yield
+    finally:
+        _live_data.reset(token)
+
+def _live_store():
+    """Return the watcher-backed store when live_data() or WATCH_DATA enables it."""
+    enabled = _live_data.get()
+    if enabled is None:
+        enabled = os.getenv("WATCH_DATA", "").lower() in ("1", "true", "yes")
+    if not enabled:
+        return None
+    from src.watcher import get_store
+    return get_store(DATA_DIR)
+
+def _load_log_shards(start=None, end=None) -> Union[List, Dict, None]:
+    """Load rotated/compressed log shards matching LOGS_GLOB, if configured."""
+    pattern = os.getenv("LOGS_GLOB")
+    if not pattern:
+        return None
+    from src.shards import load_shards
+    try:
+        return load_shards(pattern, DATA_DIR, start, end)
+    except Exception as e:
+        return {"error": f"Error loading log shards {pattern}: {str(e)}"}
+
+def query_logs(start=None, end=None) -> str:
+    """Get logs within [start, end], skipping shards outside the window."""
+    data = _load_log_shards(start, end)
+    if data is None:
+        from src.shards import normalize_ts
+        start, end = normalize_ts(start), normalize_ts(end)
+        data = _load_json_file("logs.json")
+        if isinstance(data, list):
+            data = [
+                log for log in data
+                if (not start or log.get("timestamp", "") >= start) and (not end or log.get("timestamp", "") <= end)
+            ]
+    return json.dumps(data, indent=2)
+
 def get_logs() -> str:
     """Get all system logs."""
-    data = _load_json_file("logs.json")
+    store = _live_store()
+    if store is not None:
+        data = store.get_logs()
+    else:
+        data = _load_log_shards()
+        if data is None:
+            data = _load_json_file("logs.json")
     return json.dumps(data, indent=2)
 
-@mcp.resource("monitoring://metrics")
 def get_metrics() -> str:
     """Get system metrics."""
-    data = _load_json_file("metrics.json")
+    store = _live_store()
+    if store is not None and store.metrics is not None:
+        data = store.metrics
+    else:
+        data = _load_json_file("metrics.json")
     return json.dumps(data, indent=2)
 
-@mcp.resource("monitoring://deployments")
 def get_deployments() -> str:
     """Get deployment history."""
-    data = _load_json_file("deployments.json")
+    store = _live_store()
+    if store is not None and store.deployments is not None:
+        data = store.deployments
+    else:
+        data = _load_json_file("deployments.json")
     return json.dumps(data, indent=2)
 
+def create_mcp_server():
+    """FastMCP server exposing the monitoring resources.
+    
+    Built on demand so the agents, which call the resource functions
+    directly, don't pay for importing fastmcp.
+    """
+    try:
+        from fastmcp import FastMCP
+    except ImportError:
+        # Mock for development if library missing
+        class FastMCP:
+            def __init__(self, name): self.name = name
+            def resource(self, uri): 
+                def decorator(func): return func
+                return decorator
+            def run(self): print("FastMCP not installed")
+    
+    mcp = FastMCP("cloud-monitoring")
+    mcp.resource("monitoring://logs")(get_logs)
+    mcp.resource("monitoring://metrics")(get_metrics)
+    mcp.resource("monitoring://deployments")(get_deployments)
+    return mcp
+
 if __name__ == "__main__":
-    mcp.run()
+    create_mcp_server().run()
@@ -0,0 +1,248 @@
+"""In-process metrics registry rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms with labels, without a dependency on
+``prometheus_client``. The service exposes ``GET /metrics``; one-shot and
+batch runs write the same text to ``METRICS_FILE`` after each investigation
+(suitable for node_exporter's textfile collector).
+"""
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels(...)")
+        return self.labels()
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def value(self, **labels) -> float:
+        return self.labels(**labels).value
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}_total", _format_labels(self.labelnames, key), child.value
+
+
+class Gauge(_Metric):
+    """Gauge set directly or read from a callback at scrape time (``set_function``)."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                yield self.name, "", float(self._function())
+            except Exception:
+                pass
+            return
+        for key, child in list(self._children.items()):
+            yield self.name, _format_labels(self.labelnames, key), child.value
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, count, total = list(child.counts), child.count, child.sum
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), count
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+INVESTIGATIONS_STARTED = REGISTRY.counter(
+    "incident_investigations_started", "Investigations started", ["mode"])
+INVESTIGATIONS_COMPLETED = REGISTRY.counter(
+    "incident_investigations_completed", "Investigations that produced a report", ["mode"])
+INVESTIGATIONS_FAILED = REGISTRY.counter(
+    "incident_investigations_failed", "Investigations that raised", ["mode"])
+INVESTIGATION_SECONDS = REGISTRY.histogram(
+    "incident_investigation_duration_seconds", "Wall time of one investigation", ["mode"])
+INVESTIGATIONS_IN_PROGRESS = REGISTRY.gauge(
+    "incident_investigations_in_progress", "Investigations currently running")
+QUEUE_DEPTH = REGISTRY.gauge(
+    "incident_queue_depth", "Incidents waiting in the service queue")
+QUEUE_OVERFLOW = REGISTRY.counter(
+    "incident_queue_overflow", "Incidents degraded, displaced or rejected because the queue was full", ["outcome"])
+NODE_SECONDS = REGISTRY.histogram(
+    "incident_node_duration_seconds", "Wall time of each graph node run", ["node"])
+LLM_SECONDS = REGISTRY.histogram(
+    "incident_llm_request_duration_seconds", "LLM call latency per agent", ["agent"])
+LLM_REQUESTS = REGISTRY.counter(
+    "incident_llm_requests", "LLM calls per agent and outcome (ok, error)", ["agent", "outcome"])
+LLM_CACHE_HITS = REGISTRY.counter(
+    "incident_llm_cache_hits", "LLM calls answered from the response cache", ["agent"])
+LLM_TOKENS = REGISTRY.counter(
+    "incident_llm_tokens", "LLM tokens per agent and direction (input, output)", ["agent", "direction"])
+AGENT_FALLBACKS = REGISTRY.counter(
+    "incident_agent_fallbacks",
+    "Agent results produced by the canned fallback path instead of the LLM, by reason", ["agent", "reason"])
+STEPS_REUSED = REGISTRY.counter(
+    "incident_steps_reused", "Plan, evidence, reasoning and report steps reused from checkpoints", ["step"])
+FAST_PATH = REGISTRY.counter(
+    "incident_fast_path", "Investigations answered by the rule engine or similarity recall", ["kind"])
+
+
+def record_fallback(agent: str, reason: str):
+    AGENT_FALLBACKS.labels(agent=agent, reason=reason).inc()
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def write_textfile(path: Optional[str] = None) -> Optional[Path]:
+    """Write the exposition to ``path`` (default METRICS_FILE) atomically; no-op when unset."""
+    path = path or os.getenv("METRICS_FILE")
+    if not path:
+        return None
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(render())
+    os.replace(tmp, target)
+    return target
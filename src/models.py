@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -31,6 +31,26 @@ class MitigationAction(BaseModel):
     expected_impact: str
 
 
+class AgentUsage(BaseModel):
+    calls: int = 0
+    skipped: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    models: List[str] = []
+
+
+class TokenUsage(BaseModel):
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    llm_calls: int = 0
+    by_agent: Dict[str, AgentUsage] = {}
+    elapsed_seconds: Optional[float] = None
+    token_budget: Optional[int] = None
+    time_budget_seconds: Optional[float] = None
+    degradations: List[str] = []
+
+
 class IncidentReport(BaseModel):
     incident_summary: dict
     investigation_plan: List[str]
@@ -41,3 +61,4 @@ class IncidentReport(BaseModel):
     recommended_actions: List[MitigationAction]
     risk_notes: List[str]
     next_steps: List[str]
+    token_usage: Optional[TokenUsage] = None
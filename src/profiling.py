@@ -0,0 +1,219 @@
+"""Opt-in per-node profiling (PROFILE_NODES=1).
+
+Each graph node run is wrapped in cProfile and tracemalloc. For every
+investigation, ``reports/profiles/<investigation_id>/`` (PROFILE_DIR) gets:
+
+* ``<node>.collapsed``: collapsed stacks (``frame;frame;frame <µs>``) for
+  flamegraph.pl, speedscope or inferno
+* ``<node>.prof``: raw pstats, e.g. for ``python -m pstats`` or snakeviz
+* ``profile.json``: wall and CPU time, peak traced memory, top allocation
+  sites and top functions by cumulative time for each node
+
+Work that a node hands to a thread pool is profiled when submitted through
+``in_worker``. tracemalloc is process-wide, so peaks and allocation sites of
+nodes that overlap in time (parallel ``service_evidence`` branches) include
+each other's allocations.
+"""
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src import tracing
+
+TOP_N = 15
+MAX_STACK_DEPTH = 64
+
+_active: ContextVar[Optional["NodeProfile"]] = ContextVar("node_profile", default=None)
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+_tracemalloc_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return os.getenv("PROFILE_NODES", "").lower() in ("1", "true", "yes")
+
+
+def profile_dir(investigation_id: Optional[str]) -> Path:
+    return Path(os.getenv("PROFILE_DIR", "reports/profiles")) / (investigation_id or "unknown")
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class NodeProfile:
+    """cProfile data for one node run, including work it handed to worker threads."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.profilers: List[cProfile.Profile] = []
+        self.cpu_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def run_worker(self, fn: Callable, *args, **kwargs):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per process; overlapping runs go unprofiled
+            profiler = None
+        cpu_started = time.thread_time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            with self._lock:
+                if profiler is not None:
+                    self.profilers.append(profiler)
+                self.cpu_seconds += time.thread_time() - cpu_started
+
+    def stats(self) -> Optional[pstats.Stats]:
+        profilers = [p for p in self.profilers if p.getstats()]
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+
+def in_worker(fn: Callable) -> Callable:
+    """Profile ``fn`` as part of the current node when it runs on another thread."""
+    def wrapper(*args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+        return profile.run_worker(fn, *args, **kwargs)
+    return wrapper
+
+
+def _frame_name(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name.strip("<>").replace(";", ",")
+    return f"{name} ({Path(filename).name}:{line})".replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """Approximate collapsed stacks from cProfile's caller/callee graph.
+
+    cProfile keeps per-edge totals rather than full stacks, so each
+    function's self time is split across the paths leading to it in
+    proportion to the cumulative time each caller spent in it.
+    """
+    raw = stats.stats
+    callees: Dict[tuple, List[tuple]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+    roots = [func for func, entry in raw.items() if not entry[4] or all(c not in raw for c in entry[4])]
+
+    stacks: Dict[str, int] = {}
+
+    def walk(func: tuple, path: List[str], seen: set, share: float):
+        _, _, self_time, total_time, _ = raw[func]
+        frames = path + [_frame_name(func)]
+        micros = int(self_time * share * 1_000_000)
+        if micros > 0:
+            key = ";".join(frames)
+            stacks[key] = stacks.get(key, 0) + micros
+        if len(frames) >= MAX_STACK_DEPTH:
+            return
+        for callee in callees.get(func, []):
+            if callee in seen:
+                continue
+            callee_total = raw[callee][3]
+            edge_total = raw[callee][4][func][3]
+            if callee_total <= 0 or edge_total <= 0:
+                continue
+            walk(callee, frames, seen | {callee}, share * edge_total / callee_total)
+
+    for root in roots:
+        walk(root, [], {root}, 1.0)
+    return stacks
+
+
+def _top_functions(stats: pstats.Stats) -> List[dict]:
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_N]
+    return [
+        {"function": _frame_name(func), "calls": nc, "self_seconds": round(tt, 6), "cumulative_seconds": round(ct, 6)}
+        for func, (_, nc, tt, ct, _) in entries
+    ]
+
+
+def _top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[dict]:
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return [
+        {"site": str(stat.traceback[0]), "size_kb": round(stat.size_diff / 1024, 1), "count": stat.count_diff}
+        for stat in diff[:TOP_N] if stat.size_diff > 0
+    ]
+
+
+def _write(directory: Path, profile: NodeProfile, summary: dict):
+    directory.mkdir(parents=True, exist_ok=True)
+    stats = profile.stats()
+    if stats is not None:
+        stats.dump_stats(str(directory / f"{profile.label}.prof"))
+        stacks = collapsed_stacks(stats)
+        with open(directory / f"{profile.label}.collapsed", "w") as f:
+            for stack, micros in sorted(stacks.items()):
+                f.write(f"{stack} {micros}\n")
+        summary["top_functions"] = _top_functions(stats)
+    with _write_lock:
+        index_file = directory / "profile.json"
+        index = json.loads(index_file.read_text()) if index_file.exists() else {}
+        index[profile.label] = summary
+        index_file.write_text(json.dumps(index, indent=2))
+
+
+def profile_node(label: str, fn: Callable, *args, **kwargs):
+    """Run a node under cProfile and tracemalloc and write its profile for the current investigation."""
+    profile = NodeProfile(label)
+    token = _active.set(profile)
+    _start_tracemalloc()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    wall_started = time.perf_counter()
+    try:
+        return profile.run_worker(fn, *args, **kwargs)
+    finally:
+        wall = time.perf_counter() - wall_started
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        _stop_tracemalloc()
+        _active.reset(token)
+        summary = {
+            "wall_seconds": round(wall, 6),
+            # the node's own thread plus threads it handed work to via in_worker
+            "cpu_seconds": round(profile.cpu_seconds, 6),
+            "peak_traced_kb": round(peak / 1024, 1),
+            "top_allocations": _top_allocations(before, after),
+        }
+        try:
+            _write(profile_dir(tracing.current_trace_id()), profile, summary)
+        except OSError as e:
+            print(f"   ⚠ Could not write profile for {label}: {e}")
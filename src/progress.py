@@ -0,0 +1,68 @@
+"""Live node progress events for a running investigation.
+
+``graph._instrument`` emits a ``started`` event when a node begins and a
+``finished`` or ``failed`` event when it returns. Whoever starts an
+investigation can ``listen`` for them (the service records them per report
+ID, the dashboard polls those). The listener lives in a context variable,
+so it follows the investigation into LangGraph's worker threads the same
+way the trace and budget do. A ``Relay`` fans one run's events out to
+several listeners, e.g. the callers of coalesced duplicate incidents.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+_listener: ContextVar[Optional[Callable[[dict], None]]] = ContextVar("progress_listener", default=None)
+
+
+@contextmanager
+def listen(callback: Callable[[dict], None]):
+    """Send this context's node events to ``callback`` until the block exits."""
+    token = _listener.set(callback)
+    try:
+        yield
+    finally:
+        _listener.reset(token)
+
+
+def current() -> Optional[Callable[[dict], None]]:
+    """This context's listener, if any."""
+    return _listener.get()
+
+
+def _deliver(callback: Callable[[dict], None], event: dict):
+    try:
+        callback(event)
+    except Exception as e:
+        print(f"[progress] Listener error: {e}")
+
+
+def emit(node: str, status: str, **attributes):
+    callback = _listener.get()
+    if callback is not None:
+        _deliver(callback, {"node": node, "status": status, "at": time.time(), **attributes})
+
+
+class Relay:
+    """Listener that forwards every event to its listeners; late ones get the past events first."""
+
+    def __init__(self, *listeners: Optional[Callable[[dict], None]]):
+        self.events = []
+        self._listeners = [listener for listener in listeners if listener is not None]
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+            for listener in self._listeners:
+                _deliver(listener, event)
+
+    def add(self, listener: Optional[Callable[[dict], None]]):
+        if listener is None:
+            return
+        with self._lock:
+            for event in self.events:
+                _deliver(listener, event)
+            self._listeners.append(listener)
@@ -0,0 +1,269 @@
+"""Structured report store and report renderers.
+
+Every finished investigation (CLI, service, batch, dashboard) is stored as
+its validated ``IncidentReport`` JSON plus timings and metadata in a local
+SQLite file (REPORT_DB, default ``reports/reports.sqlite``). The columns
+used for filtering (service, confidence, creation time) are indexed, so
+listing, counting and paging stay fast with tens of thousands of reports;
+the full report is only loaded and rendered (``format_text`` /
+``format_markdown``) when one is opened.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from src.models import IncidentReport
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_REPORT_DB = BASE_DIR / "reports" / "reports.sqlite"
+
+SUMMARY_COLUMNS = ("report_id", "investigation_id", "service", "alert_time", "created_at", "confidence",
+                   "root_cause", "source", "duration_seconds", "total_tokens")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    investigation_id TEXT,
+    service TEXT NOT NULL,
+    alert_time TEXT,
+    created_at REAL NOT NULL,
+    confidence INTEGER NOT NULL,
+    root_cause TEXT NOT NULL,
+    source TEXT NOT NULL,
+    duration_seconds REAL,
+    total_tokens INTEGER,
+    report_json TEXT NOT NULL,
+    metadata_json TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS reports_created ON reports (created_at);
+CREATE INDEX IF NOT EXISTS reports_service_created ON reports (service, created_at);
+CREATE INDEX IF NOT EXISTS reports_confidence_created ON reports (confidence, created_at);
+"""
+
+
+def report_db_path() -> Path:
+    return Path(os.getenv("REPORT_DB", str(DEFAULT_REPORT_DB)))
+
+
+class ReportStore:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or report_db_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # WAL lets the dashboard read while the CLI, service or a batch writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, report: dict, report_id: Optional[str] = None, investigation_id: Optional[str] = None,
+            source: str = "cli", duration_seconds: Optional[float] = None, metadata: Optional[dict] = None) -> str:
+        """Validate and store a finished report; returns its report ID."""
+        model = IncidentReport.model_validate(report)
+        report_id = report_id or uuid.uuid4().hex[:12]
+        row = (
+            report_id,
+            investigation_id,
+            str(model.incident_summary.get("service", "unknown")),
+            str(model.incident_summary.get("start_time", "")),
+            time.time(),
+            model.root_cause.confidence,
+            model.root_cause.explanation,
+            source,
+            round(duration_seconds, 3) if duration_seconds is not None else None,
+            model.token_usage.total_tokens if model.token_usage else None,
+            model.model_dump_json(),
+            json.dumps(metadata or {}, default=str),
+        )
+        with self._lock, self._conn:
+            self._conn.execute(f"INSERT OR REPLACE INTO reports VALUES ({', '.join('?' * len(row))})", row)
+        return report_id
+
+    @staticmethod
+    def _where(service: Optional[str], min_confidence: Optional[int], max_confidence: Optional[int],
+               since: Optional[float], until: Optional[float], search: Optional[str]) -> tuple:
+        clauses, params = [], []
+        for clause, value in (("service = ?", service), ("confidence >= ?", min_confidence),
+                              ("confidence <= ?", max_confidence), ("created_at >= ?", since),
+                              ("created_at < ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if search:
+            # Match the text literally: % and _ in the search are not wildcards
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("root_cause LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, service: Optional[str] = None, min_confidence: Optional[int] = None,
+              max_confidence: Optional[int] = None, since: Optional[float] = None, until: Optional[float] = None,
+              search: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[dict]:
+        """Report summaries (no report body) matching the filters, newest first."""
+        where, params = self._where(service, min_confidence, max_confidence, since, until, search)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM reports{where} "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, service: Optional[str] = None, min_confidence: Optional[int] = None,
+              max_confidence: Optional[int] = None, since: Optional[float] = None, until: Optional[float] = None,
+              search: Optional[str] = None) -> int:
+        where, params = self._where(service, min_confidence, max_confidence, since, until, search)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM reports{where}", params).fetchone()[0]
+
+    def services(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT service FROM reports ORDER BY service")]
+
+    def get(self, report_id: str) -> Optional[dict]:
+        """Summary fields plus the full ``report`` and ``metadata`` of one stored report."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+        if row is None:
+            return None
+        record = {column: row[column] for column in SUMMARY_COLUMNS}
+        record["report"] = json.loads(row["report_json"])
+        record["metadata"] = json.loads(row["metadata_json"])
+        return record
+
+    def latest(self) -> Optional[dict]:
+        summaries = self.query(limit=1)
+        return self.get(summaries[0]["report_id"]) if summaries else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_store: Optional[ReportStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_report_store() -> ReportStore:
+    """Process-wide report store, opened on first use."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = ReportStore()
+        return _shared_store
+
+
+def save(report: dict, **kwargs) -> Optional[str]:
+    """Store a report in the shared store; a storage failure is reported, never raised."""
+    try:
+        return get_report_store().add(report, **kwargs)
+    except Exception as e:
+        print(f"   ⚠ Could not store report: {e}")
+        return None
+
+
+def format_text(report: dict) -> str:
+    """Plain-text report, as printed by ``main.py`` and saved to ``reports/*.txt``."""
+    output = ["=" * 80, "INCIDENT RESPONSE REPORT", "=" * 80]
+
+    summary = report["incident_summary"]
+    output.append("\n### 1. Incident Summary")
+    output.append(f"•  Service: {summary['service']}")
+    output.append(f"•  Impact: {summary['impact']}")
+    output.append(f"•  Start Time: {summary['start_time']}")
+    output.append(f"•  Symptoms: {summary['symptoms']}")
+
+    output.append("\n### 2. Investigation Plan")
+    for i, step in enumerate(report["investigation_plan"], 1):
+        output.append(f"{i}. {step}")
+
+    output.append("\n### 3. Findings (Evidence)")
+    output.append("\n#### Logs Evidence")
+    for finding in report["logs_evidence"]["findings"]:
+        output.append(f"  - {finding}")
+
+    output.append("\n#### Telemetry Evidence")
+    for finding in report["telemetry_evidence"]["findings"]:
+        output.append(f"  - {finding}")
+
+    output.append("\n#### Deployment Evidence")
+    for finding in report["deployment_evidence"]["findings"]:
+        output.append(f"  - {finding}")
+
+    output.append("\n### 4. Root Cause Hypothesis")
+    output.append(f"•  Explanation: {report['root_cause']['explanation']}")
+    output.append(f"•  Confidence: {report['root_cause']['confidence']}%")
+
+    output.append("\n### 5. Supporting Evidence")
+    for evidence in report['root_cause']['supporting_evidence']:
+        output.append(f"  - {evidence}")
+
+    output.append("\n### 6. Recommended Actions (Ranked)")
+    for action in report["recommended_actions"]:
+        output.append(f"{action['rank']}. {action['action']}")
+        output.append(f"   Risk: {action['risk_level']} | Impact: {action['expected_impact']}")
+
+    output.append("\n### 7. Risk Notes")
+    for note in report["risk_notes"]:
+        output.append(f"•  {note}")
+
+    output.append("\n### 8. Next Steps / Follow-up")
+    for step in report["next_steps"]:
+        output.append(f"•  {step}")
+
+    usage = report.get("token_usage")
+    if usage:
+        output.append("\n### 9. LLM Usage")
+        output.append(f"•  Tokens: {usage['total_tokens']} ({usage['input_tokens']} in / {usage['output_tokens']} out) "
+                      f"over {usage['llm_calls']} calls")
+        for agent, agent_usage in usage["by_agent"].items():
+            output.append(f"  - {agent}: {agent_usage['input_tokens'] + agent_usage['output_tokens']} tokens, "
+                          f"{agent_usage['calls']} calls")
+
+    output.append("\n" + "=" * 80)
+    return "\n".join(output)
+
+
+def format_markdown(report: dict) -> str:
+    """Markdown rendering of a report, for the dashboard."""
+    summary = report["incident_summary"]
+    root_cause = report["root_cause"]
+    output = [
+        f"## 🚨 {summary['service']}: {summary['symptoms']}",
+        f"**Start time:** {summary['start_time']} | **Impact:** {summary['impact']}",
+        "\n### 🧠 Root Cause",
+        f"{root_cause['explanation']} (**{root_cause['confidence']}%** confidence)",
+    ]
+    output.extend(f"- {evidence}" for evidence in root_cause["supporting_evidence"])
+
+    output.append("\n### 📋 Investigation Plan")
+    output.extend(f"{i}. {step}" for i, step in enumerate(report["investigation_plan"], 1))
+
+    for title, key in (("📜 Logs", "logs_evidence"), ("📊 Telemetry", "telemetry_evidence"),
+                       ("🚀 Deployments", "deployment_evidence")):
+        output.append(f"\n### {title}")
+        output.extend(f"- {finding}" for finding in report[key]["findings"] or ["_No findings_"])
+
+    output.append("\n### 🛠️ Recommended Actions")
+    output.append("| # | Action | Risk | Expected Impact |")
+    output.append("|---|--------|------|-----------------|")
+    for action in report["recommended_actions"]:
+        cells = [str(action[key]).replace("|", "\\|") for key in ("rank", "action", "risk_level", "expected_impact")]
+        output.append(f"| {' | '.join(cells)} |")
+
+    if report["risk_notes"]:
+        output.append("\n### ⚠️ Risk Notes")
+        output.extend(f"- {note}" for note in report["risk_notes"])
+    if report["next_steps"]:
+        output.append("\n### ➡️ Next Steps")
+        output.extend(f"- {step}" for step in report["next_steps"])
+
+    usage = report.get("token_usage")
+    if usage:
+        output.append(f"\n*LLM usage: {usage['total_tokens']} tokens over {usage['llm_calls']} calls*")
+    return "\n".join(output)
@@ -0,0 +1,231 @@
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Log message patterns per failure class
+LOG_PATTERNS = {
+    "pool_exhaustion": re.compile(
+        r"pool (exhausted|running low)|no available connections|connection timeout|timeout expired", re.I
+    ),
+    "memory_exhaustion": re.compile(r"outofmemory|gc overhead|heap space|memory limit", re.I),
+}
+
+# Config changes that shrink a limit, e.g. "pool size from 20 to 10" / "timeout from 60s to 30s"
+_REDUCTION = re.compile(r"(?P<what>[\w\s]*?(pool|timeout|heap|memory|cache|limit)[\w\s]*?)\s+from\s+(?P<old>\d+)\w*\s+to\s+(?P<new>\d+)", re.I)
+DEPLOY_KEYWORDS = {
+    "pool_exhaustion": ("pool", "connection", "timeout"),
+    "memory_exhaustion": ("heap", "memory", "cache", "gc"),
+}
+
+ROOT_CAUSES = {
+    "pool_exhaustion": "Database connection pool exhaustion",
+    "memory_exhaustion": "Memory exhaustion",
+}
+
+MITIGATIONS = {
+    "pool_exhaustion": [
+        ("Restore the previous connection pool size and timeout settings", "low", "Relieves pool saturation and request queueing"),
+        ("Alert on pool utilization above 80% and on waiting connection requests", "low", "Catches saturation before errors cascade"),
+        ("Load-test connection pool changes before rollout", "low", "Prevents recurrence from config changes"),
+    ],
+    "memory_exhaustion": [
+        ("Restart affected instances and raise memory limits temporarily", "medium", "Stops OOM crashes while the fix rolls out"),
+        ("Capture a heap dump and fix the allocation regression", "low", "Removes the underlying leak"),
+        ("Alert on heap usage and GC pause time trends", "low", "Detects leaks before they exhaust memory"),
+    ],
+}
+
+FAST_PATH_RISK_NOTES = [
+    "Diagnosis produced by deterministic rules without LLM reasoning; escalate if symptoms persist after mitigation",
+    "Rollback may affect in-flight transactions",
+]
+FAST_PATH_NEXT_STEPS = ["Confirm error rate and latency recover after mitigation", "Schedule post-incident review"]
+
+# Score per agreeing evidence source, plus a bonus for a change landing just before the errors
+SOURCE_WEIGHT = 30
+PROXIMITY_BONUS = 10
+PROXIMITY_MINUTES = 30
+
+
+def _parse_ts(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def alert_window(alert_time) -> Optional[Tuple[datetime, datetime]]:
+    """Span around the alert that evidence must fall in (FAST_PATH_WINDOW_MINUTES either side)."""
+    alert = _parse_ts(alert_time)
+    if alert is None:
+        return None
+    minutes = float(os.getenv("FAST_PATH_WINDOW_MINUTES", str(PROXIMITY_MINUTES)))
+    return alert - timedelta(minutes=minutes), alert + timedelta(minutes=minutes)
+
+
+def detect_log_signals(logs: List[dict], service: str,
+                       window: Optional[Tuple[datetime, datetime]] = None) -> Dict[str, dict]:
+    """Count log lines for ``service`` matching each failure class, within ``window`` when given."""
+    signals = {}
+    for log in logs:
+        if log.get("service") != service or log.get("level") not in ("WARN", "ERROR", "CRITICAL"):
+            continue
+        text = " ".join(str(log.get(k, "")) for k in ("message", "error", "stack_trace"))
+        for kind, pattern in LOG_PATTERNS.items():
+            if pattern.search(text):
+                if window is not None:
+                    logged_at = _parse_ts(log.get("timestamp"))
+                    if logged_at is None or not window[0] <= logged_at <= window[1]:
+                        continue
+                signal = signals.setdefault(kind, {"count": 0, "first_at": log.get("timestamp"), "examples": []})
+                signal["count"] += 1
+                if len(signal["examples"]) < 3:
+                    signal["examples"].append(f"{log.get('timestamp')} {log.get('level')}: {log.get('message')}")
+    return signals
+
+
+def _covers(time_range, at: datetime) -> bool:
+    """Whether a metrics document's "<start> to <end>" range includes ``at`` (True when unknown)."""
+    bounds = [_parse_ts(part.strip()) for part in str(time_range or "").split(" to ")]
+    if len(bounds) != 2 or None in bounds:
+        return True
+    return bounds[0] <= at <= bounds[1]
+
+
+def detect_metric_signals(metrics: dict, service: str, at: Optional[datetime] = None) -> Dict[str, dict]:
+    """Threshold checks over the metrics document for ``service``, if it covers ``at``."""
+    if not isinstance(metrics, dict) or metrics.get("service") not in (None, service):
+        return {}
+    if at is not None and not _covers(metrics.get("time_range"), at):
+        return {}
+    data = metrics.get("metrics", {})
+    signals = {}
+
+    db = data.get("database_connections", {})
+    if db.get("pool_size") and db.get("active", 0) >= db["pool_size"] and (db.get("waiting", 0) or db.get("timeout_count", 0)):
+        signals["pool_exhaustion"] = {
+            "detail": f"Database pool saturated: {db.get('active')}/{db.get('pool_size')} active, "
+                      f"{db.get('waiting', 0)} waiting, {db.get('timeout_count', 0)} timeouts"
+        }
+
+    memory = data.get("memory_usage", {})
+    if memory.get("max", 0) >= 90 or memory.get("heap_usage_percent", 0) >= 90:
+        signals["memory_exhaustion"] = {
+            "detail": f"Memory peaked at {memory.get('max', 0)}% (heap {memory.get('heap_usage_percent', 'n/a')}%, "
+                      f"GC pause {memory.get('gc_pause_ms', 'n/a')}ms)"
+        }
+    return signals
+
+
+def detect_deployment_signals(deployments: List[dict], service: str, before: Optional[str]) -> Dict[str, dict]:
+    """Find the latest non-rollback deployment of ``service`` before ``before`` that shrank a relevant limit."""
+    cutoff = _parse_ts(before)
+    candidates = []
+    for deploy in deployments if isinstance(deployments, list) else []:
+        deployed_at = _parse_ts(deploy.get("deployed_at"))
+        if deploy.get("service") != service or deployed_at is None:
+            continue
+        if cutoff is not None and deployed_at > cutoff:
+            continue
+        candidates.append((deployed_at, deploy))
+
+    signals = {}
+    for deployed_at, deploy in sorted(candidates, key=lambda c: c[0], reverse=True):
+        for change in deploy.get("changes", []):
+            if change.upper().startswith("ROLLBACK"):
+                continue
+            match = _REDUCTION.search(change)
+            if not match or int(match.group("new")) >= int(match.group("old")):
+                continue
+            for kind, keywords in DEPLOY_KEYWORDS.items():
+                if kind in signals or not any(k in change.lower() for k in keywords):
+                    continue
+                minutes = (cutoff - deployed_at).total_seconds() / 60 if cutoff else None
+                signals[kind] = {
+                    "deployment": deploy,
+                    "change": change,
+                    "minutes_before": minutes,
+                }
+    return signals
+
+
+def evaluate(incident: dict, logs: List[dict], metrics: dict, deployments: List[dict]) -> Optional[dict]:
+    """Return the winning deterministic diagnosis, or None when the evidence is ambiguous.
+
+    A failure class scores ``SOURCE_WEIGHT`` for each of logs, metrics and
+    deployments that independently point at it, plus ``PROXIMITY_BONUS`` when
+    the offending change landed within ``PROXIMITY_MINUTES`` of the first
+    error. Only log lines within ``alert_window`` of the alert count, and
+    only metrics whose time range covers it, so stale data never matches.
+    The best class must clear ``FAST_PATH_CONFIDENCE`` and be the only one
+    that does.
+    """
+    service = incident.get("service")
+    threshold = int(os.getenv("FAST_PATH_CONFIDENCE", "85"))
+    window = alert_window(incident.get("alert_time"))
+    if window is None:
+        return None
+
+    log_signals = detect_log_signals(logs if isinstance(logs, list) else [], service, window)
+    metric_signals = detect_metric_signals(metrics, service, _parse_ts(incident.get("alert_time")))
+    first_error = min((s["first_at"] for s in log_signals.values() if s.get("first_at")), default=None)
+    deploy_signals = detect_deployment_signals(deployments, service, first_error or str(incident.get("alert_time", "")))
+
+    scored = []
+    for kind in ROOT_CAUSES:
+        score = SOURCE_WEIGHT * sum(kind in s for s in (log_signals, metric_signals, deploy_signals))
+        minutes = deploy_signals.get(kind, {}).get("minutes_before")
+        if minutes is not None and 0 <= minutes <= PROXIMITY_MINUTES:
+            score += PROXIMITY_BONUS
+        scored.append((score, kind))
+    scored.sort(reverse=True)
+
+    (best_score, kind), runner_up = scored[0], scored[1][0] if len(scored) > 1 else 0
+    if best_score < threshold or runner_up >= threshold:
+        return None
+
+    logs_sig, metric_sig, deploy_sig = log_signals[kind], metric_signals[kind], deploy_signals[kind]
+    deploy = deploy_sig["deployment"]
+    minutes = deploy_sig["minutes_before"]
+    timing = f", {minutes:.0f} minutes before the first error" if minutes is not None else ""
+
+    logs_findings = [f"{logs_sig['count']} {kind.replace('_', ' ')} log events starting {logs_sig['first_at']}"] + logs_sig["examples"]
+    telemetry_findings = [metric_sig["detail"]]
+    deployment_findings = [
+        f"HIGH RISK: {deploy.get('deployment_id')} ({deploy.get('version')}) at {deploy.get('deployed_at')}: {deploy_sig['change']}{timing}"
+    ]
+
+    actions = []
+    if deploy.get("rollback_available"):
+        actions.append({
+            "rank": 1,
+            "action": f"Roll back {deploy.get('deployment_id')} ({deploy.get('version')})",
+            "risk_level": "medium",
+            "expected_impact": f"Reverts '{deploy_sig['change']}'",
+        })
+    else:
+        actions.append({
+            "rank": 1,
+            "action": f"Hotfix to revert '{deploy_sig['change']}' (rollback unavailable for {deploy.get('deployment_id')})",
+            "risk_level": "medium",
+            "expected_impact": "Restores the previous limit",
+        })
+    for action, risk, impact in MITIGATIONS[kind]:
+        actions.append({"rank": len(actions) + 1, "action": action, "risk_level": risk, "expected_impact": impact})
+
+    return {
+        "rule": kind,
+        "confidence": min(100, best_score),
+        "root_cause": f"{ROOT_CAUSES[kind]} caused by {deploy.get('deployment_id')} "
+                      f"('{deploy_sig['change']}'){timing}",
+        "causal_chain": f"{deploy.get('deployment_id')} config change → {metric_sig['detail']} → {logs_sig['count']} error events",
+        "logs_findings": logs_findings,
+        "telemetry_findings": telemetry_findings,
+        "deployment_findings": deployment_findings,
+        "supporting_evidence": [logs_findings[0], telemetry_findings[0], deployment_findings[0]],
+        "actions": actions,
+    }
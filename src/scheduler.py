@@ -0,0 +1,121 @@
+import asyncio
+import os
+import re
+from collections import OrderedDict, deque
+from typing import Any, List, Optional, Tuple
+
+from src.models import IncidentInput
+
+P0, P1, P2, P3 = 0, 1, 2, 3
+PRIORITY_NAMES = {P0: "P0", P1: "P1", P2: "P2", P3: "P3"}
+
+# Symptom keywords by severity, checked most severe first
+SYMPTOM_PATTERNS = [
+    (P0, re.compile(r"\b(outage|down|unavailable|data loss|corrupt\w*|5\d\d|crash\w*|exhaust\w*)\b", re.I)),
+    (P1, re.compile(r"\b(error rate|errors?|timeouts?|fail\w*|oom|out of memory)\b", re.I)),
+    (P2, re.compile(r"\b(latency|slow\w*|degrad\w*|saturat\w*|spike)\b", re.I)),
+]
+
+
+def critical_services() -> set:
+    return {s.strip() for s in os.getenv("CRITICAL_SERVICES", "payment-api,auth-service").split(",") if s.strip()}
+
+
+def classify_priority(incident: IncidentInput) -> int:
+    """Derive a priority class from the symptoms, bumped one class for critical services."""
+    priority = P3
+    for level, pattern in SYMPTOM_PATTERNS:
+        if pattern.search(incident.symptoms or ""):
+            priority = level
+            break
+    if incident.service in critical_services():
+        priority = max(P0, priority - 1)
+    return priority
+
+
+def default_concurrency() -> int:
+    """Concurrent investigations the LLM provider's request allowance can sustain."""
+    explicit = os.getenv("MAX_CONCURRENT_INVESTIGATIONS")
+    if explicit:
+        return max(1, int(explicit))
+    llm_slots = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "4"))
+    calls_in_parallel = os.getenv("LLM_CALLS_PER_INVESTIGATION")
+    if calls_in_parallel is None:
+        # logs, metrics and deployment agents call the LLM concurrently for every implicated service
+        from src.graph import EVIDENCE_SOURCES
+        services = int(os.getenv("MAX_IMPLICATED_SERVICES", "5"))
+        calls_in_parallel = services * len(EVIDENCE_SOURCES)
+    return max(1, llm_slots // max(1, int(calls_in_parallel)))
+
+
+class InvestigationScheduler:
+    """Bounded priority queue with per-service round-robin inside each class.
+
+    ``admit`` never blocks: when the queue is full, an incoming item that
+    outranks the lowest-priority queued item displaces it, otherwise the
+    incoming item itself is turned away. Displaced/turned-away items are
+    returned to the caller, which decides between rejecting them and running
+    a degraded deterministic-only investigation.
+    """
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max_pending
+        # priority -> service -> deque of items; OrderedDict rotation gives per-service fairness
+        self._classes = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._size = 0
+        self._available = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def depth_by_priority(self) -> dict:
+        return {
+            PRIORITY_NAMES[p]: sum(len(q) for q in services.values())
+            for p, services in self._classes.items()
+        }
+
+    async def admit(self, item: Any, priority: int, service: str) -> Tuple[bool, Optional[Any]]:
+        """Try to queue ``item``. Returns (admitted, overflow_item_or_None)."""
+        async with self._available:
+            overflow = None
+            if self._size >= self.max_pending:
+                worst = self._lowest_priority()
+                if worst is None or worst <= priority:
+                    return False, item
+                overflow = self._pop_newest(worst)
+            self._classes[priority].setdefault(service, deque()).append(item)
+            self._size += 1
+            self._available.notify()
+            return True, overflow
+
+    async def get(self) -> Any:
+        """Wait for and return the next item: highest class first, services in turn."""
+        async with self._available:
+            while self._size == 0:
+                await self._available.wait()
+            for priority in sorted(self._classes):
+                services = self._classes[priority]
+                if not services:
+                    continue
+                service, queue = next(iter(services.items()))
+                item = queue.popleft()
+                del services[service]
+                if queue:
+                    # Move the service to the back so others get a turn
+                    services[service] = queue
+                self._size -= 1
+                return item
+
+    def _lowest_priority(self) -> Optional[int]:
+        populated: List[int] = [p for p, services in self._classes.items() if services]
+        return max(populated) if populated else None
+
+    def _pop_newest(self, priority: int) -> Any:
+        services = self._classes[priority]
+        # Evict from the service with the longest backlog to keep things fair
+        service = max(services, key=lambda s: len(services[s]))
+        item = services[service].pop()
+        if not services[service]:
+            del services[service]
+        self._size -= 1
+        return item
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from src import metrics, progress, reports
+from src.commander import IncidentCommander, investigation_id_for
+from src.models import IncidentInput
+from src.scheduler import InvestigationScheduler, PRIORITY_NAMES, classify_priority, default_concurrency
+
+FINISHED_STATUSES = ("completed", "failed", "rejected")
+
+
+class QueueFullError(Exception):
+    """Raised when the investigation queue is at capacity."""
+
+
+class InvestigationService:
+    """Keeps one warm IncidentCommander and runs queued incidents on a bounded async pool.
+
+    The compiled graph, LLM client and telemetry indexes are built once at
+    startup; each submitted incident gets a report ID immediately and is
+    picked up by one of ``workers`` coroutines, which run the blocking graph
+    in a thread so the HTTP front end stays responsive. Incidents are ordered
+    by ``InvestigationScheduler``; on overload the ``overload_policy``
+    ("degrade" or "reject") decides what happens to the displaced incident.
+    Degraded deterministic-only runs get their own ``degraded_workers`` slots
+    (counted in ``running``); once those are busy too, overflow is rejected.
+    Each result collects its run's node progress events (``src.progress``)
+    as they happen, so pollers can follow an investigation live.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = 100, max_results: int = 1000,
+                 overload_policy: Optional[str] = None, degraded_workers: Optional[int] = None):
+        self.workers = workers or default_concurrency()
+        self.degraded_workers = degraded_workers or int(os.getenv("DEGRADED_WORKERS", "2"))
+        self.queue_size = queue_size
+        self.max_results = max_results
+        self.overload_policy = (overload_policy or os.getenv("OVERLOAD_POLICY", "degrade")).lower()
+        self.commander = IncidentCommander()
+        self.results: "OrderedDict[str, dict]" = OrderedDict()
+        self.running = 0
+        self.degraded_running = 0
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._scheduler: Optional[InvestigationScheduler] = None
+        self._thread = threading.Thread(target=self._run_loop, name="investigation-pool", daemon=True)
+        self._ready = threading.Event()
+
+    def start(self) -> "InvestigationService":
+        if os.getenv("WATCH_DATA", "").lower() in ("1", "true", "yes"):
+            from src.watcher import get_store
+            get_store()
+        self._thread.start()
+        self._ready.wait()
+        metrics.QUEUE_DEPTH.set_function(lambda: len(self._scheduler))
+        return self
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._scheduler = InvestigationScheduler(max_pending=self.queue_size)
+        for i in range(self.workers):
+            self._loop.create_task(self._worker(i))
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _worker(self, index: int):
+        while True:
+            report_id, incident = await self._scheduler.get()
+            with self._lock:
+                self.running += 1
+            try:
+                await self._run(report_id, incident)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+    async def _run(self, report_id: str, incident: IncidentInput, deterministic: bool = False):
+        with self._lock:
+            if report_id not in self.results:
+                return
+            self.results[report_id].update(status="running", degraded=deterministic, started_at=time.time())
+            priority = self.results[report_id]["priority"]
+        started = time.perf_counter()
+        try:
+            report = await asyncio.to_thread(self._investigate, report_id, incident, deterministic)
+            formatted = self.commander.format_report(report)
+            path = await asyncio.to_thread(self.commander.save_report, formatted, report_id)
+            await asyncio.to_thread(
+                reports.save, report, report_id=report_id, investigation_id=investigation_id_for(incident),
+                source="service", duration_seconds=time.perf_counter() - started,
+                metadata={"priority": priority, "degraded": deterministic, "report_file": str(path)},
+            )
+            update = {"status": "completed", "report": report, "report_file": str(path)}
+        except Exception as e:
+            print(f"[InvestigationService] {report_id} failed: {e}")
+            update = {"status": "failed", "error": str(e)}
+        with self._lock:
+            if report_id in self.results:
+                self.results[report_id].update(update, finished_at=time.time())
+
+    def _investigate(self, report_id: str, incident: IncidentInput, deterministic: bool) -> dict:
+        with progress.listen(lambda event: self._record_event(report_id, event)):
+            return self.commander.investigate(incident, deterministic)
+
+    def _record_event(self, report_id: str, event: dict):
+        with self._lock:
+            if report_id in self.results:
+                self.results[report_id]["events"].append(event)
+
+    async def _enqueue(self, item, priority: int):
+        admitted, overflow = await self._scheduler.admit(item, priority, item[1].service)
+        if overflow is None:
+            return
+        report_id, incident = overflow
+        if self.overload_policy == "degrade" and self._reserve_degraded_slot():
+            print(f"[InvestigationService] Overloaded: {report_id} gets a deterministic-only report")
+            metrics.QUEUE_OVERFLOW.labels(outcome="degraded").inc()
+            self._loop.create_task(self._run_degraded(report_id, incident))
+        elif admitted:
+            metrics.QUEUE_OVERFLOW.labels(outcome="displaced").inc()
+            with self._lock:
+                if report_id in self.results:
+                    self.results[report_id].update(status="rejected", error="Displaced by higher-priority incident")
+        else:
+            metrics.QUEUE_OVERFLOW.labels(outcome="rejected").inc()
+            raise QueueFullError(f"Investigation queue is full ({self.queue_size})")
+
+    def _reserve_degraded_slot(self) -> bool:
+        with self._lock:
+            if self.degraded_running >= self.degraded_workers:
+                return False
+            self.degraded_running += 1
+            self.running += 1
+            return True
+
+    async def _run_degraded(self, report_id: str, incident: IncidentInput):
+        try:
+            await self._run(report_id, incident, deterministic=True)
+        finally:
+            with self._lock:
+                self.degraded_running -= 1
+                self.running -= 1
+
+    def submit(self, incident: IncidentInput) -> str:
+        """Queue an incident and return its report ID."""
+        report_id = uuid.uuid4().hex[:12]
+        priority = classify_priority(incident)
+        with self._lock:
+            if not self._make_room():
+                metrics.QUEUE_OVERFLOW.labels(outcome="rejected").inc()
+                raise QueueFullError(f"Too many unfinished investigations ({self.max_results})")
+            self.results[report_id] = {
+                "report_id": report_id,
+                "status": "queued",
+                "service": incident.service,
+                "priority": PRIORITY_NAMES[priority],
+                "submitted_at": time.time(),
+                "events": [],
+            }
+        future = asyncio.run_coroutine_threadsafe(self._enqueue((report_id, incident), priority), self._loop)
+        try:
+            future.result()
+        except QueueFullError:
+            with self._lock:
+                self.results.pop(report_id, None)
+            raise
+        return report_id
+
+    def _make_room(self) -> bool:
+        """Evict the oldest finished results so one more fits; queued and running ones are kept."""
+        excess = len(self.results) - self.max_results + 1
+        if excess <= 0:
+            return True
+        finished = (rid for rid, result in self.results.items() if result["status"] in FINISHED_STATUSES)
+        for report_id in list(islice(finished, excess)):
+            del self.results[report_id]
+        return len(self.results) < self.max_results
+
+    def get(self, report_id: str) -> Optional[dict]:
+        with self._lock:
+            result = self.results.get(report_id)
+            return {**result, "events": list(result["events"])} if result else None
+
+    def health(self) -> dict:
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started_at, 1), "workers": self.workers}
+
+    def queue_stats(self) -> dict:
+        with self._lock:
+            running, degraded = self.running, self.degraded_running
+        return {
+            "depth": len(self._scheduler),
+            "by_priority": self._scheduler.depth_by_priority(),
+            "running": running,
+            "degraded_running": degraded,
+            "capacity": self.queue_size,
+            "max_concurrent": self.workers,
+            "max_degraded": self.degraded_workers,
+        }
+
+
+def _make_handler(service: InvestigationService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                payload = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            if self.path == "/health":
+                return self._send(200, service.health())
+            if self.path == "/queue":
+                return self._send(200, service.queue_stats())
+            if self.path.startswith("/incidents/"):
+                result = service.get(self.path.rsplit("/", 1)[-1])
+                if result is None:
+                    return self._send(404, {"error": "Unknown report ID"})
+                return self._send(200, result)
+            self._send(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/incidents":
+                return self._send(404, {"error": "Not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                incident = IncidentInput(**json.loads(self.rfile.read(length) or b"{}"))
+            except Exception as e:
+                return self._send(400, {"error": f"Invalid incident: {e}"})
+            try:
+                report_id = service.submit(incident)
+            except QueueFullError as e:
+                return self._send(503, {"error": str(e)})
+            self._send(202, {"report_id": report_id, "status": "queued"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, workers: Optional[int] = None, queue_size: int = 100):
+    """Run the investigation service until interrupted."""
+    service = InvestigationService(workers=workers, queue_size=queue_size).start()
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    print(f"🚨 Incident Commander service listening on http://{host}:{port} ({service.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,220 @@
+import gzip
+import heapq
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from src import tracing
+
+# First line of a JSONL shard may carry {"__shard__": {"min_timestamp", "max_timestamp", "count"}}
+HEADER_KEY = "__shard__"
+
+TimeBound = Union[str, datetime, None]
+
+# (path, mtime_ns, size) -> (min_ts, max_ts) for shards that had to be decoded to learn their range
+_range_cache: Dict[Tuple[str, int, int], Tuple[Optional[str], Optional[str]]] = {}
+
+# Decode pools by worker count, kept for the life of the process
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _open(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _is_jsonl(path: Path) -> bool:
+    name = path.name[:-3] if path.name.endswith(".gz") else path.name
+    return name.endswith(".jsonl")
+
+
+def normalize_ts(value: TimeBound) -> Optional[str]:
+    """Render a bound in the logs' ISO-8601 UTC form so it compares as a string.
+
+    Strings are parsed too, so offsets and fractional seconds don't break the
+    comparison; naive values are taken as UTC.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return str(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def read_shard_header(path: Union[str, Path]) -> Optional[dict]:
+    """Return a shard's min/max timestamp header without decoding the body."""
+    path = Path(path)
+    if _is_jsonl(path):
+        try:
+            with _open(path) as f:
+                first = f.readline()
+            header = json.loads(first).get(HEADER_KEY) if first.strip() else None
+            if header:
+                return header
+        except (OSError, json.JSONDecodeError, AttributeError):
+            pass
+    st = path.stat()
+    cached = _range_cache.get((str(path), st.st_mtime_ns, st.st_size))
+    if cached:
+        return {"min_timestamp": cached[0], "max_timestamp": cached[1]}
+    return None
+
+
+def _overlaps(header: Optional[dict], start: Optional[str], end: Optional[str]) -> bool:
+    if not header:
+        return True
+    lo, hi = header.get("min_timestamp"), header.get("max_timestamp")
+    if start and hi and hi < start:
+        return False
+    if end and lo and lo > end:
+        return False
+    return True
+
+
+def decode_shard(path: str, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+    """Decode one shard, sorted by timestamp and clipped to [start, end]."""
+    shard = Path(path)
+    with _open(shard) as f:
+        if _is_jsonl(shard):
+            records = []
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if HEADER_KEY not in record:
+                    records.append(record)
+        else:
+            records = json.load(f)
+            if not isinstance(records, list):
+                records = [records]
+
+    records.sort(key=lambda r: r.get("timestamp", ""))
+    return _clip(records, start, end)
+
+
+def _clip(records: List[dict], start: Optional[str], end: Optional[str]) -> List[dict]:
+    if not (start or end):
+        return records
+    return [
+        r for r in records
+        if (not start or r.get("timestamp", "") >= start) and (not end or r.get("timestamp", "") <= end)
+    ]
+
+
+def _decode_with_range(path: str, start: Optional[str], end: Optional[str]):
+    """Pool worker: decode a shard and also report its full timestamp range."""
+    records = decode_shard(path)
+    bounds = (records[0].get("timestamp"), records[-1].get("timestamp")) if records else (None, None)
+    return _clip(records, start, end), bounds
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Shared decode pool, started on first use so queries don't pay for process spawns.
+
+    Workers are spawned rather than forked: a fork of the multithreaded
+    service or dashboard process can inherit a lock held by another thread.
+    """
+    with _pools_lock:
+        if max_workers not in _pools:
+            _pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers,
+                                                      mp_context=multiprocessing.get_context("spawn"))
+        return _pools[max_workers]
+
+
+def _discard_pool(max_workers: int):
+    with _pools_lock:
+        pool = _pools.pop(max_workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def discover_shards(pattern: str, base_dir: Union[str, Path]) -> List[Path]:
+    """Expand a glob (relative to ``base_dir`` unless absolute) into shard paths."""
+    if os.path.isabs(pattern):
+        base, pattern = Path("/"), pattern.lstrip("/")
+    else:
+        base = Path(base_dir)
+    return sorted(p for p in base.glob(pattern) if p.is_file())
+
+
+def iter_shards(
+    shards: List[Path],
+    start: TimeBound = None,
+    end: TimeBound = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[dict]:
+    """Yield records from many shards in timestamp order.
+
+    Shards whose header range misses the window are never opened past their
+    first line. The rest are decoded in parallel on the shared process pool
+    and combined with a k-way merge.
+    """
+    start, end = normalize_ts(start), normalize_ts(end)
+    selected = [s for s in shards if _overlaps(read_shard_header(s), start, end)]
+    if not selected:
+        return iter(())
+
+    if max_workers is None:
+        max_workers = int(os.getenv("SHARD_WORKERS", "0")) or os.cpu_count() or 1
+
+    results = None
+    if max_workers > 1 and len(selected) > 1:
+        try:
+            results = list(_get_pool(max_workers).map(_decode_with_range, [str(s) for s in selected],
+                                                      [start] * len(selected), [end] * len(selected)))
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool next time and decode this query inline
+            _discard_pool(max_workers)
+    if results is None:
+        results = [_decode_with_range(str(s), start, end) for s in selected]
+
+    runs = []
+    for shard, (records, bounds) in zip(selected, results):
+        st = shard.stat()
+        _range_cache[(str(shard), st.st_mtime_ns, st.st_size)] = bounds
+        runs.append(records)
+    return heapq.merge(*runs, key=lambda r: r.get("timestamp", ""))
+
+
+def load_shards(
+    pattern: str,
+    base_dir: Union[str, Path],
+    start: TimeBound = None,
+    end: TimeBound = None,
+    max_workers: Optional[int] = None,
+) -> List[dict]:
+    """Load all records matching ``pattern`` within the optional time window."""
+    with tracing.span("load:shards", kind="data", pattern=pattern) as span:
+        records = list(iter_shards(discover_shards(pattern, base_dir), start, end, max_workers))
+        span.set(records=len(records))
+        return records
+
+
+def write_shard(path: Union[str, Path], records: List[dict]) -> dict:
+    """Write records as a JSONL shard (gzip when the name ends in .gz) led by its range header."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    timestamps = [r.get("timestamp") for r in records if r.get("timestamp")]
+    header = {
+        "min_timestamp": min(timestamps, default=None),
+        "max_timestamp": max(timestamps, default=None),
+        "count": len(records),
+    }
+    opener = gzip.open(path, "wt", encoding="utf-8") if path.suffix == ".gz" else open(path, "w", encoding="utf-8")
+    with opener as f:
+        f.write(json.dumps({HEADER_KEY: header}) + "\n")
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return header
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_INDEX_PATH = BASE_DIR / "reports" / "similarity_index.jsonl"
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_VARIABLE = re.compile(r"\b(0x[0-9a-f]+|[0-9a-f]{8,}|\d+(\.\d+)?(ms|s|%)?)\b", re.I)
+_WORD = re.compile(r"[a-z][a-z0-9_/-]+")
+_CONFIG_CHANGE = re.compile(r"([a-z][a-z\s]*?)\s+from\s+\S+\s+to\s+\S+", re.I)
+
+RECALL_RISK_NOTES = [
+    "Diagnosis reused from a highly similar past investigation without new LLM reasoning; verify it matches current symptoms",
+]
+
+
+def log_template(message: str) -> str:
+    """Mask numbers, ids and durations so repeated messages collapse to one template."""
+    return _VARIABLE.sub("<*>", message.lower()).strip()
+
+
+def incident_features(incident: dict, logs, deployments) -> List[str]:
+    """Feature set used for similarity: service, symptom words, log templates, changed config keys."""
+    service = incident.get("service", "")
+    features = {f"service:{service}"}
+    features.update(f"symptom:{w}" for w in _WORD.findall((incident.get("symptoms") or "").lower()))
+    for log in logs if isinstance(logs, list) else []:
+        if log.get("level") in ("WARN", "ERROR", "CRITICAL"):
+            features.add(f"log:{log.get('service')}:{log_template(str(log.get('message', '')))}")
+    for deploy in deployments if isinstance(deployments, list) else []:
+        if deploy.get("service") != service:
+            continue
+        for change in deploy.get("changes", []):
+            match = _CONFIG_CHANGE.search(change)
+            if match:
+                features.add(f"config:{match.group(1).strip().lower()}")
+    return sorted(features)
+
+
+def _base_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+def minhash(features: List[str]) -> List[int]:
+    hashes = [_base_hash(f) for f in features] or [0]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def _bands(signature: List[int]) -> List[str]:
+    return [f"{i}:{hash(tuple(signature[i * ROWS:(i + 1) * ROWS]))}" for i in range(BANDS)]
+
+
+class SimilarityIndex:
+    """MinHash/LSH index over past investigations, persisted as JSONL next to the reports.
+
+    Lookups hash the query's features once and only compare against entries
+    that share an LSH band, so they stay sub-millisecond as the history grows.
+    Candidates are ranked by exact Jaccard similarity of the feature sets.
+    Each ``add`` appends one line; a re-added investigation supersedes its
+    earlier line, and superseded lines are compacted away on load.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("SIMILARITY_INDEX", str(DEFAULT_INDEX_PATH)))
+        self.entries: Dict[str, dict] = {}
+        self._buckets: Dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        lines = 0
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of an interrupted append
+                    self._remove(entry["id"])
+                    self._insert(entry)
+        except OSError as e:
+            print(f"[SimilarityIndex] Could not load {self.path}: {e}")
+            return
+        if lines > len(self.entries):
+            try:
+                self._compact()
+            except OSError as e:
+                print(f"[SimilarityIndex] Could not compact {self.path}: {e}")
+
+    def _insert(self, entry: dict):
+        entry["_features"] = frozenset(entry["features"])
+        self.entries[entry["id"]] = entry
+        for band in _bands(entry["signature"]):
+            self._buckets[band].add(entry["id"])
+
+    def _remove(self, investigation_id: str):
+        old = self.entries.pop(investigation_id, None)
+        if old is not None:
+            for band in _bands(old["signature"]):
+                self._buckets[band].discard(investigation_id)
+
+    @staticmethod
+    def _line(entry: dict) -> str:
+        return json.dumps({k: v for k, v in entry.items() if k != "_features"}) + "\n"
+
+    def _compact(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            f.writelines(self._line(e) for e in self.entries.values())
+        os.replace(tmp, self.path)
+
+    def _append(self, entry: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(self._line(entry))
+
+    def add(self, investigation_id: str, features: List[str], report: dict):
+        """Record a finished investigation's features and conclusions."""
+        entry = {
+            "id": investigation_id,
+            "service": report.get("incident_summary", {}).get("service"),
+            "features": list(features),
+            "signature": minhash(features),
+            "root_cause": report.get("root_cause", {}).get("explanation", ""),
+            "confidence": report.get("root_cause", {}).get("confidence", 0),
+            "supporting_evidence": report.get("root_cause", {}).get("supporting_evidence", []),
+            "actions": report.get("recommended_actions", []),
+            "created_at": time.time(),
+        }
+        with self._lock:
+            self._remove(investigation_id)
+            self._insert(entry)
+            self._append(entry)
+
+    def query(self, features: List[str], k: int = 3, exclude: Optional[str] = None) -> List[dict]:
+        """Nearest past investigations as ``{"similarity", **entry}``, best first."""
+        query_set = frozenset(features)
+        signature = minhash(features)
+        with self._lock:
+            candidates = set()
+            for band in _bands(signature):
+                candidates |= self._buckets.get(band, set())
+            candidates.discard(exclude)
+            scored = []
+            for entry_id in candidates:
+                entry = self.entries[entry_id]
+                union = len(query_set | entry["_features"])
+                similarity = len(query_set & entry["_features"]) / union if union else 0.0
+                scored.append((similarity, entry))
+        scored.sort(key=lambda s: s[0], reverse=True)
+        return [
+            {"similarity": round(sim, 3), **{k_: v for k_, v in e.items() if k_ not in ("_features", "signature")}}
+            for sim, e in scored[:k]
+        ]
+
+
+_shared_index: Optional[SimilarityIndex] = None
+_shared_lock = threading.Lock()
+
+
+def get_index() -> SimilarityIndex:
+    """Process-wide similarity index, loaded on first use."""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = SimilarityIndex()
+        return _shared_index
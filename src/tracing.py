@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_TRACE_FILE = BASE_DIR / "reports" / "traces.jsonl"
+
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass(eq=False)
+class Span:
+    """One timed stage of an investigation: a graph node, an LLM call or a data load."""
+    name: str
+    kind: str
+    trace_id: Optional[str]
+    parent_id: Optional[str]
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start: float = field(default_factory=time.time)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    handle: Any = None  # exporter-specific live span (OpenTelemetry)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "kind": self.kind, "start": self.start, "duration_ms": self.duration_ms,
+            "status": self.status, "error": self.error, "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class MemoryExporter:
+    """Keeps finished spans in a list; for tests, benchmarks and in-process inspection."""
+
+    def __init__(self):
+        self.spans: List[dict] = []
+        self._lock = threading.Lock()
+
+    def start(self, span: Span):
+        pass
+
+    def end(self, span: Span):
+        with self._lock:
+            self.spans.append(span.to_dict())
+
+
+class JsonlExporter:
+    """Appends finished spans to a local JSONL file; no network."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv("TRACE_FILE", str(DEFAULT_TRACE_FILE)))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def start(self, span: Span):
+        pass
+
+    def end(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class OTelExporter:
+    """Mirrors spans into OpenTelemetry, exported over OTLP/HTTP.
+
+    With ``langfuse=True`` the endpoint and credentials come from the
+    LANGFUSE_* settings (Langfuse ingests OTLP at /api/public/otel).
+    """
+
+    def __init__(self, langfuse: bool = False):
+        from opentelemetry import trace as otel_trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        kwargs = {}
+        if langfuse:
+            import base64
+            host = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com").rstrip("/")
+            auth = base64.b64encode(
+                f"{os.getenv('LANGFUSE_PUBLIC_KEY', '')}:{os.getenv('LANGFUSE_SECRET_KEY', '')}".encode()
+            ).decode()
+            kwargs = {"endpoint": f"{host}/api/public/otel/v1/traces", "headers": {"Authorization": f"Basic {auth}"}}
+        provider = TracerProvider(resource=Resource.create({"service.name": "incident-commander"}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(**kwargs)))
+        self._otel = otel_trace
+        self._tracer = provider.get_tracer("incident-commander")
+        self.provider = provider
+
+    def start(self, span: Span):
+        parent = _current_span.get()
+        context = self._otel.set_span_in_context(parent.handle) if parent is not None and parent.handle else None
+        span.handle = self._tracer.start_span(span.name, context=context, start_time=int(span.start * 1e9))
+
+    def end(self, span: Span):
+        handle = span.handle
+        if handle is None:
+            return
+        handle.set_attribute("investigation.id", span.trace_id or "")
+        handle.set_attribute("span.kind", span.kind)
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                handle.set_attribute(key, value)
+        if span.error:
+            from opentelemetry.trace import Status, StatusCode
+            handle.set_status(Status(StatusCode.ERROR, span.error))
+        handle.end(end_time=int((span.start + span.duration_ms / 1000) * 1e9))
+
+
+_exporter = None
+_configured = False
+_config_lock = threading.Lock()
+
+
+def _create_exporter():
+    kind = os.getenv("TRACING_EXPORTER", "none").lower()
+    if kind in ("", "none", "off"):
+        return None
+    if kind == "memory":
+        return MemoryExporter()
+    if kind == "jsonl":
+        return JsonlExporter()
+    if kind in ("otel", "langfuse"):
+        try:
+            return OTelExporter(langfuse=kind == "langfuse")
+        except ImportError:
+            print(f"[tracing] TRACING_EXPORTER={kind} needs the otel extra (pip install -e '.[otel]'); "
+                  f"writing spans to JSONL instead")
+            return JsonlExporter()
+    raise ValueError(f"Unknown TRACING_EXPORTER: {kind}")
+
+
+def get_exporter():
+    """Exporter selected by TRACING_EXPORTER (none, memory, jsonl, otel, langfuse), created on first use."""
+    global _exporter, _configured
+    if not _configured:
+        with _config_lock:
+            if not _configured:
+                _exporter = _create_exporter()
+                _configured = True
+    return _exporter
+
+
+def set_exporter(exporter):
+    """Install an exporter explicitly (None disables tracing)."""
+    global _exporter, _configured
+    with _config_lock:
+        _exporter, _configured = exporter, True
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+@contextmanager
+def span(name: str, kind: str = "stage", **attributes):
+    """Time a block as a child of the current span; yields an object with ``set(**attrs)``."""
+    exporter = get_exporter()
+    if exporter is None:
+        yield _NOOP
+        return
+    parent = _current_span.get()
+    record = Span(name=name, kind=kind, trace_id=_trace_id.get(),
+                  parent_id=parent.span_id if parent else None, attributes=attributes)
+    exporter.start(record)
+    token = _current_span.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record.status, record.error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        _current_span.reset(token)
+        exporter.end(record)
+
+
+@contextmanager
+def trace(investigation_id: str, **attributes):
+    """Root span for one investigation; every span opened inside carries its ID."""
+    token = _trace_id.set(investigation_id)
+    try:
+        with span("investigation", kind="investigation", **attributes) as root:
+            yield root
+    finally:
+        _trace_id.reset(token)
+
+
+def traced(name: str, kind: str = "stage"):
+    """Decorator form of ``span``."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if get_exporter() is None:
+                return fn(*args, **kwargs)
+            with span(name, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summarize(path: str) -> Dict[str, dict]:
+    """Per span name: count, mean, p50, p95 and share of total investigation time."""
+    durations: Dict[str, List[float]] = {}
+    total = 0.0
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            key = f"{record['kind']}:{record['name']}"
+            durations.setdefault(key, []).append(record["duration_ms"])
+            if record["kind"] == "investigation":
+                total += record["duration_ms"]
+    summary = {}
+    for key, values in durations.items():
+        values.sort()
+        summary[key] = {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values), 2),
+            "p50_ms": values[len(values) // 2],
+            "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "share": round(sum(values) / total, 3) if total else None,
+        }
+    return dict(sorted(summary.items(), key=lambda item: item[1]["p95_ms"], reverse=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a JSONL trace file by stage")
+    parser.add_argument("path", nargs="?", default=os.getenv("TRACE_FILE", str(DEFAULT_TRACE_FILE)))
+    args = parser.parse_args()
+    print(f"{'stage':<40} {'count':>6} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'share':>7}")
+    for key, stats in summarize(args.path).items():
+        share = f"{stats['share']:.0%}" if stats["share"] is not None else "-"
+        print(f"{key:<40} {stats['count']:>6} {stats['mean_ms']:>10.1f} {stats['p50_ms']:>10.1f} "
+              f"{stats['p95_ms']:>10.1f} {share:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+DATA_DIR = Path(os.getenv("DATA_DIR", str(Path(__file__).parent.parent / "data")))
+ERROR_LEVELS = ("ERROR", "CRITICAL")
+HEAD_BYTES = 4096
+
+
+class LogTailer:
+    """Follow a log file by byte offset and return only newly appended records.
+
+    JSONL files are tailed line by line: a partial trailing line is buffered
+    until its newline arrives. Rotation (the path now points at a new inode) is
+    handled by draining the old handle, final unterminated line included,
+    before switching. Plain JSON array files cannot be appended to in place,
+    so they are re-parsed when they change and only entries past the previous
+    length are returned.
+
+    When the file was truncated or rewritten instead (a JSONL file that shrank
+    or whose first bytes changed, a JSON array whose earlier entries changed),
+    ``read_new`` returns the whole file and sets ``reset``: the records
+    returned before no longer exist and must be dropped.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.offset = 0
+        self._file = None
+        self._inode = None
+        self._partial = b""
+        self._head = b""
+        self._records: List[dict] = []
+        self._mtime = None
+        self.reset = False
+
+    @property
+    def is_jsonl(self) -> bool:
+        return self.path.suffix == ".jsonl"
+
+    def read_new(self) -> List[dict]:
+        self.reset = False
+        if not self.is_jsonl:
+            return self._read_json_array()
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+
+        records = []
+        if self._file is not None and st.st_ino != self._inode:
+            # Rotated: finish the old file before moving to the new one. It
+            # will not grow any more, so an unterminated last line is final.
+            records.extend(self._parse(self._file.read() + b"\n"))
+            self._close()
+        if self._file is not None and (st.st_size < self.offset or not self._same_head()):
+            # Truncated or rewritten in place: start over from the top
+            self._close()
+            records = []
+            self.reset = True
+        if self._file is None:
+            self._file = open(self.path, "rb")
+            self._inode = st.st_ino
+            self.offset = 0
+
+        self._file.seek(self.offset)
+        chunk = self._file.read()
+        self.offset = self._file.tell()
+        if len(self._head) < HEAD_BYTES:
+            self._head += chunk[:HEAD_BYTES - len(self._head)]
+        records.extend(self._parse(chunk))
+        return records
+
+    def _same_head(self) -> bool:
+        """Whether the bytes already read from the start of the file are unchanged."""
+        self._file.seek(0)
+        return self._file.read(len(self._head)) == self._head
+
+    def _parse(self, chunk: bytes) -> List[dict]:
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        records = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"[LogTailer] Skipping malformed line in {self.path.name}")
+        return records
+
+    def _read_json_array(self) -> List[dict]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if (st.st_mtime_ns, st.st_size) == self._mtime:
+            return []
+        self._mtime = (st.st_mtime_ns, st.st_size)
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            # Writer is mid-flush; pick it up on the next poll
+            self._mtime = None
+            return []
+        if not isinstance(data, list):
+            return []
+        seen = len(self._records)
+        if data[:seen] != self._records:
+            # Rewritten rather than appended to
+            self._records, seen = [], 0
+            self.reset = True
+        new = data[seen:]
+        # Keep the objects handed out before, so they are held only once
+        self._records.extend(new)
+        return new
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._inode = None
+        self._partial = b""
+        self._head = b""
+        self.offset = 0
+
+    def close(self):
+        self._close()
+
+
+class TelemetryStore:
+    """In-memory telemetry with incrementally maintained indexes.
+
+    Logs are appended through a ``LogTailer`` and indexed by service and level;
+    metrics and deployments are small documents reloaded whole when their
+    file changes. Every ``poll`` that finds something new publishes a delta
+    ``{"logs": [...], "reset": bool, "metrics": doc|None, "deployments": list|None}``
+    to the subscribers, so consumers never need to reload the files
+    themselves. ``reset`` means the log file was replaced: the indexes were
+    rebuilt and ``logs`` holds every record, not just the new ones.
+    """
+
+    def __init__(self, data_dir: Union[str, Path] = DATA_DIR, logs_file: Optional[str] = None):
+        self.data_dir = Path(data_dir)
+        if logs_file is None:
+            logs_file = "logs.jsonl" if (self.data_dir / "logs.jsonl").exists() else "logs.json"
+        self._tailer = LogTailer(self.data_dir / logs_file)
+        self._docs = {
+            "metrics": self.data_dir / "metrics.json",
+            "deployments": self.data_dir / "deployments.json",
+        }
+        self._doc_mtimes: Dict[str, tuple] = {}
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[dict], None]] = []
+        self._thread = None
+        self._stop = threading.Event()
+
+        self._clear_logs()
+        self.metrics: Union[dict, None] = None
+        self.deployments: Union[list, None] = None
+        self.version = 0
+
+    def subscribe(self, callback: Callable[[dict], None], replay: bool = False) -> Callable[[], None]:
+        """Register a delta callback; returns a function that unsubscribes it.
+
+        With ``replay`` the callback first gets everything ingested so far as
+        one delta (``logs`` is the store's own list, not a copy), so a late
+        subscriber neither misses nor double-counts data.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            if replay and self.version:
+                callback({"logs": self.logs, "reset": True, "metrics": self.metrics,
+                          "deployments": self.deployments, "version": self.version})
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def poll(self) -> Optional[dict]:
+        """Ingest anything new on disk and publish it. Returns the delta, if any."""
+        new_logs = self._tailer.read_new()
+        reset = self._tailer.reset
+        metrics = self._reload_doc("metrics")
+        deployments = self._reload_doc("deployments")
+        if not new_logs and not reset and metrics is None and deployments is None:
+            return None
+
+        with self._lock:
+            if reset:
+                self._clear_logs()
+            self._index(new_logs)
+            if metrics is not None:
+                self.metrics = metrics
+            if deployments is not None:
+                self.deployments = deployments
+            self.version += 1
+            subscribers = list(self._subscribers)
+
+        delta = {"logs": new_logs, "reset": reset, "metrics": metrics, "deployments": deployments, "version": self.version}
+        for callback in subscribers:
+            try:
+                callback(delta)
+            except Exception as e:
+                print(f"[TelemetryStore] Subscriber error: {e}")
+        return delta
+
+    def _clear_logs(self):
+        # Fresh containers rather than clear(): subscribers may still hold the old list
+        self.logs: List[dict] = []
+        self.by_service: Dict[str, List[int]] = defaultdict(list)
+        self.by_level: Dict[str, List[int]] = defaultdict(list)
+        self.level_counts: Counter = Counter()
+        self.errors_by_service: Counter = Counter()
+        self.latest_timestamp: Optional[str] = None
+
+    def _index(self, records: List[dict]):
+        for record in records:
+            idx = len(self.logs)
+            self.logs.append(record)
+            level = record.get("level", "INFO")
+            service = record.get("service", "unknown")
+            self.by_service[service].append(idx)
+            self.by_level[level].append(idx)
+            self.level_counts[level] += 1
+            if level in ERROR_LEVELS:
+                self.errors_by_service[service] += 1
+            ts = record.get("timestamp")
+            if ts and (self.latest_timestamp is None or ts > self.latest_timestamp):
+                self.latest_timestamp = ts
+
+    def _reload_doc(self, name: str):
+        path = self._docs[name]
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        if self._doc_mtimes.get(name) == key:
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            return None
+        self._doc_mtimes[name] = key
+        return data
+
+    def get_logs(self, service: Optional[str] = None, levels: Optional[List[str]] = None) -> List[dict]:
+        """Return a snapshot of indexed logs, optionally narrowed by service/level."""
+        with self._lock:
+            if service is None and levels is None:
+                return list(self.logs)
+            if levels is None:
+                return [self.logs[i] for i in self.by_service.get(service, [])]
+            idxs = sorted(i for level in levels for i in self.by_level.get(level, []))
+            records = [self.logs[i] for i in idxs]
+            if service is not None:
+                records = [r for r in records if r.get("service") == service]
+            return records
+
+    def start(self, interval: float = 0.5) -> "TelemetryStore":
+        """Poll in a daemon thread so new evidence shows up within ``interval`` seconds."""
+        if self._thread is not None:
+            return self
+        self.poll()
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"[TelemetryStore] Poll error: {e}")
+
+        self._thread = threading.Thread(target=run, name="telemetry-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._thread = None
+        self._tailer.close()
+
+
+_shared_store: Optional[TelemetryStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_store(data_dir: Union[str, Path] = DATA_DIR) -> TelemetryStore:
+    """Process-wide store, started on first use."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            interval = float(os.getenv("WATCH_INTERVAL_SECONDS", "0.5"))
+            _shared_store = TelemetryStore(data_dir).start(interval)
+        return _shared_store
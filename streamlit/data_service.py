@@ -0,0 +1,86 @@
+"""Process-wide dashboard data, refreshed incrementally as the data files change.
+
+One ``DashboardData`` is held in ``st.cache_resource`` and shared by every
+session. It subscribes to the telemetry watcher (``src.watcher``), which
+tails the logs file and reloads metrics/deployments only when they change,
+and keeps on top of it:
+
+* ``log_index``: a ``LogIndex`` snapshot over the watcher's own log list,
+  extended with just the new rows on each delta and rebuilt when the log
+  file was replaced (a ``reset`` delta)
+* ``metrics`` / ``metric_series``: the metrics document and its parsed
+  timelines (``metrics_version`` changes whenever they are reloaded)
+* ``deployments`` / ``latest_deployments``
+* ``kpis``: error and warning counts plus the newest issues, updated per delta
+
+Sessions read these attributes as-is; nothing is copied or re-parsed per
+rerun. Each refresh swaps in new objects, so a rerun holding the previous
+ones keeps a consistent view.
+"""
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from downsample import TimeSeries, load_series
+from log_index import ERROR_LEVELS, WARN_LEVELS, LogIndex
+
+ISSUE_LEVELS = [*ERROR_LEVELS, *WARN_LEVELS]
+RECENT_ISSUES = 5
+LATEST_DEPLOYMENTS = 3
+
+
+class DashboardData:
+    def __init__(self, data_dir: Path, timeline_metrics: List[str]):
+        from src.watcher import get_store
+
+        self.timeline_metrics = timeline_metrics
+        self.log_index = LogIndex([])
+        self.metrics: Optional[dict] = None
+        self.metric_series: Dict[str, TimeSeries] = {}
+        self.metrics_version = 0
+        self.deployments: Optional[list] = None
+        self.latest_deployments: List[dict] = []
+        self.kpis = {"errors": 0, "warnings": 0, "recent_issues": []}
+        self._latest_report = None
+        self._lock = threading.Lock()
+
+        # Shares the watcher with investigations run in this process (WATCH_DATA)
+        self.telemetry = get_store(data_dir)
+        self.telemetry.subscribe(self._apply, replay=True)
+
+    def _apply(self, delta: dict):
+        with self._lock:
+            if delta["logs"] or delta["reset"]:
+                base = None if delta["reset"] else self.log_index
+                index = LogIndex(self.telemetry.logs, base=base)
+                counts = self.telemetry.level_counts
+                self.kpis = {
+                    "errors": sum(counts.get(level, 0) for level in ERROR_LEVELS),
+                    "warnings": sum(counts.get(level, 0) for level in WARN_LEVELS),
+                    "recent_issues": index.query(levels=ISSUE_LEVELS).page(1, RECENT_ISSUES, newest_first=True),
+                }
+                self.log_index = index
+            if delta["metrics"] is not None:
+                self.metric_series = load_series(delta["metrics"], self.timeline_metrics)
+                self.metrics = delta["metrics"]
+                self.metrics_version += 1
+            if delta["deployments"] is not None:
+                deployments = delta["deployments"] if isinstance(delta["deployments"], list) else []
+                self.latest_deployments = sorted(
+                    deployments, key=lambda d: str(d.get("deployed_at", "")), reverse=True
+                )[:LATEST_DEPLOYMENTS]
+                self.deployments = deployments
+
+    def latest_report(self) -> Optional[dict]:
+        """Newest stored report; only reloaded when a newer one has been stored."""
+        from src.reports import get_report_store
+
+        store = get_report_store()
+        newest = store.query(limit=1)
+        if not newest:
+            return None
+        cached = self._latest_report
+        if cached is None or cached["report_id"] != newest[0]["report_id"]:
+            cached = self._latest_report = store.get(newest[0]["report_id"])
+        return cached
+
@@ -0,0 +1,135 @@
+"""Shape-preserving downsampling of metric timelines for the Metrics page.
+
+Timelines are parsed once into sorted numpy arrays (``TimeSeries``) and each
+chart asks for a window at a given resolution, so the browser only ever gets
+about ``width`` points however long the timeline is:
+
+* ``lttb``: Largest-Triangle-Three-Buckets keeps the point of each bucket
+  that forms the largest triangle with its neighbours, preserving the
+  visual shape (spikes included) with one point per bucket
+* ``minmax``: keeps the minimum and maximum of each bucket, so no extreme
+  is ever dropped, at two points per bucket
+
+Zooming into a window re-downsamples only the points inside it, so the
+visible resolution increases as the window shrinks.
+"""
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("lttb", "minmax")
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the ``threshold`` points LTTB keeps (first and last always included)."""
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+    # Relative seconds keep the triangle areas well inside float precision
+    x = (x - x[0]).astype(np.float64) / 1e9
+    y = y.astype(np.float64)
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of each bucket's min and max, in time order (about ``threshold`` points)."""
+    size = len(y)
+    buckets = threshold // 2
+    if threshold >= size or buckets < 1:
+        return np.arange(size)
+    edges = np.linspace(0, size, buckets + 1).astype(np.int64)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        low, high = lo + int(np.argmin(y[lo:hi])), lo + int(np.argmax(y[lo:hi]))
+        keep.extend(sorted({low, high}))
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _parse_times(values: List[str], base_date: Optional[str]) -> np.ndarray:
+    """Epoch nanoseconds for timeline ``time`` values.
+
+    Full timestamps are parsed as-is. Bare times of day (``"14:23:00"``) are
+    placed on ``base_date`` (the document's time range start) and rolled
+    over to the next day whenever they go backwards.
+    """
+    times = pd.Series(values, dtype="object").astype(str)
+    time_only = ~times.str.contains(r"\d{4}-\d{2}-\d{2}", regex=True)
+    if time_only.any():
+        times = times.where(~time_only, f"{base_date or '1970-01-01'}T" + times)
+    parsed = pd.to_datetime(times, utc=True, errors="coerce", format="ISO8601")
+    ns = parsed.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    if time_only.all() and len(ns) > 1:
+        wraps = np.concatenate([[0], np.cumsum(np.diff(ns) < 0)])
+        ns = ns + wraps * np.int64(86_400 * 10**9)
+    return ns
+
+
+class TimeSeries:
+    """One timeline as sorted (epoch ns, value) arrays."""
+
+    def __init__(self, timeline: List[dict], base_date: Optional[str] = None):
+        x = _parse_times([point.get("time") for point in timeline], base_date)
+        y = pd.to_numeric(pd.Series([point.get("value") for point in timeline]), errors="coerce").to_numpy(np.float64)
+        valid = (x != np.iinfo(np.int64).min) & ~np.isnan(y)
+        order = np.argsort(x[valid], kind="stable")
+        self.x = x[valid][order]
+        self.y = y[valid][order]
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @property
+    def time_range(self) -> Optional[tuple]:
+        if not len(self.x):
+            return None
+        return int(self.x[0]), int(self.x[-1])
+
+    def _bounds(self, start: Optional[int], end: Optional[int]) -> tuple:
+        lo = 0 if start is None else int(np.searchsorted(self.x, start, side="left"))
+        hi = len(self.x) if end is None else int(np.searchsorted(self.x, end, side="right"))
+        return lo, hi
+
+    def count(self, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        """Raw points in [start, end] (epoch ns)."""
+        lo, hi = self._bounds(start, end)
+        return max(0, hi - lo)
+
+    def window(self, start: Optional[int] = None, end: Optional[int] = None,
+               width: int = 800, method: str = "lttb") -> pd.Series:
+        """Points in [start, end] (epoch ns), downsampled to about ``width`` points."""
+        lo, hi = self._bounds(start, end)
+        x, y = self.x[lo:hi], self.y[lo:hi]
+        if method not in METHODS:
+            raise ValueError(f"Unknown downsampling method: {method}")
+        keep = lttb(x, y, width) if method == "lttb" else minmax(y, width)
+        return pd.Series(y[keep], index=pd.to_datetime(x[keep], unit="ns"), name="value")
+
+
+def load_series(metrics_doc: dict, names: List[str]) -> Dict[str, TimeSeries]:
+    """``TimeSeries`` for each named metric in a metrics document that has a timeline."""
+    match = re.match(r"\d{4}-\d{2}-\d{2}", str(metrics_doc.get("time_range", "")))
+    base_date = match.group(0) if match else None
+    metrics_data = metrics_doc.get("metrics", {})
+    return {
+        name: TimeSeries(metrics_data[name]["timeline"], base_date)
+        for name in names
+        if isinstance(metrics_data.get(name), dict) and metrics_data[name].get("timeline")
+    }
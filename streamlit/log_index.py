@@ -0,0 +1,220 @@
+"""Columnar, pre-indexed view of the log stream for the Logs Explorer.
+
+Held by the dashboard's shared data service and extended as new logs
+arrive, so filter interactions never rebuild a DataFrame or rescan
+message text:
+
+* rows are kept in timestamp order; level, service and message are
+  dictionary-encoded to integer codes, so level/service filters are a
+  lookup-table gather and a time range is a ``searchsorted`` slice
+* message search runs against the distinct messages only, through a
+  trigram index (candidates are then confirmed with a substring check);
+  matching message codes become a lookup table over the rows
+* only the requested page is materialised as a DataFrame
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+ERROR_LEVELS = ("ERROR", "CRITICAL")
+WARN_LEVELS = ("WARN", "WARNING")
+NGRAM = 3
+SEARCH_CACHE_SIZE = 64
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class LogQuery:
+    """Row ids (in time order) matching one filter, plus counts over all of them."""
+
+    def __init__(self, index: "LogIndex", rows: np.ndarray):
+        self.index = index
+        self.rows = rows
+        level_counts = np.bincount(index.level_codes[rows], minlength=len(index.levels))
+        self.level_counts = {level: int(n) for level, n in zip(index.levels, level_counts) if n}
+        self.services = int(np.count_nonzero(np.bincount(index.service_codes[rows], minlength=len(index.services))))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def errors(self) -> int:
+        return sum(self.level_counts.get(level, 0) for level in ERROR_LEVELS)
+
+    @property
+    def warnings(self) -> int:
+        return sum(self.level_counts.get(level, 0) for level in WARN_LEVELS)
+
+    def pages(self, page_size: int) -> int:
+        return max(1, -(-len(self.rows) // page_size))
+
+    def page(self, number: int, page_size: int, newest_first: bool = False) -> List[dict]:
+        """Records on page ``number`` (1-based)."""
+        start = (number - 1) * page_size
+        if newest_first:
+            end = len(self.rows) - start
+            rows = self.rows[max(0, end - page_size):max(0, end)][::-1]
+        else:
+            rows = self.rows[start:start + page_size]
+        return [self.index.records[i] for i in self.index.order[rows]]
+
+
+class LogIndex:
+    """Immutable index over the first ``size`` rows of a (possibly growing) record list.
+
+    ``LogIndex(records, base=previous)`` indexes only the rows appended since
+    ``previous`` and shares the record list itself, so refreshing after new
+    logs arrive costs time proportional to the new rows (plus an array
+    concatenation); only out-of-order timestamps force a re-sort. Queries in
+    flight keep using the snapshot they started on.
+    """
+
+    def __init__(self, records: Sequence[dict], base: Optional["LogIndex"] = None):
+        self.records = records
+        start = base.size if base is not None else 0
+        new = records[start:]
+        self.size = start + len(new)
+
+        # Dictionaries grow by copy so the base snapshot stays untouched
+        self._ids = {key: dict(base._ids[key]) if base is not None else {} for key in ("level", "service", "message")}
+        self.levels = list(base.levels) if base is not None else []
+        self.services = list(base.services) if base is not None else []
+        self._messages = list(base._messages) if base is not None else []
+        self._postings = dict(base._postings) if base is not None else {}
+
+        timestamps = pd.to_datetime(pd.Series([r.get("timestamp") for r in new], dtype="object"),
+                                    utc=True, errors="coerce", format="ISO8601")
+        # Unparsable timestamps sort first (NaT is the smallest int64)
+        new_ts = timestamps.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        new_levels = self._encode("level", [r.get("level") or "INFO" for r in new], self.levels)
+        new_services = self._encode("service", [r.get("service") or "unknown" for r in new], self.services)
+        known_messages = len(self._messages)
+        new_messages = self._encode("message", [r.get("message") or "" for r in new], self._messages, str.lower)
+        self._index_messages(known_messages)
+
+        if base is None:
+            base_order = base_ts = np.empty(0, dtype=np.int64)
+            base_levels = base_services = base_messages = np.empty(0, dtype=np.int32)
+        else:
+            base_order, base_ts = base.order, base.ts
+            base_levels, base_services, base_messages = base.level_codes, base.service_codes, base.message_codes
+
+        if not len(base_ts) or not len(new_ts) or new_ts.min() >= base_ts[-1]:
+            # Appended in time order: sort just the new rows and concatenate
+            new_order = np.argsort(new_ts, kind="stable")
+            self.order = np.concatenate([base_order, start + new_order])
+            self.ts = np.concatenate([base_ts, new_ts[new_order]])
+            self.level_codes = np.concatenate([base_levels, new_levels[new_order]])
+            self.service_codes = np.concatenate([base_services, new_services[new_order]])
+            self.message_codes = np.concatenate([base_messages, new_messages[new_order]])
+        else:
+            # Late rows: restore record order, then re-sort everything
+            def raw(sorted_values, appended):
+                values = np.empty(start, dtype=sorted_values.dtype)
+                values[base_order] = sorted_values
+                return np.concatenate([values, appended])
+
+            ts = raw(base_ts, new_ts)
+            self.order = np.argsort(ts, kind="stable")
+            self.ts = ts[self.order]
+            self.level_codes = raw(base_levels, new_levels)[self.order]
+            self.service_codes = raw(base_services, new_services)[self.order]
+            self.message_codes = raw(base_messages, new_messages)[self.order]
+
+        self._search_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _encode(self, key: str, values: list, names: list, normalize=None) -> np.ndarray:
+        """Integer codes for ``values``, registering unseen ones in ``names``."""
+        ids = self._ids[key]
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for local, value in enumerate(uniques):
+            value = str(value)
+            if value not in ids:
+                ids[value] = len(names)
+                names.append(normalize(value) if normalize else value)
+            mapping[local] = ids[value]
+        return mapping[codes] if len(codes) else np.empty(0, dtype=np.int32)
+
+    def _index_messages(self, start: int):
+        """Add trigram postings for distinct messages from code ``start`` on."""
+        postings: Dict[str, List[int]] = {}
+        for code in range(start, len(self._messages)):
+            for gram in _trigrams(self._messages[code]):
+                postings.setdefault(gram, []).append(code)
+        for gram, codes in postings.items():
+            added = np.asarray(codes, dtype=np.int32)
+            self._postings[gram] = np.concatenate([self._postings[gram], added]) if gram in self._postings else added
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def time_range(self) -> Optional[tuple]:
+        valid = self.ts[self.ts != np.iinfo(np.int64).min]
+        if not len(valid):
+            return None
+        return pd.Timestamp(valid[0], tz="UTC"), pd.Timestamp(valid[-1], tz="UTC")
+
+    def _matching_messages(self, text: str) -> np.ndarray:
+        """Codes of distinct messages containing ``text`` (case-insensitive)."""
+        text = text.lower()
+        with self._lock:
+            if text in self._search_cache:
+                self._search_cache.move_to_end(text)
+                return self._search_cache[text]
+        if len(text) < NGRAM:
+            candidates = range(len(self._messages))
+        else:
+            lists = []
+            for gram in _trigrams(text):
+                if gram not in self._postings:
+                    lists = None
+                    break
+                lists.append(self._postings[gram])
+            if not lists:
+                candidates = []
+            else:
+                lists.sort(key=len)
+                candidates = lists[0]
+                for other in lists[1:]:
+                    candidates = np.intersect1d(candidates, other, assume_unique=True)
+                    if not len(candidates):
+                        break
+        matches = np.fromiter((c for c in candidates if text in self._messages[c]), dtype=np.int32)
+        with self._lock:
+            self._search_cache[text] = matches
+            while len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        return matches
+
+    @staticmethod
+    def _lookup(names: List[str], selected: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        if selected is None:
+            return None
+        wanted = set(selected)
+        return np.fromiter((name in wanted for name in names), dtype=bool, count=len(names))
+
+    def query(self, levels: Optional[Sequence[str]] = None, services: Optional[Sequence[str]] = None,
+              search: str = "", start=None, end=None) -> LogQuery:
+        """Rows matching every given filter; ``None`` means "don't filter on this"."""
+        lo = 0 if start is None else int(np.searchsorted(self.ts, pd.Timestamp(start).value, side="left"))
+        hi = len(self.ts) if end is None else int(np.searchsorted(self.ts, pd.Timestamp(end).value, side="right"))
+        mask = np.ones(max(0, hi - lo), dtype=bool)
+
+        for names, codes, selected in ((self.levels, self.level_codes, levels),
+                                       (self.services, self.service_codes, services)):
+            table = self._lookup(names, selected)
+            if table is not None:
+                mask &= table[codes[lo:hi]]
+        if search:
+            table = np.zeros(len(self._messages), dtype=bool)
+            table[self._matching_messages(search)] = True
+            mask &= table[self.message_codes[lo:hi]]
+        return LogQuery(self, np.flatnonzero(mask) + lo)
@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
-import json
 import os
 import re
+import sys
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # Try to import mermaid, but make it optional
 try:
@@ -55,36 +56,55 @@ st.markdown("""
 # DATA PATHS
 # -------------------------------
 BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = Path(os.getenv("DATA_DIR", str(BASE_DIR / "data")))
 REPORTS_DIR = BASE_DIR / "reports"
 
+# Make the investigation package (src/) importable from the dashboard
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+if str(Path(__file__).parent) not in sys.path:
+    sys.path.append(str(Path(__file__).parent))
+
+from data_service import DashboardData
+
 # -------------------------------
 # DATA LOADING FUNCTIONS
 # -------------------------------
-@st.cache_data(ttl=60)
-def load_json_file(filepath):
-    """Load a JSON file and return its contents."""
+TIMELINE_METRICS = {"cpu_usage": "CPU Usage", "request_rate": "Request Rate"}
+
+@st.cache_resource(show_spinner="Loading telemetry...")
+def get_dashboard_data():
+    """Parsed, indexed telemetry shared by every session and refreshed as the data files change."""
+    return DashboardData(DATA_DIR, list(TIMELINE_METRICS))
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def downsample_timeline(_series, metrics_version, name, start, end, width, method):
+    """Downsampled window of one timeline, cached per (series, range, width)."""
+    return _series.window(start, end, width=width, method=method)
+
+@st.cache_resource(show_spinner="Starting investigation workers...")
+def get_investigation_service():
+    """Background investigation pool (one warm IncidentCommander) shared by every session.
+
+    Sized by DASHBOARD_WORKERS rather than ``default_concurrency()``, which
+    allows a single investigation under the default LLM allowance, so several
+    users' investigations run side by side.
+    """
+    from src.service import InvestigationService
+    return InvestigationService(workers=int(os.getenv("DASHBOARD_WORKERS", "4"))).start()
+
+def load_report_store():
+    """Structured report store (reports/reports.sqlite), shared by every session."""
     try:
-        with open(filepath, 'r') as f:
-            return json.load(f)
+        from src.reports import get_report_store
+        return get_report_store()
     except Exception as e:
-        st.error(f"Error loading {filepath}: {e}")
+        st.error(f"Error opening report store: {e}")
         return None
 
-@st.cache_data(ttl=60)
-def load_logs():
-    """Load logs data."""
-    return load_json_file(DATA_DIR / "logs.json")
-
-@st.cache_data(ttl=60)
-def load_metrics():
-    """Load metrics data."""
-    return load_json_file(DATA_DIR / "metrics.json")
-
-@st.cache_data(ttl=60)
-def load_deployments():
-    """Load deployments data."""
-    return load_json_file(DATA_DIR / "deployments.json")
+def format_utc(timestamp, fmt="%Y-%m-%d %H:%M"):
+    """Epoch seconds as UTC text, the timezone every page displays."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(fmt)
 
 def get_report_files():
     """Get list of report files."""
@@ -92,6 +112,24 @@ def get_report_files():
         return sorted(REPORTS_DIR.glob("*.txt"), reverse=True)
     return []
 
+def load_investigations():
+    """List checkpointed investigations (in-progress and completed)."""
+    try:
+        from src.checkpoints import list_investigations
+        return list_investigations()
+    except Exception as e:
+        st.error(f"Error loading investigations: {e}")
+        return []
+
+def load_investigation(investigation_id):
+    """Load the latest checkpointed state of one investigation."""
+    try:
+        from src.checkpoints import load_investigation_state
+        return load_investigation_state(investigation_id)
+    except Exception as e:
+        st.error(f"Error loading investigation {investigation_id}: {e}")
+        return None
+
 def parse_report(filepath):
     """Parse a report file and extract sections."""
     try:
@@ -128,6 +166,68 @@ def severity_color(level):
     }
     return colors.get(level.upper(), '⚪')
 
+INVESTIGATION_ICONS = {'queued': '⏳', 'running': '🔄', 'completed': '✅', 'failed': '❌', 'rejected': '🚫'}
+PIPELINE_NODES = ['triage', 'orchestrate', 'service_evidence', 'merge_evidence', 'reasoning', 'report']
+FAST_PATH_NODES = ['triage', 'fast_path']
+
+def investigation_progress(result):
+    """(fraction done, label) from a service result's node events.
+
+    Events are counted per (node, service), so the evidence step only
+    completes once every per-service branch that started has finished.
+    """
+    events = result.get('events', [])
+    if result['status'] == 'completed':
+        return 1.0, "Completed"
+    if result['status'] == 'queued':
+        return 0.0, "Waiting for a worker..."
+    started = [(e['node'], e.get('service')) for e in events if e['status'] == 'started']
+    finished = {(e['node'], e.get('service')) for e in events if e['status'] == 'finished'}
+    nodes = FAST_PATH_NODES if ('fast_path', None) in started else PIPELINE_NODES
+    steps = 0.0
+    for node in nodes:
+        branches = {key for key in started if key[0] == node}
+        if branches:
+            steps += len(branches & finished) / len(branches)
+    running = [key for key in started if key not in finished]
+    if not running:
+        label = result['status'].capitalize()
+    elif running[-1][1]:
+        services = [service for node, service in running if node == running[-1][0]]
+        label = f"Running {running[-1][0]} ({', '.join(services)})"
+    else:
+        label = f"Running {running[-1][0]}"
+    return steps / len(nodes), label
+
+def render_submitted_investigations():
+    """Live status of the investigations this session submitted (read from the shared service)."""
+    service = get_investigation_service()
+    results = [service.get(report_id) for report_id in reversed(st.session_state.get('submitted_investigations', []))]
+    results = [r for r in results if r is not None]
+    for result in results:
+        icon = INVESTIGATION_ICONS.get(result['status'], '⚪')
+        elapsed = (result.get('finished_at') or time.time()) - result.get('started_at', result['submitted_at'])
+        st.markdown(f"{icon} **{result['service']}** | `{result['report_id']}` | {result['status']} | "
+                    f"priority {result['priority']} | {elapsed:.0f}s")
+        fraction, label = investigation_progress(result)
+        st.progress(fraction, text=label)
+        if result['status'] == 'completed':
+            root_cause = result['report']['root_cause']
+            st.markdown(f"🧠 {root_cause['explanation']} (**{root_cause['confidence']}%** confidence)")
+            with st.expander("📄 Report"):
+                st.text(service.commander.format_report(result['report']))
+        elif result.get('error'):
+            st.error(result['error'])
+        if result['events']:
+            with st.expander(f"🧩 Node events ({len(result['events'])})"):
+                events_df = pd.DataFrame(result['events'])
+                events_df['at'] = pd.to_datetime(events_df['at'], unit='s')
+                st.dataframe(events_df, use_container_width=True, hide_index=True)
+    if not any(r['status'] in ('queued', 'running') for r in results) and st.session_state.get('polling_investigations'):
+        # Everything settled: one full rerun to stop polling
+        st.session_state['polling_investigations'] = False
+        st.rerun()
+
 def risk_badge(risk_level):
     """Return styled risk badge."""
     if 'high' in risk_level.lower():
@@ -144,7 +244,7 @@ st.sidebar.title("🚨 Incident Commander")
 st.sidebar.markdown("---")
 page = st.sidebar.radio(
     "Navigation",
-    ["📊 Dashboard", "📜 Logs Explorer", "📈 Metrics", "🚀 Deployments", "📄 Reports", "🏗️ Architecture"]
+    ["📊 Dashboard", "📜 Logs Explorer", "📈 Metrics", "🚀 Deployments", "📄 Reports", "🧭 Investigations", "🏗️ Architecture"]
 )
 
 # -------------------------------
@@ -154,18 +254,17 @@ if page == "📊 Dashboard":
     st.title("🚨 Incident Commander Dashboard")
     st.markdown("*Real-time incident analysis and root cause detection*")
     
-    # Load all data
-    logs = load_logs() or []
-    metrics = load_metrics() or {}
-    deployments = load_deployments() or []
+    # Shared data with KPIs precomputed as data arrives
+    data = get_dashboard_data()
+    kpis = data.kpis
+    metrics = data.metrics or {}
     
     # KPI Row
     st.subheader("📊 Key Performance Indicators")
     col1, col2, col3, col4, col5 = st.columns(5)
     
-    # Calculate KPIs from data
-    error_count = sum(1 for log in logs if log.get('level') in ['ERROR', 'CRITICAL']) if logs else 0
-    warn_count = sum(1 for log in logs if log.get('level') == 'WARN') if logs else 0
+    error_count = kpis['errors']
+    warn_count = kpis['warnings']
     
     metrics_data = metrics.get('metrics', {})
     error_rate = metrics_data.get('error_rate', {}).get('during_incident', 0)
@@ -185,9 +284,8 @@ if page == "📊 Dashboard":
     
     with left_col:
         st.subheader("📜 Recent Error Logs")
-        if logs:
-            error_logs = [log for log in logs if log.get('level') in ['ERROR', 'CRITICAL', 'WARN']]
-            for log in error_logs[:5]:
+        if kpis['recent_issues']:
+            for log in kpis['recent_issues']:
                 severity = severity_color(log.get('level', 'INFO'))
                 st.markdown(f"""
                 <div class="finding-card">
@@ -200,8 +298,8 @@ if page == "📊 Dashboard":
     
     with right_col:
         st.subheader("🚀 Recent Deployments")
-        if deployments:
-            for deploy in deployments[:3]:
+        if data.latest_deployments:
+            for deploy in data.latest_deployments:
                 status_icon = "✅" if deploy.get('status') == 'success' else "❌"
                 st.markdown(f"""
                 <div class="finding-card">
@@ -217,11 +315,74 @@ if page == "📊 Dashboard":
     
     # Latest Report Summary
     st.subheader("📄 Latest Incident Report")
-    report_files = get_report_files()
-    if report_files:
+    try:
+        latest = data.latest_report()
+    except Exception as e:
+        st.error(f"Error opening report store: {e}")
+        latest = None
+    report_files = get_report_files() if latest is None else []
+    if latest:
+        from src.reports import format_markdown
+        created = format_utc(latest['created_at'])
+        with st.expander(f"📋 {latest['service']} | {created} | {latest['confidence']}% confidence", expanded=True):
+            render_markdown_with_mermaid(format_markdown(latest['report']))
+    elif report_files:
         latest_report = parse_report(report_files[0])
         with st.expander(f"📋 {report_files[0].name}", expanded=True):
             st.text(latest_report[:2000] + "..." if len(latest_report) > 2000 else latest_report)
+    
+    st.markdown("---")
+    
+    # Run investigations in the shared background pool, never in this script run
+    st.subheader("🕵️ Run an Investigation")
+    with st.form("new_investigation"):
+        form_cols = st.columns(2)
+        service_name = form_cols[0].text_input("Service", value="payment-api")
+        # Investigations read naive times as UTC, so default to an explicit UTC time
+        alert_time = form_cols[1].text_input("Alert time (ISO 8601)",
+                                             value=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+        symptoms = st.text_area("Symptoms", value="High error rate and increased latency on /checkout endpoint")
+        submitted = st.form_submit_button("🚀 Investigate")
+    
+    if submitted:
+        from pydantic import ValidationError
+        from src.models import IncidentInput
+        from src.service import QueueFullError
+        try:
+            incident = IncidentInput(
+                service=service_name.strip(),
+                alert_time=alert_time.strip(),
+                symptoms=symptoms.strip(),
+                logs_path=str(DATA_DIR / "logs.json"),
+                metrics_path=str(DATA_DIR / "metrics.json"),
+                deployment_path=str(DATA_DIR / "deployments.json")
+            )
+            report_id = get_investigation_service().submit(incident)
+        except ValidationError as e:
+            st.error(f"Invalid incident: {e}")
+        except QueueFullError as e:
+            st.error(f"🚫 {e}. Try again shortly.")
+        except Exception as e:
+            st.error(f"Could not start investigation: {e}")
+        else:
+            st.session_state.setdefault('submitted_investigations', []).append(report_id)
+            st.success(f"Queued investigation `{report_id}`")
+    
+    if st.session_state.get('submitted_investigations'):
+        st.subheader("⏳ Your Investigations")
+        service = get_investigation_service()
+        active = any(
+            (service.get(report_id) or {}).get('status') in ('queued', 'running')
+            for report_id in st.session_state['submitted_investigations']
+        )
+        st.session_state['polling_investigations'] = active
+        if hasattr(st, "fragment"):
+            # Only this section reruns while polling, so the rest of the page stays interactive
+            st.fragment(run_every=2 if active else None)(render_submitted_investigations)()
+        else:
+            if active and st.button("🔄 Refresh progress"):
+                st.rerun()
+            render_submitted_investigations()
 
 # -------------------------------
 # PAGE 2: LOGS EXPLORER
@@ -230,55 +391,90 @@ elif page == "📜 Logs Explorer":
     st.title("📜 Logs Explorer")
     st.markdown("*Analyze and filter application logs*")
     
-    logs = load_logs()
+    index = get_dashboard_data().log_index
     
-    if logs:
-        df = pd.DataFrame(logs)
-        
+    if len(index):
         # Filters
         col1, col2, col3 = st.columns(3)
         with col1:
-            level_filter = st.multiselect("Filter by Level", df['level'].unique(), default=df['level'].unique())
+            level_filter = st.multiselect("Filter by Level", index.levels, default=index.levels)
         with col2:
-            service_filter = st.multiselect("Filter by Service", df['service'].unique(), default=df['service'].unique())
+            service_filter = st.multiselect("Filter by Service", index.services, default=index.services)
         with col3:
             search_text = st.text_input("🔍 Search messages")
         
-        # Apply filters
-        filtered_df = df[df['level'].isin(level_filter) & df['service'].isin(service_filter)]
-        if search_text:
-            filtered_df = filtered_df[filtered_df['message'].str.contains(search_text, case=False, na=False)]
+        time_range = index.time_range
+        start = end = None
+        if time_range and time_range[0] < time_range[1]:
+            first, last = (t.tz_localize(None).to_pydatetime() for t in time_range)
+            start, end = st.slider(
+                "🕒 Time range (UTC)",
+                min_value=first,
+                max_value=last,
+                value=(first, last),
+                step=timedelta(minutes=1),
+                format="YYYY-MM-DD HH:mm"
+            )
+        
+        # Apply filters (served from the shared index, no rescans)
+        result = index.query(
+            levels=level_filter,
+            services=service_filter,
+            search=search_text.strip(),
+            start=start,
+            end=end
+        )
         
         # Stats row
         st.markdown("---")
         stat_cols = st.columns(4)
-        stat_cols[0].metric("Total Logs", len(filtered_df))
-        stat_cols[1].metric("Errors", len(filtered_df[filtered_df['level'].isin(['ERROR', 'CRITICAL'])]))
-        stat_cols[2].metric("Warnings", len(filtered_df[filtered_df['level'] == 'WARN']))
-        stat_cols[3].metric("Services", filtered_df['service'].nunique())
+        stat_cols[0].metric("Total Logs", f"{len(result):,}")
+        stat_cols[1].metric("Errors", f"{result.errors:,}")
+        stat_cols[2].metric("Warnings", f"{result.warnings:,}")
+        stat_cols[3].metric("Services", result.services)
         
         st.markdown("---")
         
-        # Display table
+        # Display table, one page at a time
         st.subheader("📋 Log Entries")
         
-        # Add severity emoji column
-        filtered_df['Severity'] = filtered_df['level'].apply(severity_color)
-        display_cols = ['Severity', 'timestamp', 'level', 'service', 'message']
-        available_cols = [c for c in display_cols if c in filtered_df.columns]
-        
-        st.dataframe(
-            filtered_df[available_cols],
-            use_container_width=True,
-            hide_index=True,
-            height=400
-        )
+        page_cols = st.columns([1, 1, 2])
+        with page_cols[0]:
+            page_size = st.selectbox("Rows per page", [50, 100, 250, 500], index=1)
+        with page_cols[1]:
+            page_number = st.number_input("Page", min_value=1, max_value=result.pages(page_size), value=1, step=1)
+        with page_cols[2]:
+            newest_first = st.checkbox("Newest first", value=False)
+        st.caption(f"Page {page_number} of {result.pages(page_size):,}")
+        
+        page_logs = result.page(int(page_number), page_size, newest_first=newest_first)
+        if page_logs:
+            page_df = pd.DataFrame(page_logs)
+            page_df['Severity'] = page_df['level'].fillna('INFO').apply(severity_color)
+            display_cols = ['Severity', 'timestamp', 'level', 'service', 'message']
+            available_cols = [c for c in display_cols if c in page_df.columns]
+            
+            st.dataframe(
+                page_df[available_cols],
+                use_container_width=True,
+                hide_index=True,
+                height=400
+            )
+        else:
+            st.info("No logs match the current filters.")
         
-        # Error details
+        # Error details for the errors on this page only
         st.subheader("🔍 Error Details")
-        for _, log in filtered_df[filtered_df['level'].isin(['ERROR', 'CRITICAL'])].iterrows():
-            with st.expander(f"{severity_color(log['level'])} {log['timestamp']} - {log['message'][:50]}..."):
-                st.json(log.to_dict())
+        page_errors = [log for log in page_logs if log.get('level') in ['ERROR', 'CRITICAL']]
+        if page_errors:
+            selected = st.selectbox(
+                f"{len(page_errors)} errors on this page",
+                range(len(page_errors)),
+                format_func=lambda i: f"{severity_color(page_errors[i].get('level', 'ERROR'))} {page_errors[i].get('timestamp', 'N/A')} - {page_errors[i].get('message', '')[:80]}"
+            )
+            st.json(page_errors[selected])
+        else:
+            st.info("No errors on this page.")
     else:
         st.warning("No logs data available. Check if data/logs.json exists.")
 
@@ -289,7 +485,8 @@ elif page == "📈 Metrics":
     st.title("📈 System Metrics")
     st.markdown("*Telemetry and performance metrics analysis*")
     
-    metrics = load_metrics()
+    data = get_dashboard_data()
+    metrics = data.metrics
     
     if metrics:
         st.subheader(f"📊 Service: {metrics.get('service', 'Unknown')}")
@@ -365,23 +562,48 @@ elif page == "📈 Metrics":
         
         st.markdown("---")
         
-        # Timeline data
+        # Timeline data, downsampled server-side to the chart resolution
         st.subheader("📊 Metric Timelines")
         
-        # CPU Timeline
-        cpu_timeline = cpu.get('timeline', [])
-        if cpu_timeline:
-            cpu_df = pd.DataFrame(cpu_timeline)
-            st.markdown("**CPU Usage Over Time**")
-            st.bar_chart(cpu_df.set_index('time')['value'])
-        
-        # Request Rate Timeline
-        request_rate = metrics_data.get('request_rate', {})
-        req_timeline = request_rate.get('timeline', [])
-        if req_timeline:
-            req_df = pd.DataFrame(req_timeline)
-            st.markdown("**Request Rate Over Time**")
-            st.bar_chart(req_df.set_index('time')['value'])
+        series = {name: s for name, s in data.metric_series.items() if len(s)}
+        
+        if series:
+            first = min(s.time_range[0] for s in series.values())
+            last = max(s.time_range[1] for s in series.values())
+            
+            control_cols = st.columns([3, 1, 1])
+            with control_cols[1]:
+                width = st.selectbox("Points per chart", [200, 400, 800, 1600], index=2)
+            with control_cols[2]:
+                method = st.selectbox(
+                    "Downsampling",
+                    ["lttb", "minmax"],
+                    format_func=lambda m: {"lttb": "LTTB (shape)", "minmax": "Min/Max (extremes)"}[m]
+                )
+            start, end = first, last
+            with control_cols[0]:
+                if last > first:
+                    first_dt = pd.Timestamp(first).to_pydatetime()
+                    last_dt = pd.Timestamp(last).to_pydatetime()
+                    zoom = st.slider(
+                        "🔍 Zoom (UTC)",
+                        min_value=first_dt,
+                        max_value=last_dt,
+                        value=(first_dt, last_dt),
+                        step=timedelta(seconds=max(1, (last - first) // 10**9 // 1000)),
+                        format="YYYY-MM-DD HH:mm:ss"
+                    )
+                    start, end = (pd.Timestamp(t).value for t in zoom)
+            
+            for name, label in TIMELINE_METRICS.items():
+                if name not in series:
+                    continue
+                points = downsample_timeline(series[name], data.metrics_version, name, start, end, width, method)
+                st.markdown(f"**{label} Over Time**")
+                st.line_chart(points)
+                st.caption(f"{len(points):,} of {series[name].count(start, end):,} points shown")
+        else:
+            st.info("No metric timelines available")
     else:
         st.warning("No metrics data available. Check if data/metrics.json exists.")
 
@@ -392,7 +614,7 @@ elif page == "🚀 Deployments":
     st.title("🚀 Deployment History")
     st.markdown("*Track deployments and configuration changes*")
     
-    deployments = load_deployments()
+    deployments = get_dashboard_data().deployments
     
     if deployments:
         # Summary metrics
@@ -454,9 +676,93 @@ elif page == "📄 Reports":
     st.title("📄 Incident Reports")
     st.markdown("*View and analyze generated incident reports*")
     
-    report_files = get_report_files()
+    report_store = load_report_store()
+    has_stored_reports = report_store is not None and report_store.count() > 0
+    # Plain-text reports are only listed when nothing is in the report store yet
+    report_files = [] if has_stored_reports else get_report_files()
     
-    if report_files:
+    if has_stored_reports:
+        from src.reports import format_markdown, format_text
+        
+        # Filters (run as indexed queries against the report store)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            service_filter = st.selectbox("Service", ["All services"] + report_store.services())
+        with col2:
+            confidence_range = st.slider("Confidence (%)", 0, 100, (0, 100))
+        with col3:
+            created_range = st.date_input("Created between (UTC)", value=(), format="YYYY-MM-DD")
+        with col4:
+            search_text = st.text_input("🔍 Search root causes")
+        
+        filters = {
+            "service": None if service_filter == "All services" else service_filter,
+            "min_confidence": confidence_range[0] if confidence_range[0] > 0 else None,
+            "max_confidence": confidence_range[1] if confidence_range[1] < 100 else None,
+            "search": search_text.strip() or None,
+        }
+        if created_range:
+            filters["since"] = datetime.combine(created_range[0], datetime.min.time(), timezone.utc).timestamp()
+            last_day = created_range[-1] + timedelta(days=1)
+            filters["until"] = datetime.combine(last_day, datetime.min.time(), timezone.utc).timestamp()
+        
+        matches = report_store.count(**filters)
+        
+        page_cols = st.columns([1, 1, 2])
+        with page_cols[0]:
+            page_size = st.selectbox("Reports per page", [25, 50, 100], index=0)
+        pages = max(1, -(-matches // page_size))
+        with page_cols[1]:
+            page_number = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+        with page_cols[2]:
+            st.metric("Matching Reports", f"{matches:,}")
+        
+        summaries = report_store.query(**filters, limit=page_size, offset=(int(page_number) - 1) * page_size)
+        
+        if summaries:
+            reports_df = pd.DataFrame(summaries)
+            reports_df['created_at'] = reports_df['created_at'].map(lambda ts: format_utc(ts, "%Y-%m-%d %H:%M:%S"))
+            display_cols = ['created_at', 'service', 'confidence', 'root_cause', 'source', 'duration_seconds', 'total_tokens', 'report_id']
+            st.dataframe(reports_df[display_cols], use_container_width=True, hide_index=True)
+            
+            selected_id = st.selectbox(
+                "Select Report",
+                [r['report_id'] for r in summaries],
+                format_func=lambda rid: next(
+                    f"📋 {r['service']} | {format_utc(r['created_at'])} | {r['confidence']}% | {rid}"
+                    for r in summaries if r['report_id'] == rid
+                )
+            )
+            record = report_store.get(selected_id)
+            
+            if record:
+                # Report metadata
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Confidence", f"{record['confidence']}%")
+                col2.metric("Duration", f"{record['duration_seconds']:.1f}s" if record['duration_seconds'] is not None else "N/A")
+                col3.metric("Tokens", f"{record['total_tokens']:,}" if record['total_tokens'] is not None else "N/A")
+                col4.metric("Source", record['source'])
+                
+                st.markdown("---")
+                
+                # Rendered on demand from the structured report
+                tab_report, tab_text, tab_json = st.tabs(["📝 Report", "📋 Text", "🧾 JSON"])
+                with tab_report:
+                    render_markdown_with_mermaid(format_markdown(record['report']))
+                with tab_text:
+                    content = format_text(record['report'])
+                    st.text_area("Report text", content, height=600, label_visibility="collapsed")
+                    st.download_button(
+                        "⬇️ Download Report",
+                        data=content,
+                        file_name=f"incident_report_{record['report_id']}.txt",
+                        mime="text/plain"
+                    )
+                with tab_json:
+                    st.json({**record['report'], "metadata": record['metadata']})
+        else:
+            st.info("No reports match the current filters.")
+    elif report_files:
         # Report selector
         selected_report = st.selectbox(
             "Select Report",
@@ -470,7 +776,7 @@ elif page == "📄 Reports":
             # Report metadata
             col1, col2, col3 = st.columns(3)
             col1.metric("File Size", f"{selected_report.stat().st_size} bytes")
-            col2.metric("Created", datetime.fromtimestamp(selected_report.stat().st_mtime).strftime("%Y-%m-%d %H:%M"))
+            col2.metric("Created", format_utc(selected_report.stat().st_mtime))
             col3.metric("Lines", len(content.split('\n')))
             
             st.markdown("---")
@@ -491,7 +797,67 @@ elif page == "📄 Reports":
         st.info("Reports are saved in the `reports/` directory.")
 
 # -------------------------------
-# PAGE 6: ARCHITECTURE
+# PAGE 6: INVESTIGATIONS
+# -------------------------------
+elif page == "🧭 Investigations":
+    st.title("🧭 Investigations")
+    st.markdown("*Checkpointed investigations, including in-progress and interrupted runs*")
+    
+    if st.button("🔄 Reload"):
+        st.rerun()
+    
+    investigations = load_investigations()
+    
+    if investigations:
+        col1, col2 = st.columns(2)
+        col1.metric("In Progress", sum(1 for i in investigations if i['status'] == 'in_progress'))
+        col2.metric("Completed", sum(1 for i in investigations if i['status'] == 'completed'))
+        
+        st.markdown("---")
+        
+        inv_df = pd.DataFrame(investigations)
+        inv_df['Progress'] = inv_df.apply(lambda row: f"{len(row['completed_nodes'])}/{row['total_nodes']}", axis=1)
+        display_cols = ['investigation_id', 'service', 'alert_time', 'status', 'Progress', 'next_node', 'updated_at']
+        st.dataframe(inv_df[display_cols], use_container_width=True, hide_index=True)
+        
+        selected_id = st.selectbox(
+            "Select Investigation",
+            [i['investigation_id'] for i in investigations]
+        )
+        
+        if selected_id:
+            state = load_investigation(selected_id) or {}
+            summary = next(i for i in investigations if i['investigation_id'] == selected_id)
+            if summary['status'] == 'in_progress':
+                st.warning(f"⏸️ Stopped before **{summary['next_node']}**. Resume with `python main.py --resume {selected_id}`")
+            
+            st.subheader("📋 Investigation Plan")
+            for i, step in enumerate(state.get('investigation_plan', []), 1):
+                st.markdown(f"{i}. {step}")
+            
+            col_logs, col_metrics, col_deploy = st.columns(3)
+            for col, title, key in [
+                (col_logs, "📜 Logs", 'logs_findings'),
+                (col_metrics, "📊 Telemetry", 'telemetry_findings'),
+                (col_deploy, "🚀 Deployments", 'deployment_findings'),
+            ]:
+                with col:
+                    st.markdown(f"**{title}**")
+                    for finding in state.get(key, []) or ["_Pending_"]:
+                        st.markdown(f"- {finding}")
+            
+            if state.get('root_cause_hypothesis'):
+                st.subheader("🧠 Root Cause")
+                st.markdown(f"{state['root_cause_hypothesis']} (**{state.get('confidence', 0)}%** confidence)")
+            
+            if state.get('final_report'):
+                with st.expander("📄 Final Report (JSON)"):
+                    st.json(state['final_report'])
+    else:
+        st.info("No checkpointed investigations yet. They are stored in `reports/checkpoints.sqlite`.")
+
+# -------------------------------
+# PAGE 7: ARCHITECTURE
 # -------------------------------
 elif page == "🏗️ Architecture":
     st.title("🏗️ Agent Architecture")
@@ -506,11 +872,15 @@ elif page == "🏗️ Architecture":
             incident["🚨 Incident Input"]
         end
 
+        subgraph Triage["⚡ Triage"]
+            rules["Deterministic Rules"]
+        end
+
         subgraph Orchestration["📋 Orchestration"]
             orchestrator["OrchestratorAgent"]
         end
 
-        subgraph Analysis["🔍 Data Analysis"]
+        subgraph Analysis["🔍 Data Analysis (per implicated service, in parallel)"]
             logs["📜 LogsAgent"]
             telemetry["📊 TelemetryAgent"]
             deployment["🚀 DeploymentAgent"]
@@ -525,7 +895,9 @@ elif page == "🏗️ Architecture":
             final["📄 Incident Report"]
         end
 
-        incident --> orchestrator
+        incident --> rules
+        rules -->|known pattern| final
+        rules -->|ambiguous| orchestrator
         orchestrator --> logs
         orchestrator --> telemetry
         orchestrator --> deployment
@@ -548,6 +920,7 @@ elif page == "🏗️ Architecture":
     st.subheader("🤖 Agent Descriptions")
     
     agents = [
+        {"name": "Deterministic Rules", "icon": "⚡", "desc": "Skips the LLM agents when logs, metrics and deployments agree on a known failure pattern"},
         {"name": "OrchestratorAgent", "icon": "📋", "desc": "Creates the investigation plan and coordinates the workflow"},
         {"name": "LogsAgent", "icon": "📜", "desc": "Analyzes log files for error patterns, cascading failures, and timeline"},
         {"name": "TelemetryAgent", "icon": "📊", "desc": "Analyzes metrics like CPU, memory, latency, and connection pools"},
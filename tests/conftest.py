@@ -1,60 +1,208 @@
+import asyncio
+import json
+import os
 import pytest
 import sys
-import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add project root to python path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from src.cassette import CassetteMissError, create_cassette_llm
 from src.llm_factory import create_llm
 
 from deepeval.models.base_model import DeepEvalBaseLLM
 
+CASSETTE_DIR = Path(__file__).parent / "cassettes"
+
+INCIDENT_DATA = {
+    "service": "payment-api",
+    "alert_time": "2024-01-15T14:30:00Z",
+    "symptoms": "High error rate and increased latency on /checkout endpoint",
+    "logs_path": "data/logs.json",
+    "metrics_path": "data/metrics.json",
+    "deployment_path": "data/deployments.json"
+}
+
+SAMPLE_FINDINGS = {
+    "logs": ["Database connection timeout", "Connection pool exhausted"],
+    "metrics": ["Latency p95 spiked to 3500ms", "CPU usage 92%"],
+    "deployments": ["Deploy-789 reduced DB pool size"]
+}
+
+# Filled in by the session fixtures, printed by pytest_terminal_summary
+EVAL_STATS = {}
+
+
 class CustomDeepEvalLLM(DeepEvalBaseLLM):
-    def __init__(self, llm):
+    def __init__(self, llm, max_concurrency: int = 4):
         self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.calls = 0
+        self._semaphores = weakref.WeakKeyDictionary()
 
     def load_model(self):
         return self.llm
 
     def generate(self, prompt: str) -> str:
+        self.calls += 1
         try:
             return self.llm.invoke(prompt).content
+        except CassetteMissError:
+            raise
         except Exception as e:
             return f"Error generating response: {e}"
 
+    def _semaphore(self) -> asyncio.Semaphore:
+        # deepeval may run metrics on a fresh event loop, so keep one semaphore per loop
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
     async def a_generate(self, prompt: str) -> str:
-        try:
-            return (await self.llm.ainvoke(prompt)).content
-        except Exception as e:
-            return f"Error generating response: {e}"
+        async with self._semaphore():
+            self.calls += 1
+            try:
+                return (await self.llm.ainvoke(prompt)).content
+            except CassetteMissError:
+                raise
+            except Exception as e:
+                return f"Error generating response: {e}"
 
     def get_model_name(self):
         return "Custom Agent LLM"
 
+
+class EvalHarness:
+    """Runs every metric of every test case concurrently through ``a_measure``.
+
+    Test modules hand over all their cases at once and assert on the
+    memoized results, so judge calls overlap across tests instead of running
+    one test at a time. Judge concurrency is capped by ``CustomDeepEvalLLM``.
+    """
+
+    def __init__(self):
+        self.timings = []
+        self.wall_seconds = 0.0
+
+    def evaluate(self, cases: dict) -> dict:
+        """``{name: (test_case, [metrics])}`` -> ``{name: [(metric, error_or_None)]}``."""
+        results = {name: [] for name in cases}
+
+        async def measure(name, test_case, metric):
+            started = time.perf_counter()
+            error = None
+            try:
+                await metric.a_measure(test_case, _show_indicator=False)
+            except Exception as e:
+                error = e
+            self.timings.append((name, getattr(metric, "__name__", type(metric).__name__),
+                                 time.perf_counter() - started))
+            results[name].append((metric, error))
+
+        async def run_all():
+            await asyncio.gather(*(
+                measure(name, test_case, metric)
+                for name, (test_case, metrics) in cases.items() for metric in metrics
+            ))
+
+        started = time.perf_counter()
+        asyncio.run(run_all())
+        self.wall_seconds += time.perf_counter() - started
+        return results
+
+
+def _can_record() -> bool:
+    """Whether the configured provider has credentials to record missing responses with."""
+    try:
+        create_llm()
+        return True
+    except ValueError:
+        return False
+
+
 @pytest.fixture(scope="session")
 def llm():
-    return create_llm()
+    path = Path(os.getenv("LLM_CASSETTE", str(CASSETTE_DIR / "test_agents.json")))
+    # Replay by default: a plain test run never calls the provider or rewrites the cassette
+    mode = os.getenv("LLM_CASSETTE_MODE", "replay").lower()
+    if mode == "replay" and not path.exists():
+        pytest.skip(f"No LLM cassette at {path}; record one with LLM_CASSETTE_MODE=record")
+    if mode != "replay" and not _can_record():
+        pytest.skip(f"LLM_CASSETTE_MODE={mode} needs provider credentials")
+    model = create_cassette_llm(create_llm, path=str(path), mode=mode)
+    yield model
+    if hasattr(model, "stats"):
+        EVAL_STATS["cassette"] = {"path": model.path, "mode": model.mode, **model.stats}
 
 @pytest.fixture(scope="session")
 def eval_llm(llm):
-    return CustomDeepEvalLLM(llm)
+    model = CustomDeepEvalLLM(llm, max_concurrency=int(os.getenv("EVAL_MAX_CONCURRENCY", "4")))
+    yield model
+    EVAL_STATS["judge_calls"] = model.calls
+
+@pytest.fixture(scope="session")
+def eval_harness():
+    harness = EvalHarness()
+    yield harness
+    if harness.timings:
+        EVAL_STATS["metrics"] = len(harness.timings)
+        EVAL_STATS["evaluation_seconds"] = round(harness.wall_seconds, 2)
+        EVAL_STATS["slowest"] = sorted(harness.timings, key=lambda t: -t[2])[:5]
+
+@pytest.fixture(scope="session")
+def agent_outputs(llm):
+    """Each agent's output, computed once per session (concurrently) and shared by all metrics."""
+    from src.agents import LogsAgent, TelemetryAgent, DeploymentAgent, ReasoningAgent
+    incident = dict(INCIDENT_DATA)
+    findings = SAMPLE_FINDINGS
+    runs = {
+        "logs": lambda: LogsAgent(llm).analyze(incident["logs_path"], incident),
+        "telemetry": lambda: TelemetryAgent(llm).analyze(incident["metrics_path"], incident),
+        "deployment": lambda: DeploymentAgent(llm).analyze(incident["deployment_path"], incident["alert_time"], incident),
+        "reasoning": lambda: ReasoningAgent(llm).correlate(findings["logs"], findings["metrics"], findings["deployments"]),
+    }
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(runs)) as pool:
+        futures = {name: pool.submit(run) for name, run in runs.items()}
+        outputs = {name: future.result() for name, future in futures.items()}
+    # Agents fall back to canned output on a cassette miss; scoring that would hide a stale cassette
+    misses = getattr(llm, "stats", {}).get("misses", 0)
+    if misses:
+        pytest.fail(f"{misses} agent prompt(s) missing from {llm.path}; re-record with LLM_CASSETTE_MODE=record")
+    EVAL_STATS["agent_seconds"] = round(time.perf_counter() - started, 2)
+    return {"incident": incident, "sample_findings": findings, **outputs}
 
 @pytest.fixture
 def incident_data():
-    return {
-        "service": "payment-api",
-        "alert_time": "2024-01-15T14:30:00Z",
-        "symptoms": "High error rate and increased latency on /checkout endpoint",
-        "logs_path": "data/logs.json",
-        "metrics_path": "data/metrics.json",
-        "deployment_path": "data/deployments.json"
-    }
+    return dict(INCIDENT_DATA)
 
 @pytest.fixture
 def sample_findings():
-    return {
-        "logs": ["Database connection timeout", "Connection pool exhausted"],
-        "metrics": ["Latency p95 spiked to 3500ms", "CPU usage 92%"],
-        "deployments": ["Deploy-789 reduced DB pool size"]
-    }
+    return {key: list(values) for key, values in SAMPLE_FINDINGS.items()}
+
+
+def pytest_terminal_summary(terminalreporter):
+    if "metrics" not in EVAL_STATS:
+        return
+    stats = EVAL_STATS
+    per_second = stats["metrics"] / stats["evaluation_seconds"] if stats["evaluation_seconds"] else float("inf")
+    terminalreporter.section("evaluation throughput")
+    terminalreporter.write_line(f"agent outputs: {stats.get('agent_seconds', 0)}s (memoized for the session)")
+    terminalreporter.write_line(f"metrics: {stats['metrics']} in {stats['evaluation_seconds']}s "
+                                f"({per_second:.2f}/s), {stats.get('judge_calls', 0)} judge LLM calls")
+    cassette = stats.get("cassette")
+    if cassette:
+        terminalreporter.write_line(f"cassette {cassette['path']} ({cassette['mode']}): "
+                                    f"{cassette['hits']} replayed, {cassette['recorded']} recorded, "
+                                    f"{cassette['misses']} missing")
+    for name, metric, seconds in stats["slowest"]:
+        terminalreporter.write_line(f"   {seconds:6.2f}s  {name} / {metric}")
+    report_path = os.getenv("EVAL_REPORT")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(stats, f, indent=2)
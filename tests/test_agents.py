@@ -1,92 +1,100 @@
-from deepeval import assert_test
+import pytest
 from deepeval.test_case import LLMTestCase, LLMTestCaseParams
 from deepeval.metrics import GEval, AnswerRelevancyMetric
-from src.agents import LogsAgent, TelemetryAgent, DeploymentAgent, ReasoningAgent
 
-def test_logs_agent_correctness(llm, eval_llm, incident_data):
+
+def build_cases(outputs, eval_llm):
+    """Test case and metrics per test, evaluated together by the session's EvalHarness."""
+    incident = outputs["incident"]
+    findings = outputs["sample_findings"]
+    return {
+        "logs_agent_correctness": (
+            LLMTestCase(
+                input=f"Analyze logs for {incident['service']} with symptoms: {incident['symptoms']}",
+                actual_output=str(outputs["logs"]),
+                expected_output="Identify database connection timeouts, pool exhaustion, and memory errors"
+            ),
+            [GEval(
+                name="Log Analysis Correctness",
+                criteria="Determine if the log findings accurately reflect database connection issues, timeouts, and memory errors based on the expected output.",
+                evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
+                threshold=0.7,
+                model=eval_llm
+            )],
+        ),
+        "telemetry_agent_relevancy": (
+            LLMTestCase(
+                input=f"Analyze metrics for {incident['service']}",
+                actual_output=str(outputs["telemetry"]),
+                expected_output="Identify CPU spikes, memory saturation, and latency increases"
+            ),
+            [GEval(
+                name="Metric Relevancy",
+                criteria="Check if the findings include specific quantitative data like '92% CPU' or '3500ms latency' rather than vague statements.",
+                evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT],
+                threshold=0.7,
+                model=eval_llm
+            )],
+        ),
+        "deployment_agent_risk_assessment": (
+            LLMTestCase(
+                input=f"Analyze deployments before {incident['alert_time']}",
+                actual_output=str(outputs["deployment"]),
+                expected_output="Identify deploy-789 as HIGH RISK due to connection pool reduction"
+            ),
+            [GEval(
+                name="Risk Assessment",
+                criteria="Ensure the agent correctly identifies the high-risk deployment (deploy-789) that changed connection pool settings.",
+                evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
+                threshold=0.7,
+                model=eval_llm
+            )],
+        ),
+        "reasoning_agent_logic": (
+            LLMTestCase(
+                input=f"Correlate evidence: Logs={findings['logs']}, Metrics={findings['metrics']}, Deployments={findings['deployments']}",
+                actual_output=str(outputs["reasoning"]),
+                expected_output="Root cause: Deployment reduced connection pool → Traffic spike → Connection exhaustion"
+            ),
+            [
+                GEval(
+                    name="Logical Reasoning",
+                    criteria="Evaluate if the root cause explanation logically connects the deployment change to the observed errors and metric spikes.",
+                    evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
+                    threshold=0.7,
+                    model=eval_llm
+                ),
+                # Also check answer relevancy
+                AnswerRelevancyMetric(threshold=0.7, model=eval_llm),
+            ],
+        ),
+    }
+
+
+@pytest.fixture(scope="module")
+def evaluations(eval_harness, agent_outputs, eval_llm):
+    return eval_harness.evaluate(build_cases(agent_outputs, eval_llm))
+
+
+def assert_passed(results):
+    for metric, error in results:
+        name = getattr(metric, "__name__", type(metric).__name__)
+        assert error is None, f"{name} raised: {error}"
+        assert metric.is_successful(), f"{name} scored {metric.score} (threshold {metric.threshold}): {metric.reason}"
+
+
+def test_logs_agent_correctness(evaluations):
     """Evaluate if LogsAgent correctly identifies errors."""
-    agent = LogsAgent(llm)
-    findings = agent.analyze(incident_data["logs_path"], incident_data)
-    
-    test_case = LLMTestCase(
-        input=f"Analyze logs for {incident_data['service']} with symptoms: {incident_data['symptoms']}",
-        actual_output=str(findings),
-        expected_output="Identify database connection timeouts, pool exhaustion, and memory errors"
-    )
-    
-    correctness_metric = GEval(
-        name="Log Analysis Correctness",
-        criteria="Determine if the log findings accurately reflect database connection issues, timeouts, and memory errors based on the expected output.",
-        evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
-        threshold=0.7,
-        model=eval_llm
-    )
-    
-    assert_test(test_case, [correctness_metric])
+    assert_passed(evaluations["logs_agent_correctness"])
 
-def test_telemetry_agent_relevancy(llm, eval_llm, incident_data):
+def test_telemetry_agent_relevancy(evaluations):
     """Evaluate if TelemetryAgent extracts relevant metrics."""
-    agent = TelemetryAgent(llm)
-    findings = agent.analyze(incident_data["metrics_path"], incident_data)
-    
-    test_case = LLMTestCase(
-        input=f"Analyze metrics for {incident_data['service']}",
-        actual_output=str(findings),
-        expected_output="Identify CPU spikes, memory saturation, and latency increases"
-    )
-    
-    relevancy_metric = GEval(
-        name="Metric Relevancy",
-        criteria="Check if the findings include specific quantitative data like '92% CPU' or '3500ms latency' rather than vague statements.",
-        evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT],
-        threshold=0.7,
-        model=eval_llm
-    )
-    
-    assert_test(test_case, [relevancy_metric])
+    assert_passed(evaluations["telemetry_agent_relevancy"])
 
-def test_deployment_agent_risk_assessment(llm, eval_llm, incident_data):
+def test_deployment_agent_risk_assessment(evaluations):
     """Evaluate if DeploymentAgent correctly assesses risk."""
-    agent = DeploymentAgent(llm)
-    # Use string timestamp as expected by the agent
-    findings = agent.analyze(incident_data["deployment_path"], incident_data["alert_time"], incident_data)
-    
-    test_case = LLMTestCase(
-        input=f"Analyze deployments before {incident_data['alert_time']}",
-        actual_output=str(findings),
-        expected_output="Identify deploy-789 as HIGH RISK due to connection pool reduction"
-    )
-    
-    risk_metric = GEval(
-        name="Risk Assessment",
-        criteria="Ensure the agent correctly identifies the high-risk deployment (deploy-789) that changed connection pool settings.",
-        evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
-        threshold=0.7,
-        model=eval_llm
-    )
-    
-    assert_test(test_case, [risk_metric])
+    assert_passed(evaluations["deployment_agent_risk_assessment"])
 
-def test_reasoning_agent_logic(llm, eval_llm, sample_findings):
+def test_reasoning_agent_logic(evaluations):
     """Evaluate if ReasoningAgent draws logical conclusions."""
-    agent = ReasoningAgent(llm)
-    result = agent.correlate(sample_findings["logs"], sample_findings["metrics"], sample_findings["deployments"])
-    
-    test_case = LLMTestCase(
-        input=f"Correlate evidence: Logs={sample_findings['logs']}, Metrics={sample_findings['metrics']}, Deployments={sample_findings['deployments']}",
-        actual_output=str(result),
-        expected_output="Root cause: Deployment reduced connection pool → Traffic spike → Connection exhaustion"
-    )
-    
-    logic_metric = GEval(
-        name="Logical Reasoning",
-        criteria="Evaluate if the root cause explanation logically connects the deployment change to the observed errors and metric spikes.",
-        evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
-        threshold=0.7,
-        model=eval_llm
-    )
-    
-    # Also check answer relevancy
-    relevancy_metric = AnswerRelevancyMetric(threshold=0.7, model=eval_llm)
-    
-    assert_test(test_case, [logic_metric, relevancy_metric])
+    assert_passed(evaluations["reasoning_agent_logic"])
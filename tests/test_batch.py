@@ -0,0 +1,23 @@
+import json
+import os
+
+from src import mcp_server
+from src.batch import run_batch
+
+
+def test_batch_reads_shared_store_without_touching_environment(incident_data, monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setenv("REPORT_DB", str(tmp_path / "reports.sqlite"))
+    monkeypatch.delenv("WATCH_DATA", raising=False)
+    stores = []
+    live_store = mcp_server._live_store
+    monkeypatch.setattr(mcp_server, "_live_store", lambda: stores.append(live_store()) or stores[-1])
+    incidents = tmp_path / "incidents.jsonl"
+    incidents.write_text(json.dumps(incident_data) + "\n")
+
+    summary = run_batch(str(incidents), output_dir=str(tmp_path / "batch"), parallel=1, llm_cache=False)
+
+    assert summary["completed"] == 1
+    assert stores and all(store is not None for store in stores)
+    assert "WATCH_DATA" not in os.environ and mcp_server._live_store() is None
@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from src import progress
+from src.coalesce import InvestigationCoalescer, _seconds_apart
+from src.models import IncidentInput
+
+
+def _incident(service="payment-api", symptoms="High error rate on /checkout", alert_time="2024-01-15T14:30:00Z"):
+    return IncidentInput(service=service, alert_time=alert_time, symptoms=symptoms, logs_path="data/logs.json",
+                         metrics_path="data/metrics.json", deployment_path="data/deployments.json")
+
+
+class _Leader:
+    """A run that stays in flight until released, started in a background thread."""
+
+    def __init__(self, coalescer, incident, **kwargs):
+        self.started, self.release = threading.Event(), threading.Event()
+        self.calls = 0
+        self.results = []
+        self.thread = threading.Thread(target=lambda: self.results.append(coalescer.run(incident, self.fn, **kwargs)))
+        self.thread.start()
+        assert self.started.wait(5)
+
+    def fn(self):
+        self.calls += 1
+        progress.emit("triage", "started")
+        self.started.set()
+        assert self.release.wait(5)
+        progress.emit("triage", "finished")
+        return {"root_cause": {"confidence": 88}}
+
+
+def _run_in_thread(fn):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(fn()))
+    thread.start()
+    return thread, results
+
+
+def test_concurrent_duplicates_share_one_run():
+    coalescer = InvestigationCoalescer(window_seconds=120, similarity=0.5)
+    leader = _Leader(coalescer, _incident())
+    events = []
+
+    def duplicate():
+        with progress.listen(events.append):
+            return coalescer.run(_incident(symptoms="High error rate on /checkout endpoint"), leader.fn)
+
+    thread, results = _run_in_thread(duplicate)
+    deadline = time.time() + 5
+    while not coalescer.coalesced:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    leader.release.set()
+    thread.join(5)
+    leader.thread.join(5)
+
+    assert leader.calls == 1
+    assert results == leader.results and results[0] is not leader.results[0]
+    assert [e["status"] for e in events] == ["started", "finished"]
+
+
+def test_distinct_or_finished_incidents_run_separately():
+    coalescer = InvestigationCoalescer(window_seconds=120, similarity=0.5)
+    leader = _Leader(coalescer, _incident(), investigation_id="inc-1")
+    calls = []
+
+    def run(incident, **kwargs):
+        return coalescer.run(incident, lambda: calls.append(incident.service) or {}, **kwargs)
+
+    run(_incident(service="auth-service"))
+    run(_incident(symptoms="Disk full on replica"))
+    run(_incident(), investigation_id="inc-2")
+    assert len(calls) == 3 and coalescer.coalesced == 0
+
+    leader.release.set()
+    leader.thread.join(5)
+    # A re-trigger after the flight finished runs again instead of reusing its report
+    run(_incident(), investigation_id="inc-1")
+    assert len(calls) == 4 and leader.calls == 1
+
+
+def test_alert_times_compare_in_utc():
+    aware = datetime(2024, 1, 15, 16, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert _seconds_apart(aware, datetime(2024, 1, 15, 14, 31)) == 60
+    assert _seconds_apart(datetime(2024, 1, 15, 14, 31), aware) == 60
@@ -0,0 +1,25 @@
+from src.reports import ReportStore
+
+
+def _report(root_cause):
+    return {
+        "incident_summary": {"service": "payment-api"}, "investigation_plan": [],
+        **{f"{source}_evidence": {"source": source, "findings": []} for source in ("logs", "telemetry", "deployment")},
+        "root_cause": {"explanation": root_cause, "confidence": 80, "supporting_evidence": []},
+        "recommended_actions": [], "risk_notes": [], "next_steps": [],
+    }
+
+
+def test_root_cause_search_is_literal(tmp_path):
+    store = ReportStore(tmp_path / "reports.sqlite")
+    for root_cause in ("Pool at 100% after deploy", "pool_size halved", "Pool size halved", r"C:\pool drained"):
+        store.add(_report(root_cause))
+
+    def matches(search):
+        return sorted(r["root_cause"] for r in store.query(search=search))
+
+    assert matches("100%") == ["Pool at 100% after deploy"]
+    assert matches("pool_size") == ["pool_size halved"]
+    assert matches("\\pool") == [r"C:\pool drained"]
+    assert store.count(search="%") == 1
+    store.close()
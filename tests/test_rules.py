@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+from src import rules
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+def _load(name):
+    with open(DATA_DIR / name) as f:
+        return json.load(f)
+
+
+def test_pool_exhaustion_fast_path(incident_data):
+    """The sample incident is the textbook deploy → pool exhaustion case."""
+    match = rules.evaluate(incident_data, _load("logs.json"), _load("metrics.json"), _load("deployments.json"))
+
+    assert match is not None
+    assert match["rule"] == "pool_exhaustion"
+    assert match["confidence"] >= 85
+    assert "deploy-789" in match["root_cause"]
+    assert match["actions"][0]["action"].startswith("Roll back deploy-789")
+    assert "minutes before the first error" in match["root_cause"]
+
+
+def test_ambiguous_evidence_defers_to_llm(incident_data):
+    """Without a matching deployment the rules must not claim a root cause."""
+    deployments = [d for d in _load("deployments.json") if d["deployment_id"] != "deploy-789"]
+    match = rules.evaluate(incident_data, _load("logs.json"), _load("metrics.json"), deployments)
+
+    assert match is None
+
+
+def test_alert_far_from_the_errors_defers_to_llm(incident_data):
+    """Errors and metrics from another day must not answer a fresh alert."""
+    incident = {**incident_data, "alert_time": "2024-01-16T09:00:00Z"}
+    match = rules.evaluate(incident, _load("logs.json"), _load("metrics.json"), _load("deployments.json"))
+
+    assert match is None
@@ -0,0 +1,42 @@
+import asyncio
+
+from src.scheduler import P0, P1, P2, InvestigationScheduler, default_concurrency
+
+
+async def _drain(scheduler):
+    return [await scheduler.get() for _ in range(len(scheduler))]
+
+
+def test_higher_priority_first_services_in_turn():
+    async def run():
+        scheduler = InvestigationScheduler()
+        for item, priority, service in [("a1", P2, "a"), ("a2", P2, "a"), ("a3", P2, "a"),
+                                        ("b1", P2, "b"), ("c1", P1, "c"), ("b2", P2, "b"), ("u1", P0, "a")]:
+            await scheduler.admit(item, priority, service)
+        assert scheduler.depth_by_priority() == {"P0": 1, "P1": 1, "P2": 5, "P3": 0}
+        return await _drain(scheduler)
+
+    assert asyncio.run(run()) == ["u1", "c1", "a1", "b1", "a2", "b2", "a3"]
+
+
+def test_full_queue_displaces_newest_lowest_priority_item():
+    async def run():
+        scheduler = InvestigationScheduler(max_pending=3)
+        for item, service in [("a1", "a"), ("a2", "a"), ("b1", "b")]:
+            await scheduler.admit(item, P2, service)
+        assert await scheduler.admit("c1", P2, "c") == (False, "c1")
+        # Evicted from the service with the longest backlog
+        assert await scheduler.admit("u1", P0, "c") == (True, "a2")
+        return await _drain(scheduler)
+
+    assert asyncio.run(run()) == ["u1", "a1", "b1"]
+
+
+def test_default_concurrency_counts_every_service_branch(monkeypatch):
+    monkeypatch.delenv("MAX_CONCURRENT_INVESTIGATIONS", raising=False)
+    monkeypatch.delenv("LLM_CALLS_PER_INVESTIGATION", raising=False)
+    monkeypatch.setenv("LLM_MAX_CONCURRENT_REQUESTS", "30")
+    monkeypatch.setenv("MAX_IMPLICATED_SERVICES", "5")
+    assert default_concurrency() == 2
+    monkeypatch.setenv("MAX_IMPLICATED_SERVICES", "1")
+    assert default_concurrency() == 10
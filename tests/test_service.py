@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from src.models import IncidentInput
+from src.service import InvestigationService, QueueFullError
+
+
+def _incident(service="payment-api", symptoms="Elevated latency"):
+    return IncidentInput(service=service, alert_time="2024-01-15T14:30:00Z", symptoms=symptoms,
+                         logs_path="data/logs.json", metrics_path="data/metrics.json",
+                         deployment_path="data/deployments.json")
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def make_service(monkeypatch, tmp_path):
+    """Services whose investigations block on ``gate`` and record what ran, in order."""
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite"))
+    gate = threading.Event()
+    ran = []
+
+    def investigate(report_id, incident, deterministic):
+        ran.append((report_id, deterministic))
+        gate.wait(5)
+        raise RuntimeError("stopped by test")
+
+    def make(**kwargs):
+        service = InvestigationService(**kwargs)
+        service._investigate = investigate
+        return service.start()
+
+    make.gate, make.ran = gate, ran
+    yield make
+    gate.set()
+
+
+def test_submit_never_evicts_unfinished_results(make_service):
+    service = make_service(workers=1, max_results=3, overload_policy="reject")
+    first, second, third = (service.submit(_incident()) for _ in range(3))
+    with pytest.raises(QueueFullError):
+        service.submit(_incident())
+    assert list(service.results) == [first, second, third]
+
+    make_service.gate.set()
+    _wait_for(lambda: all(service.get(rid)["status"] == "failed" for rid in (first, second, third)))
+    make_service.gate.clear()
+    fourth = service.submit(_incident())
+    assert list(service.results) == [second, third, fourth]
+
+
+def test_reject_policy_displaces_lower_priority_or_rejects(make_service):
+    service = make_service(workers=1, queue_size=1, overload_policy="reject")
+    service.submit(_incident("search-api"))
+    _wait_for(lambda: len(make_service.ran) == 1)
+    queued = service.submit(_incident("search-api"))
+    with pytest.raises(QueueFullError):
+        service.submit(_incident("search-api"))
+
+    urgent = service.submit(_incident("search-api", symptoms="Checkout outage"))
+    assert service.get(queued)["status"] == "rejected"
+    assert service.get(urgent)["status"] == "queued"
+    assert service.queue_stats()["by_priority"]["P0"] == 1
+
+
+def test_degrade_policy_runs_overflow_on_capped_pool(make_service):
+    service = make_service(workers=1, queue_size=1, overload_policy="degrade", degraded_workers=1)
+    service.submit(_incident("search-api"))
+    _wait_for(lambda: len(make_service.ran) == 1)
+    queued = service.submit(_incident("search-api"))
+
+    degraded = service.submit(_incident("search-api"))
+    _wait_for(lambda: len(make_service.ran) == 2)
+    assert make_service.ran[-1] == (degraded, True)
+    stats = service.queue_stats()
+    assert (stats["running"], stats["degraded_running"], stats["depth"]) == (2, 1, 1)
+
+    # Degraded slots are busy too: overflow is rejected like under "reject"
+    with pytest.raises(QueueFullError):
+        service.submit(_incident("search-api"))
+    service.submit(_incident("search-api", symptoms="Checkout outage"))
+    assert service.get(queued)["status"] == "rejected"
+    assert len(make_service.ran) == 2
+
+    make_service.gate.set()
+    _wait_for(lambda: service.queue_stats()["running"] == 0)
+    assert service.queue_stats()["degraded_running"] == 0
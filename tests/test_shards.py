@@ -0,0 +1,44 @@
+from src import shards
+from src.shards import iter_shards, write_shard
+
+
+def _records(*minutes):
+    return [{"timestamp": f"2024-01-15T14:{m:02d}:00Z", "message": f"m{m}"} for m in minutes]
+
+
+def test_header_prunes_shards_outside_window(tmp_path, monkeypatch):
+    early = tmp_path / "logs-1.jsonl"
+    late = tmp_path / "logs-2.jsonl.gz"
+    write_shard(early, _records(0, 5, 10))
+    write_shard(late, _records(30, 35))
+
+    decoded = []
+    decode = shards._decode_with_range
+    monkeypatch.setattr(shards, "_decode_with_range",
+                        lambda path, start, end: decoded.append(path) or decode(path, start, end))
+    records = list(iter_shards([early, late], start="2024-01-15T14:29:00Z", max_workers=1))
+
+    assert [r["message"] for r in records] == ["m30", "m35"]
+    assert decoded == [str(late)]
+
+
+def test_shards_merge_in_timestamp_order(tmp_path):
+    paths = [tmp_path / "logs-1.jsonl", tmp_path / "logs-2.jsonl.gz", tmp_path / "logs-3.jsonl"]
+    write_shard(paths[0], _records(1, 4, 7))
+    write_shard(paths[1], _records(8, 2, 5))
+    write_shard(paths[2], _records(3, 6, 9))
+
+    expected = [f"m{m}" for m in range(2, 9)]
+    window = {"start": "2024-01-15T14:02:00Z", "end": "2024-01-15T14:08:00Z"}
+    assert [r["message"] for r in iter_shards(paths, max_workers=1, **window)] == expected
+    assert [r["message"] for r in iter_shards(paths, max_workers=2, **window)] == expected
+    assert shards._get_pool(2) is shards._get_pool(2)
+
+
+def test_string_bounds_are_normalized_to_utc(tmp_path):
+    path = tmp_path / "logs-1.jsonl"
+    write_shard(path, _records(10, 20, 30))
+
+    assert shards.normalize_ts("2024-01-15T16:20:00.250+02:00") == "2024-01-15T14:20:00Z"
+    window = {"start": "2024-01-15T14:20:00+00:00", "end": "2024-01-15T09:25:00-05:00"}
+    assert [r["message"] for r in iter_shards([path], max_workers=1, **window)] == ["m20"]
@@ -0,0 +1,24 @@
+from src.similarity import SimilarityIndex
+
+
+def _report(root_cause):
+    return {"incident_summary": {"service": "payment-api"}, "root_cause": {"explanation": root_cause, "confidence": 80}}
+
+
+FEATURES = ["service:payment-api", "symptom:latency", "log:payment-api:connection pool exhausted"]
+
+
+def test_index_appends_and_reloads_latest_entries(tmp_path):
+    path = tmp_path / "similarity_index.jsonl"
+    index = SimilarityIndex(path)
+    index.add("inc-1", FEATURES, _report("first guess"))
+    index.add("inc-2", ["service:auth-service", "symptom:timeouts"], _report("token cache"))
+    index.add("inc-1", FEATURES, _report("pool exhaustion"))
+    assert len(path.read_text().splitlines()) == 3
+
+    with open(path, "a") as f:
+        f.write('{"id": "torn')
+    reloaded = SimilarityIndex(path)
+    assert set(reloaded.entries) == {"inc-1", "inc-2"}
+    assert reloaded.query(FEATURES, k=1)[0]["root_cause"] == "pool exhaustion"
+    assert len(path.read_text().splitlines()) == 2
@@ -0,0 +1,39 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src import agents, tracing
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyLLM:
+    model = "flaky"
+
+    def __init__(self, failures, error=RateLimitError):
+        self.failures, self.error = failures, error
+
+    def invoke(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise self.error("try again")
+        return AIMessage(content="{}", usage_metadata={"input_tokens": 3, "output_tokens": 1, "total_tokens": 4})
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    monkeypatch.setenv("LLM_RETRY_BACKOFF_SECONDS", "0")
+    exporter = tracing.MemoryExporter()
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+    monkeypatch.setattr(tracing, "_configured", True)
+    return exporter.spans
+
+
+def test_llm_span_records_retries(spans):
+    agents._invoke(FlakyLLM(failures=2), [HumanMessage(content="hi")], agent="logs")
+    assert spans[-1]["attributes"]["retries"] == 2
+
+    with pytest.raises(ValueError):
+        agents._invoke(FlakyLLM(failures=1, error=ValueError), [HumanMessage(content="hi")], agent="logs")
+    assert spans[-1]["attributes"]["retries"] == 0 and spans[-1]["status"] == "error"
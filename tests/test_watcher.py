@@ -0,0 +1,81 @@
+import json
+import os
+
+from src.watcher import LogTailer, TelemetryStore
+
+
+def _line(level, message="msg"):
+    return json.dumps({"timestamp": "2024-01-15T14:30:00Z", "level": level,
+                       "service": "payment-api", "message": message}) + "\n"
+
+
+def test_tailer_appends_and_buffers_partial_lines(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    path.write_text(_line("INFO", "a"))
+    tailer = LogTailer(path)
+    assert [r["message"] for r in tailer.read_new()] == ["a"]
+
+    partial = _line("ERROR", "b")
+    with open(path, "a") as f:
+        f.write(partial[:10])
+    assert tailer.read_new() == []
+    with open(path, "a") as f:
+        f.write(partial[10:] + _line("WARN", "c"))
+    assert [r["message"] for r in tailer.read_new()] == ["b", "c"]
+    assert not tailer.reset
+
+
+def test_tailer_drains_rotated_file_including_unterminated_line(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    path.write_text(_line("INFO", "a"))
+    tailer = LogTailer(path)
+    tailer.read_new()
+
+    with open(path, "a") as f:
+        f.write(_line("ERROR", "b").rstrip("\n"))
+    os.rename(path, tmp_path / "logs.jsonl.1")
+    path.write_text(_line("INFO", "c"))
+    assert [r["message"] for r in tailer.read_new()] == ["b", "c"]
+    assert not tailer.reset
+
+
+def test_store_rebuilds_after_truncation(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    path.write_text("".join(_line("ERROR") for _ in range(5)))
+    store = TelemetryStore(tmp_path)
+    store.poll()
+    deltas = []
+    store.subscribe(deltas.append)
+
+    path.write_text(_line("INFO"))
+    store.poll()
+    assert deltas[-1]["reset"] and len(deltas[-1]["logs"]) == 1
+    assert len(store.logs) == 1 and store.level_counts == {"INFO": 1}
+
+    # Same size, different content
+    path.write_text(_line("WARN"))
+    store.poll()
+    assert deltas[-1]["reset"] and store.level_counts == {"WARN": 1}
+
+
+def test_store_rebuilds_after_json_rewrite(tmp_path):
+    path = tmp_path / "logs.json"
+    path.write_text(json.dumps([json.loads(_line("ERROR")) for _ in range(5)]))
+    store = TelemetryStore(tmp_path)
+    store.poll()
+
+    path.write_text(json.dumps([json.loads(_line("INFO"))]))
+    assert store.poll()["reset"]
+    assert len(store.logs) == 1 and store.level_counts == {"INFO": 1}
+    assert store.by_level.keys() == {"INFO"}
+
+    records = [json.loads(_line("INFO")), json.loads(_line("CRITICAL"))]
+    path.write_text(json.dumps(records))
+    delta = store.poll()
+    assert not delta["reset"] and delta["logs"] == records[1:]
+
+    # Same length, rewritten entry
+    records[0]["level"] = "WARN"
+    path.write_text(json.dumps(records, indent=2))
+    assert store.poll()["reset"]
+    assert store.level_counts == {"WARN": 1, "CRITICAL": 1}